@@ -0,0 +1,72 @@
+"""Array builtins against the same work done element by element in Monkey.
+
+Each row computes one result three ways: "vector", with the builtin on a
+packed array (and, for map and filter, a function simple enough to run
+as a vectors.Kernel); "callback", with builtins and a function that has
+to go through the evaluator for each element; and "loop", with a
+tail-recursive Monkey loop over the indexes, building its result with
+push as Monkey code without map has to. Times are the mean per run.
+
+Run from the python/ directory:
+
+    python -m benchmarks.arrays [n] [runs]
+"""
+import sys
+import time
+
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+from intp import vectors
+
+ROWS = [
+    (
+        "sum",
+        "sum(range(%(n)d))",
+        "sum(map(range(%(n)d), fn(x) { let y = x; y }))",
+        "let s = fn(a, i, acc) { if (i == len(a)) { acc } else { s(a, i + 1, acc + a[i]) } }; s(range(%(n)d), 0, 0)",
+    ),
+    (
+        "map",
+        "map(range(%(n)d), fn(x) { x * x + 1 })",
+        "map(range(%(n)d), fn(x) { let y = x; y * y + 1 })",
+        "let m = fn(a, i, out) { if (i == len(a)) { out } else { m(a, i + 1, push(out, a[i] * a[i] + 1)) } };"
+        " m(range(%(n)d), 0, [])",
+    ),
+    (
+        "filter",
+        "filter(range(%(n)d), fn(x) { x / 3 * 3 == x })",
+        "filter(range(%(n)d), fn(x) { let y = x; y / 3 * 3 == y })",
+        "let f = fn(a, i, out) { if (i == len(a)) { out } else { let x = a[i];"
+        " f(a, i + 1, if (x / 3 * 3 == x) { push(out, x) } else { out }) } }; f(range(%(n)d), 0, [])",
+    ),
+]
+
+
+def measure(source, runs):
+    program = parser.Parser(lexer.Lexer(source)).parse_program()
+    r = resolver.resolve(program)
+    code = evaluator.compile(program, r, tail_calls=True)
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = code(object.Frame())
+    return result, (time.perf_counter() - start) / runs
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 10000
+    runs = int(argv[2]) if len(argv) > 2 else 5
+    print("n = %d, %s, %d runs" % (n, "numpy" if vectors.numpy is not None else "array('q')", runs))
+    for name, *sources in ROWS:
+        results = []
+        for label, source in zip(("vector", "callback", "loop"), sources):
+            result, elapsed = measure(source % {"n": n}, runs)
+            results.append(result.inspect())
+            print("  %-7s %-8s %10.3f ms" % (name, label, elapsed * 1000))
+        assert len(set(results)) == 1, (name, [r[:80] for r in results])
+
+
+if __name__ == "__main__":
+    main(sys.argv)
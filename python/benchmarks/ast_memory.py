@@ -0,0 +1,55 @@
+"""Compare the memory held by an object-form Program and its arena form.
+
+Run from the python/ directory:
+
+    python -m benchmarks.ast_memory [statements]
+"""
+import random
+import sys
+import tracemalloc
+
+from intp import arena
+from intp import lexer
+from intp import parser
+
+
+def make_input(statements, seed=1):
+    rnd = random.Random(seed)
+    operators = ["+", "-", "*", "/", "<", ">", "==", "!="]
+    lines = []
+    for i in range(statements):
+        terms = []
+        for _ in range(rnd.randint(2, 8)):
+            name = "".join(rnd.choice("abcdefgh") for _ in range(rnd.randint(1, 6)))
+            term = rnd.choice([name, str(rnd.randint(0, 1000))])
+            if rnd.random() < 0.2:
+                term = rnd.choice("-!") + term
+            terms.append(term)
+        lines.append("%s;" % (" %s " % rnd.choice(operators)).join(terms))
+    return "\n".join(lines)
+
+
+def traced(fn):
+    tracemalloc.start()
+    result = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 100000
+    input = make_input(statements)
+    print("input: %d statements, %.1f MB" % (statements, len(input) / 1024 / 1024))
+
+    program, object_size = traced(lambda: parser.Parser(lexer.Lexer(input)).parse_program())
+    a, arena_size = traced(lambda: arena.to_arena(program))
+
+    print("nodes:        %d" % len(a))
+    print("object form:  %.1f MB" % (object_size / 1024 / 1024))
+    print("arena form:   %.1f MB" % (arena_size / 1024 / 1024))
+    print("ratio:        %.1fx" % (object_size / arena_size))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,62 @@
+"""Arithmetic-heavy programs on the bytecode VM, the transpiler to Python,
+the closure evaluator and a per-node tree walker.
+
+Run from the python/ directory:
+
+    python -m benchmarks.bytecode [statements] [runs]
+"""
+import sys
+import time
+
+from intp import compiler
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import transpiler
+from intp import vm
+from benchmarks.evaluate import make_input, walk
+
+
+def timed(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return time.perf_counter() - start, result.inspect()
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 2000
+    runs = int(argv[2]) if len(argv) > 2 else 50
+    program = parser.Parser(lexer.Lexer(make_input(statements))).parse_program()
+
+    code = evaluator.compile(program)
+    c = compiler.Compiler()
+    c.compile(program)
+    bytecode = c.bytecode()
+    print(
+        "%d statements, %d runs, %d bytes of bytecode, %d constants"
+        % (statements, runs, len(bytecode.instructions), len(bytecode.constants))
+    )
+
+    def run_vm():
+        machine = vm.VM(bytecode)
+        machine.run()
+        return machine.last_popped_stack_elem()
+
+    walked, expected = timed(lambda: walk(program, object.Environment()), runs)
+    print("tree walk %.3fs" % walked)
+    function = transpiler.compile_program(program)
+    backends = [
+        ("closures", lambda: code(object.Environment())),
+        ("vm", run_vm),
+        ("python", lambda: transpiler.to_object(function())),
+    ]
+    for name, fn in backends:
+        elapsed, result = timed(fn, runs)
+        assert result == expected, (name, result, expected)
+        print("%-9s %.3fs  speedup %.2fx" % (name, elapsed, walked / elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,79 @@
+"""Seeded generator of Monkey corpora for the benchmarks.
+
+Run from the python/ directory to print one:
+
+    python -m benchmarks.corpus [statements] [depth] [seed]
+"""
+import random
+import sys
+
+# relative weights of the infix operators
+DEFAULT_OPERATORS = {"+": 4, "-": 3, "*": 3, "/": 1, "<": 1, ">": 1, "==": 1, "!=": 1}
+
+
+def generate(statements, depth=3, operators=None, seed=0, width=4, prefix_rate=0.15):
+    """Returns the source of a Monkey program of `statements` statements.
+
+    Every statement is a let or an expression statement over up to `width`
+    terms joined by infix operators drawn from `operators` (a dict of
+    operator to weight). One term in each statement is a parenthesized
+    group nested `depth` levels deep, so the size of a statement grows
+    linearly with its depth. Terms are integers, booleans and earlier
+    names, a `prefix_rate` of them under - or !. The same arguments always
+    give the same source.
+    """
+    rnd = random.Random(seed)
+    operators = DEFAULT_OPERATORS if operators is None else operators
+    ops = list(operators)
+    weights = [operators[op] for op in ops]
+    names = []
+    lines = []
+
+    def term():
+        r = rnd.random()
+        if names and r < 0.4:
+            text = rnd.choice(names)
+        elif r < 0.9:
+            text = str(rnd.randint(0, 1000))
+        else:
+            text = rnd.choice(["true", "false"])
+        if rnd.random() < prefix_rate:
+            text = rnd.choice("-!") + text
+        return text
+
+    def flat(inner=None):
+        terms = [term() for _ in range(rnd.randint(1, width))]
+        if inner is not None:
+            terms[rnd.randrange(len(terms))] = "(" + inner + ")"
+        out = [terms[0]]
+        for t in terms[1:]:
+            out.append(rnd.choices(ops, weights)[0])
+            out.append(t)
+        return " ".join(out)
+
+    for i in range(statements):
+        expression = None
+        for _ in range(depth):
+            expression = flat(expression)
+        expression = flat(expression)
+        if rnd.random() < 0.5:
+            # identifiers are letters only
+            n = i % 64
+            name = "v" + "abcdefgh"[n // 8] + "abcdefgh"[n % 8]
+            lines.append("let %s = %s;" % (name, expression))
+            if name not in names:
+                names.append(name)
+        else:
+            lines.append(expression + ";")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 10
+    depth = int(argv[2]) if len(argv) > 2 else 3
+    seed = int(argv[3]) if len(argv) > 3 else 0
+    sys.stdout.write(generate(statements, depth, seed=seed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,72 @@
+"""Compare the explicit-stack expression parser with the old recursive one.
+
+Run from the python/ directory:
+
+    python -m benchmarks.deep_expressions [depth]
+"""
+import sys
+import time
+
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+class RecursiveParser(parser.Parser):
+    """The recursive _parse_expression the parser used to have."""
+
+    def _parse_expression(self, precedence):
+        prefix = self.prefix_parse_fns.get(self.cur_token.type)
+        if not prefix:
+            self._no_prefix_parse_fn_error(self.cur_token)
+            return None
+        left_exp = prefix(self)
+        while not self._peek_token_is(token.SEMICOLON) and precedence < self._peek_precedence():
+            infix = self.infix_parse_fns.get(self.peek_token.type)
+            if not infix:
+                return left_exp
+            self._next_token()
+            left_exp = infix(self, left_exp)
+
+        return left_exp
+
+
+def inputs(depth):
+    return {
+        "prefix": "-" * depth + "1;",
+        "chain": " + ".join(["a * b"] * depth) + ";",
+        "right": " == ".join(["-a"] * depth) + ";",
+    }
+
+
+def measure(cls, input, repeat=5):
+    best = None
+    for _ in range(repeat):
+        tokens = lexer.Lexer(input).token_stream()
+        start = time.perf_counter()
+        program = cls(tokens).parse_program()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return program, best
+
+
+def main(argv):
+    depth = int(argv[1]) if len(argv) > 1 else 10000
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * 4 + 1000))
+
+    for name, input in inputs(depth).items():
+        program, iterative = measure(parser.Parser, input)
+        try:
+            expected, recursive = measure(RecursiveParser, input)
+        except RecursionError:
+            print("%-7s depth %d: iterative %.4fs, recursive hit RecursionError" % (name, depth, iterative))
+            continue
+        assert program.string() == expected.string()
+        print(
+            "%-7s depth %d: iterative %.4fs, recursive %.4fs (%.2fx)"
+            % (name, depth, iterative, recursive, recursive / iterative)
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,145 @@
+"""Compare the closure-compiling evaluator, with and without resolved
+variable slots, with a per-node tree walker.
+
+Run from the python/ directory:
+
+    python -m benchmarks.evaluate [statements] [runs]
+"""
+import random
+import sys
+import time
+
+from intp import ast
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+
+
+def walk(node, env):
+    """Evaluates the way the book's Eval does: an isinstance chain per node."""
+    if isinstance(node, ast.Program):
+        result = None
+        for stmt in node.statements:
+            result = walk(stmt, env)
+            if isinstance(result, object.ReturnValue):
+                return result.value
+            if isinstance(result, object.Error):
+                return result
+        return result
+    elif isinstance(node, ast.ExpressionStatement):
+        return walk(node.expression, env)
+    elif isinstance(node, ast.IntegerLiteral):
+        return object.Integer(node.value)
+    elif isinstance(node, ast.Boolean):
+        return object.TRUE if node.value else object.FALSE
+    elif isinstance(node, ast.PrefixExpression):
+        right = walk(node.right, env)
+        if isinstance(right, object.Error):
+            return right
+        if node.operator == "!":
+            return object.TRUE if right is object.FALSE or right is object.NULL else object.FALSE
+        if not isinstance(right, object.Integer):
+            return object.Error("unknown operator: -" + right.type())
+        return object.Integer(-right.value)
+    elif isinstance(node, ast.InfixExpression):
+        left = walk(node.left, env)
+        if isinstance(left, object.Error):
+            return left
+        right = walk(node.right, env)
+        if isinstance(right, object.Error):
+            return right
+        if isinstance(left, object.Integer) and isinstance(right, object.Integer):
+            a, b, op = left.value, right.value, node.operator
+            if op == "+":
+                return object.Integer(a + b)
+            elif op == "-":
+                return object.Integer(a - b)
+            elif op == "*":
+                return object.Integer(a * b)
+            elif op == "/":
+                return object.Integer(int(a / b))
+            elif op == "<":
+                return object.TRUE if a < b else object.FALSE
+            elif op == ">":
+                return object.TRUE if a > b else object.FALSE
+            elif op == "==":
+                return object.TRUE if a == b else object.FALSE
+            elif op == "!=":
+                return object.TRUE if a != b else object.FALSE
+        if node.operator == "==":
+            return object.TRUE if left is right else object.FALSE
+        if node.operator == "!=":
+            return object.TRUE if left is not right else object.FALSE
+        return object.Error("type mismatch")
+    elif isinstance(node, ast.LetStatement):
+        val = walk(node.value, env)
+        if isinstance(val, object.Error):
+            return val
+        env.set(node.name.value, val)
+    elif isinstance(node, ast.ReturnStatement):
+        return object.ReturnValue(walk(node.return_value, env))
+    elif isinstance(node, ast.Identifier):
+        val = env.get(node.value)
+        if val is None:
+            return object.Error("identifier not found: " + node.value)
+        return val
+    return None
+
+
+def make_input(statements, seed=0):
+    # Every let uses a single earlier variable and shrinks it, so the values
+    # stay small however long the program is.
+    rnd = random.Random(seed)
+    names = ["a"]
+    lines = ["let a = 1;"]
+    for i in range(statements):
+        x = rnd.choice(names)
+        n = rnd.randint(1, 50)
+        if i % 3 == 2:
+            lines.append("%s * %d < %d + %d == !(%s > 10);" % (x, n, n, rnd.randint(1, 50), x))
+            continue
+        name = "v" * (i % 5 + 1) + "x" * (i // 5 % 26)
+        lines.append("let %s = (%s * 3 + %d) / 4 - -%d * 2;" % (name, x, n, rnd.randint(1, 9)))
+        names = (names + [name])[-8:]
+    lines.append(" + ".join(names) + ";")
+    return "\n".join(lines)
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 2000
+    runs = int(argv[2]) if len(argv) > 2 else 50
+    program = parser.Parser(lexer.Lexer(make_input(statements))).parse_program()
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        expected = walk(program, object.Environment())
+    walked = time.perf_counter() - start
+
+    start = time.perf_counter()
+    code = evaluator.compile(program)
+    compiled = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = code(object.Environment())
+    run = time.perf_counter() - start
+    assert result.inspect() == expected.inspect()
+
+    r = resolver.resolve(program)
+    code = evaluator.compile(program, r)
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = code(object.Frame(len(r.scope)))
+    resolved = time.perf_counter() - start
+    assert result.inspect() == expected.inspect()
+
+    print("%d statements, %d runs" % (statements, runs))
+    print("tree walk %.3fs" % walked)
+    print("compile   %.3fs" % compiled)
+    print("closures  %.3fs  speedup %.2fx" % (run, walked / run))
+    print("resolved  %.3fs  speedup %.2fx" % (resolved, walked / resolved))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
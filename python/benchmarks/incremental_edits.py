@@ -0,0 +1,64 @@
+"""Single-character edits in a large file: Document.edit vs a full reparse.
+
+Run from the python/ directory:
+
+    python -m benchmarks.incremental_edits [lines] [edits]
+"""
+import random
+import sys
+import time
+
+from intp import incremental
+from intp import lexer
+from intp import parser
+
+
+def make_input(lines, seed=1):
+    rnd = random.Random(seed)
+    templates = [
+        lambda: "let %s = %d;" % (rnd.choice("abcdefg"), rnd.randint(0, 999)),
+        lambda: "%s + %s * %d - %s;" % (rnd.choice("abc"), rnd.choice("def"), rnd.randint(0, 99), rnd.choice("xyz")),
+        lambda: "-%s == !%s;" % (rnd.choice("abc"), rnd.choice("xyz")),
+    ]
+    return "\n".join(rnd.choice(templates)() for _ in range(lines)) + "\n"
+
+
+def full_parse(source):
+    p = parser.Parser(lexer.Lexer(source).token_stream())
+    return p.parse_program()
+
+
+def main(argv):
+    lines = int(argv[1]) if len(argv) > 1 else 100000
+    edits = int(argv[2]) if len(argv) > 2 else 20
+    rnd = random.Random(2)
+    source = make_input(lines)
+
+    start = time.perf_counter()
+    full_parse(source)
+    full = time.perf_counter() - start
+    print("%d lines, %.1f MB; full parse %.3fs" % (lines, len(source) / 1024 / 1024, full))
+
+    doc = incremental.Document(source)
+    times = []
+    for _ in range(edits):
+        offset = rnd.randrange(len(doc.source))
+        if rnd.random() < 0.5:
+            args = (offset, 0, rnd.choice("abc123+-;"))
+        else:
+            args = (offset, 1, "")
+        start = time.perf_counter()
+        doc.edit(*args)
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    median = times[len(times) // 2]
+    print(
+        "incremental edit: median %.4fs, max %.4fs (%.0fx faster than a full parse)"
+        % (median, times[-1], full / median)
+    )
+    assert doc.program.string() == full_parse(doc.source).string()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,68 @@
+"""Compare Lexer.next_token with Lexer.tokenize on a multi-megabyte input.
+
+Run from the python/ directory:
+
+    python -m benchmarks.lexer_throughput [megabytes]
+"""
+import sys
+import time
+
+from intp import lexer
+from intp import token
+
+SNIPPET = """let five = 5;
+let ten = 10;
+let add = fn(x, y) {
+  x + y;
+};
+let result = add(five, ten);
+!-/*5;
+5 < 10 > 5;
+if (5 < 10) {
+  return true;
+} else {
+  return false;
+}
+10 == 10;
+10 != 9;
+"""
+
+
+def make_input(megabytes):
+    return SNIPPET * (megabytes * 1024 * 1024 // len(SNIPPET) + 1)
+
+
+def run_next_token(input):
+    l = lexer.Lexer(input)
+    count = 0
+    while l.next_token().type != token.EOF:
+        count += 1
+    return count + 1
+
+
+def run_tokenize(input):
+    return len(lexer.Lexer(input).tokenize())
+
+
+def measure(fn, input):
+    start = time.perf_counter()
+    count = fn(input)
+    return count, time.perf_counter() - start
+
+
+def main(argv):
+    megabytes = int(argv[1]) if len(argv) > 1 else 4
+    input = make_input(megabytes)
+    print("input: %.1f MB" % (len(input) / 1024 / 1024))
+
+    results = {}
+    for name, fn in [("next_token", run_next_token), ("tokenize", run_tokenize)]:
+        count, elapsed = measure(fn, input)
+        results[name] = elapsed
+        print("%-10s %9d tokens %7.3fs %12.0f tokens/s" % (name, count, elapsed, count / elapsed))
+
+    print("speedup: %.1fx" % (results["next_token"] / results["tokenize"]))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,56 @@
+"""Memoized and plain calls of pure Monkey functions.
+
+The fib rows run the doubly recursive Fibonacci, where memoizing turns an
+exponential number of calls into a linear one. The loop rows call a
+function with new arguments every time, so every lookup misses: they show
+what memoizing costs when it cannot help.
+
+Run from the python/ directory:
+
+    python -m benchmarks.memo [n] [runs]
+"""
+import sys
+import time
+
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+
+FIB = "let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(%d)"
+LOOP = "let loop = fn(n) { if (n == 0) { 0 } else { 1 + loop(n - 1) } }; loop(150)"
+
+
+def measure(source, runs, frames, memoize):
+    program = parser.Parser(lexer.Lexer(source)).parse_program()
+    r = resolver.resolve(program) if frames else None
+    code = evaluator.compile(program, r, memoize=memoize)
+    new_env = object.Frame if frames else object.Environment
+    stats = evaluator.MemoStats()
+    start = time.perf_counter()
+    for _ in range(runs):
+        env = new_env()
+        env.memo_stats = stats
+        result = code(env)
+    return result, stats, time.perf_counter() - start
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 20
+    runs = int(argv[2]) if len(argv) > 2 else 20
+    for name, source in [("fib(%d)" % n, FIB % n), ("loop(150)", LOOP)]:
+        print("%s x %d" % (name, runs))
+        for frames in (False, True):
+            for memoize in (False, True):
+                result, stats, elapsed = measure(source, runs, frames, memoize)
+                kind = "frames" if frames else "env"
+                mode = "memo" if memoize else "plain"
+                print(
+                    "  %-8s %-5s %8.4fs  = %s  hits %d, misses %d"
+                    % (kind, mode, elapsed, result.inspect(), stats.hits, stats.misses)
+                )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,84 @@
+"""Cost of intp.optimizer and what it saves the evaluator and the VM.
+
+Run from the python/ directory:
+
+    python -m benchmarks.optimizer [statements] [runs]
+"""
+import random
+import sys
+import time
+
+from intp import compiler
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import optimizer
+from intp import parser
+from intp import vm
+
+
+def make_input(statements, seed=0):
+    # the kind of code our generators emit: constants spelled out as
+    # expressions, redundant signs and identities around real work
+    rnd = random.Random(seed)
+    lines = ["let size = 5 * 10 - 2;", "let on = !false;", "let x = 7;"]
+    for i in range(statements):
+        n = rnd.randint(1, 9)
+        lines.append(
+            "let x = (-(-x) * 1 + %d * (size / 4) - 0 + %d * 3) / (2 + 2) * 1;" % (n, rnd.randint(1, 99))
+        )
+        if i % 4 == 0:
+            lines.append("x > size * 2 == !!on;")
+    lines.append("x;")
+    return "\n".join(lines)
+
+
+def parse(source):
+    return parser.Parser(lexer.Lexer(source)).parse_program()
+
+
+def run_both(program, runs):
+    code = evaluator.compile(program)
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = code(object.Environment())
+    closures = time.perf_counter() - start
+
+    c = compiler.Compiler()
+    c.compile(program)
+    bytecode = c.bytecode()
+    start = time.perf_counter()
+    for _ in range(runs):
+        machine = vm.VM(bytecode)
+        machine.run()
+    machine_time = time.perf_counter() - start
+    assert machine.last_popped_stack_elem().inspect() == result.inspect()
+    return closures, machine_time, result.inspect(), len(bytecode.instructions)
+
+
+def main(argv):
+    statements = int(argv[1]) if len(argv) > 1 else 2000
+    runs = int(argv[2]) if len(argv) > 2 else 20
+    source = make_input(statements)
+
+    closures, machine, expected, size = run_both(parse(source), runs)
+    program = parse(source)
+    start = time.perf_counter()
+    program, changes = optimizer.optimize(program)
+    elapsed = time.perf_counter() - start
+    print("%d statements: optimize %.3fs, %d changes" % (statements, elapsed, len(changes)))
+    opt_closures, opt_machine, result, opt_size = run_both(program, runs)
+    assert result == expected
+    print("closures %.3fs -> %.3fs  speedup %.2fx" % (closures, opt_closures, closures / opt_closures))
+    print("vm       %.3fs -> %.3fs  speedup %.2fx" % (machine, opt_machine, machine / opt_machine))
+    print("bytecode %d -> %d bytes" % (size, opt_size))
+
+    depth = 100000
+    program = parse("let one = 1; " + " + ".join(["one * 1"] * depth) + ";")
+    start = time.perf_counter()
+    program, changes = optimizer.optimize(program)
+    print("%d-term chain: optimize %.3fs, result %s" % (depth, time.perf_counter() - start, program.statements[-1].string()))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
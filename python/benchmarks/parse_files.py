@@ -0,0 +1,45 @@
+"""Throughput of intp.parse_files over a generated corpus, by worker count.
+
+Run from the python/ directory:
+
+    python -m benchmarks.parse_files [files] [lines per file]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import intp
+from benchmarks.incremental_edits import make_input
+
+
+def main(argv):
+    files = int(argv[1]) if len(argv) > 1 else 200
+    lines = int(argv[2]) if len(argv) > 2 else 2000
+    cpus = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            path = os.path.join(tmp, "%d.monkey" % i)
+            with open(path, "w") as f:
+                f.write(make_input(lines, seed=i))
+            paths.append(path)
+        size = sum(os.path.getsize(path) for path in paths)
+        print("%d files, %.1f MB, %d CPUs" % (files, size / 1024 / 1024, cpus))
+
+        baseline = None
+        for jobs in sorted({1, 2, cpus, 2 * cpus}):
+            start = time.perf_counter()
+            for _ in intp.parse_files(paths, jobs=jobs):
+                pass
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                "jobs=%-3d %.2fs  %.1f MB/s  speedup %.2fx"
+                % (jobs, elapsed, size / 1024 / 1024 / elapsed, baseline / elapsed)
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
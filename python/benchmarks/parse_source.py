@@ -0,0 +1,34 @@
+"""Time to parse one large generated source with intp.parse_source, by worker count.
+
+Run from the python/ directory:
+
+    python -m benchmarks.parse_source [lines]
+"""
+import os
+import sys
+import time
+
+import intp
+from benchmarks.incremental_edits import full_parse, make_input
+
+
+def main(argv):
+    lines = int(argv[1]) if len(argv) > 1 else 200000
+    cpus = os.cpu_count() or 1
+    source = make_input(lines)
+    print("%d lines, %.1f MB, %d CPUs" % (lines, len(source) / 1024 / 1024, cpus))
+
+    start = time.perf_counter()
+    full_parse(source)
+    baseline = time.perf_counter() - start
+    print("sequential %.2fs" % baseline)
+
+    for jobs in sorted({2, cpus, 2 * cpus}):
+        start = time.perf_counter()
+        intp.parse_source(source, jobs=jobs)
+        elapsed = time.perf_counter() - start
+        print("jobs=%-3d   %.2fs  speedup %.2fx" % (jobs, elapsed, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,71 @@
+"""Recursive Monkey loops with and without tail calls.
+
+A counting loop written as tail recursion runs to the given depth (a
+million by default) in every tail-call mode; without tail calls it runs out
+of Python stack long before. The shallow rows repeat a depth every mode can
+reach, to compare the cost per call. "no reuse" makes a closure in the loop
+body, so each call needs a fresh environment.
+
+Run from the python/ directory:
+
+    python -m benchmarks.recursion [depth]
+"""
+import sys
+import time
+
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+
+LOOP = "let loop = fn(n, acc) { if (n == 0) { acc } else { loop(n - 1, acc + 1) } };"
+NO_REUSE = "let loop = fn(n, acc) { let f = fn() { n }; if (n == 0) { acc } else { loop(f() - 1, acc + 1) } };"
+SHALLOW = 150
+
+
+def parse(source):
+    return parser.Parser(lexer.Lexer(source)).parse_program()
+
+
+def measure(source, depth, repeat, frames, tail_calls):
+    program = parse(source + "loop(%d, 0)" % depth)
+    if frames:
+        r = resolver.resolve(program)
+        code = evaluator.compile(program, r, tail_calls)
+        new_env = object.Frame
+    else:
+        code = evaluator.compile(program, None, tail_calls)
+        new_env = object.Environment
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = code(new_env())
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    depth = int(argv[1]) if len(argv) > 1 else 1000000
+    repeat = max(1, depth // SHALLOW)
+    modes = [
+        ("environments", LOOP, False, False),
+        ("frames", LOOP, True, False),
+        ("env tail calls", LOOP, False, True),
+        ("frame tail calls", LOOP, True, True),
+        ("frame, no reuse", NO_REUSE, True, True),
+    ]
+    print("depth %d" % depth)
+    for name, source, frames, tail_calls in modes:
+        result, elapsed = measure(source, depth, 1, frames, tail_calls)
+        if isinstance(result, object.Error):
+            print("  %-17s %s" % (name, result.inspect()))
+        else:
+            print("  %-17s %7.3fs  %6.0f ns/call" % (name, elapsed, elapsed / depth * 1e9))
+    print("depth %d x %d" % (SHALLOW, repeat))
+    for name, source, frames, tail_calls in modes:
+        result, elapsed = measure(source, SHALLOW, repeat, frames, tail_calls)
+        assert result.value == SHALLOW, result.inspect()
+        print("  %-17s %7.3fs  %6.0f ns/call" % (name, elapsed, elapsed / (SHALLOW * repeat) * 1e9))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
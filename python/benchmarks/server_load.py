@@ -0,0 +1,96 @@
+"""Load test for intp.server: throughput and tail latency.
+
+Starts a server with --workers processes (or uses the one at --port or
+--unix), opens --clients connections and has each send --requests
+requests one after another, cycling through lex, parse and eval of a
+small program that defines and calls a function. Prints the requests per
+second and latency percentiles, as JSON.
+
+Run from the python/ directory:
+
+    python -m benchmarks.server_load [--clients 32] [--requests 50] [--workers N]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from intp import server
+
+SOURCE = "let sq = fn(x) { x * x }; let f = fn(n, acc) { if (n == 0) { acc } else { f(n - 1, acc + sq(n)) } }; f(%d, 0)"
+
+
+async def client(connect, requests, n, latencies, errors):
+    c = await connect()
+    try:
+        for i in range(requests):
+            op = ("lex", "parse", "eval")[i % 3]
+            start = time.perf_counter()
+            response = await c.request(op, SOURCE % n)
+            latencies.append(time.perf_counter() - start)
+            if "error" in response:
+                errors.append(response["error"])
+    finally:
+        await c.close()
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(args):
+    s = listener = None
+    port = args.port
+    if port is None and args.unix is None:
+        s = server.Server(args.workers, max_pending=args.max_pending)
+        listener = await s.start()
+        port = listener.sockets[0].getsockname()[1]
+
+    def connect():
+        return server.Client.connect(port=port, path=args.unix)
+
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*[client(connect, args.requests, args.n, latencies, errors) for _ in range(args.clients)])
+    finally:
+        elapsed = time.perf_counter() - start
+        if listener is not None:
+            listener.close()
+            await listener.wait_closed()
+            s.close()
+
+    latencies.sort()
+    return {
+        "clients": args.clients,
+        "requests": len(latencies),
+        "workers": s.workers if s is not None else None,
+        "seconds": elapsed,
+        "requests_per_sec": len(latencies) / elapsed,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000,
+        },
+        "errors": len(errors),
+    }
+
+
+def main(argv):
+    p = argparse.ArgumentParser(prog="benchmarks.server_load")
+    p.add_argument("--clients", type=int, default=32)
+    p.add_argument("--requests", type=int, default=50, help="per client")
+    p.add_argument("--n", type=int, default=200, help="the loop count of the evaluated program")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--max-pending", type=int, default=server.MAX_PENDING)
+    p.add_argument("--port", type=int, default=None, help="use the server running on this port")
+    p.add_argument("--unix", metavar="PATH", help="use the server listening on this socket")
+    args = p.parse_args(argv[1:])
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,110 @@
+"""Per-snippet parse latency: fresh Lexer/Parser objects vs parse_many().
+
+Run from the python/ directory:
+
+    python -m benchmarks.snippet_latency [snippets]
+"""
+import random
+import sys
+import time
+
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+def make_snippets(count, seed=1):
+    rnd = random.Random(seed)
+    names = ["x", "y", "foo", "bar"]
+    templates = [
+        lambda: "let %s = %d;" % (rnd.choice(names), rnd.randint(0, 999)),
+        lambda: "%s + %d * %s;" % (rnd.choice(names), rnd.randint(0, 999), rnd.choice(names)),
+        lambda: "-%s == !%s;" % (rnd.choice(names), rnd.choice(names)),
+        lambda: "return %d;" % rnd.randint(0, 999),
+        lambda: "%s < %d;" % (rnd.choice(names), rnd.randint(0, 999)),
+    ]
+    return [rnd.choice(templates)() for _ in range(count)]
+
+
+class PerInstanceTablesParser(parser.Parser):
+    """Rebuilds bound-method tables per instance and dispatches through
+    them in the recursive Pratt loop, as Parser used to."""
+
+    def __init__(self, lexer):
+        self._prefix_fns, self._infix_fns = [
+            {tp: getattr(self, fn.__name__) for tp, fn in table.items()}
+            for table in (self.prefix_parse_fns, self.infix_parse_fns)
+        ]
+        self._precedences = dict(self.precedences)
+        super().__init__(lexer)
+
+    def _parse_expression(self, precedence):
+        prefix = self._prefix_fns.get(self.cur_token.type)
+        if prefix is None:
+            self._no_prefix_parse_fn_error(self.cur_token)
+            return None
+        left = prefix()
+        while not self._peek_token_is(token.SEMICOLON) and precedence < self._peek_precedence():
+            infix = self._infix_fns.get(self.peek_token.type)
+            if infix is None:
+                return left
+            self._next_token()
+            left = infix(left)
+        return left
+
+    def _peek_precedence(self):
+        return self._precedences.get(self.peek_token.type, parser.LOWEST)
+
+    def _cur_precedence(self):
+        return self._precedences.get(self.cur_token.type, parser.LOWEST)
+
+
+def fresh(snippets, cls=parser.Parser):
+    latencies = []
+    clock = time.perf_counter
+    for source in snippets:
+        start = clock()
+        p = cls(lexer.Lexer(source))
+        p.parse_program()
+        latencies.append(clock() - start)
+    return latencies
+
+
+def reused(snippets):
+    latencies = []
+    clock = time.perf_counter
+    it = iter(snippets)
+    results = parser.parse_many(it)
+    while True:
+        start = clock()
+        try:
+            next(results)
+        except StopIteration:
+            return latencies
+        latencies.append(clock() - start)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 200000
+    snippets = make_snippets(count)
+
+    runs = [
+        ("fresh, per-instance tables", lambda: fresh(snippets, PerInstanceTablesParser)),
+        ("fresh, class tables", lambda: fresh(snippets)),
+        ("parse_many", lambda: reused(snippets)),
+    ]
+    for name, fn in runs:
+        latencies = fn()
+        print(
+            "%-27s p50 %6.2fus  p99 %6.2fus  total %.2fs"
+            % (name, percentile(latencies, 50) * 1e6, percentile(latencies, 99) * 1e6, sum(latencies))
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
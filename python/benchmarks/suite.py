@@ -0,0 +1,168 @@
+"""Timed scenarios for the lexer, the parser and Program.string().
+
+Each scenario runs over generated corpora (see benchmarks.corpus) and
+reports the best of --repeat runs as JSON: seconds, tokens/s,
+statements/s and the peak memory of one traced run. Run from the
+python/ directory:
+
+    python -m benchmarks.suite [--statements N] [--save baseline.json]
+    python -m benchmarks.suite --compare baseline.json [--threshold 0.1]
+
+With --compare the results are checked against a saved run. A scenario
+regresses when its rate drops, or its peak memory grows, by more than
+the threshold; the regressions are listed and the exit status is 1.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks import corpus
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+def lex(source):
+    l = lexer.Lexer(source)
+    count = 1
+    while l.next_token().type != token.EOF:
+        count += 1
+    return count
+
+
+def parse(source):
+    p = parser.Parser(lexer.Lexer(source))
+    program = p.parse_program()
+    if p.errors:
+        raise ValueError("corpus does not parse: %s" % p.errors[0])
+    return program
+
+
+# name: (setup, run, rate). setup turns the source into the argument of
+# run, outside the timing; rate is the figure compare mode checks.
+SCENARIOS = {
+    "lexer": (lambda source: source, lex, "tokens_per_sec"),
+    "parser": (lambda source: source, parse, "statements_per_sec"),
+    "string": (parse, lambda program: program.string(), "statements_per_sec"),
+}
+
+
+def corpora(statements, seed, operators):
+    # (name, statements, depth)
+    shapes = [("flat", statements, 0), ("nested", statements, 3), ("deep", max(1, statements // 50), 200)]
+    for name, count, depth in shapes:
+        yield name, corpus.generate(count, depth, operators, seed)
+
+
+def measure(run, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    # tracing slows everything down, so memory gets a run of its own
+    gc.collect()
+    tracemalloc.start()
+    run(arg)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(statements=2000, seed=0, operators=None, repeat=3, scenarios=None):
+    results = {}
+    for corpus_name, source in corpora(statements, seed, operators):
+        tokens = lex(source)
+        count = len(parse(source).statements)
+        for name in scenarios or SCENARIOS:
+            setup, run, _ = SCENARIOS[name]
+            seconds, peak = measure(run, setup(source), repeat)
+            results["%s/%s" % (name, corpus_name)] = {
+                "seconds": seconds,
+                "bytes": len(source),
+                "tokens": tokens,
+                "statements": count,
+                "tokens_per_sec": tokens / seconds,
+                "statements_per_sec": count / seconds,
+                "peak_bytes": peak,
+            }
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """Returns the regressions of results against baseline, as strings."""
+    regressions = []
+    for key, result in sorted(results.items()):
+        old = baseline.get(key)
+        if old is None:
+            continue
+        rate = SCENARIOS[key.split("/")[0]][2]
+        if result[rate] < old[rate] * (1 - threshold):
+            regressions.append(
+                "%s: %s %.0f -> %.0f (%+.1f%%)"
+                % (key, rate, old[rate], result[rate], (result[rate] / old[rate] - 1) * 100)
+            )
+        if result["peak_bytes"] > old["peak_bytes"] * (1 + threshold):
+            regressions.append(
+                "%s: peak_bytes %d -> %d (%+.1f%%)"
+                % (key, old["peak_bytes"], result["peak_bytes"], (result["peak_bytes"] / old["peak_bytes"] - 1) * 100)
+            )
+    return regressions
+
+
+def parse_operators(text):
+    # "+:4,*:1" -> {"+": 4, "*": 1}
+    operators = {}
+    for item in text.split(","):
+        op, _, weight = item.partition(":")
+        operators[op.strip()] = int(weight or 1)
+    return operators
+
+
+def main(argv):
+    p = argparse.ArgumentParser(prog="benchmarks.suite")
+    p.add_argument("--statements", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--operators", type=parse_operators, default=None, help='weights, e.g. "+:4,*:1,==:1"')
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    p.add_argument("--save", metavar="FILE", help="write the results to FILE")
+    p.add_argument("--compare", metavar="FILE", help="check the results against FILE")
+    p.add_argument("--threshold", type=float, default=0.1)
+    args = p.parse_args(argv[1:])
+
+    report = {
+        "python": platform.python_version(),
+        "config": {
+            "statements": args.statements,
+            "seed": args.seed,
+            "operators": args.operators or corpus.DEFAULT_OPERATORS,
+            "repeat": args.repeat,
+        },
+        "results": run_suite(args.statements, args.seed, args.operators, args.repeat, args.scenario),
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline["results"], args.threshold)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
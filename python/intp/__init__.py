@@ -0,0 +1,11 @@
+def __getattr__(name):
+    # Imported on first use so that `import intp` stays cheap.
+    if name == "parse_files":
+        from intp.parallel import parse_files
+
+        return parse_files
+    if name == "parse_source":
+        from intp.parallel import parse_source
+
+        return parse_source
+    raise AttributeError("module 'intp' has no attribute %r" % name)
@@ -0,0 +1,197 @@
+import marshal
+from array import array
+
+from intp import ast
+from intp import token
+
+FORMAT = "intp-arena-1"
+
+_columns = (
+    "kinds",
+    "token_types",
+    "literals",
+    "offsets",
+    "scalars",
+    "child_starts",
+    "children",
+    "roots",
+)
+
+_classes = {
+    cls.kind: cls
+    for cls in (
+        ast.LetStatement,
+        ast.ReturnStatement,
+        ast.ExpressionStatement,
+        ast.Identifier,
+        ast.IntegerLiteral,
+        ast.PrefixExpression,
+        ast.InfixExpression,
+        ast.Boolean,
+        ast.BlockStatement,
+        ast.IfExpression,
+        ast.FunctionLiteral,
+        ast.CallExpression,
+        ast.ArrayLiteral,
+        ast.IndexExpression,
+    )
+}
+
+
+class Arena:
+    """A whole Program stored as parallel typed arrays, one row per node.
+
+    Rows are in post-order, so every child comes before its parent and the
+    statements of the program are listed in `roots`. Each row holds the node
+    kind, its token (type code, literal and offset), its scalar value and a
+    slice of `children`. A child field takes one slot in that slice (-1 for
+    None); a list field takes a length slot followed by one slot per element.
+    Literals and scalar values are interned in `constants`.
+    """
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.token_types = array("B")
+        self.literals = array("i")
+        self.offsets = array("l")
+        self.scalars = array("i")
+        self.child_starts = array("i")
+        self.children = array("i")
+        self.roots = array("i")
+        self.constants = []
+        self._constant_ids = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def _constant(self, value):
+        if value is None:
+            return -1
+        key = (type(value), value)
+        i = self._constant_ids.get(key)
+        if i is None:
+            i = self._constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return i
+
+
+def to_arena(program):
+    arena = Arena()
+    kinds = arena.kinds
+    token_types = arena.token_types
+    literals = arena.literals
+    offsets = arena.offsets
+    scalars = arena.scalars
+    child_starts = arena.child_starts
+    children = arena.children
+    constant = arena._constant
+    codes = token.CODES
+    index = {}
+    # A node is pushed once to expand it and once more, after its children,
+    # to add its row; a None pushed on top of the node marks the second time.
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    for stmt in program.statements:
+        push(stmt)
+        while stack:
+            node = pop()
+            if node is None:
+                node = pop()
+                tok = node.token
+                kinds.append(node.kind)
+                token_types.append(codes[tok.type])
+                literals.append(constant(tok.literal))
+                offsets.append(-1 if tok.offset is None else tok.offset)
+                scalars.append(constant(getattr(node, node.scalar)) if node.scalar else -1)
+                child_starts.append(len(children))
+                for field in node.fields:
+                    child = getattr(node, field)
+                    children.append(-1 if child is None else index[id(child)])
+                for field in node.list_fields:
+                    items = getattr(node, field) or []
+                    children.append(len(items))
+                    children.extend([index[id(child)] for child in items])
+                index[id(node)] = len(kinds) - 1
+                continue
+            push(node)
+            push(None)
+            for field in node.list_fields[::-1]:
+                items = getattr(node, field)
+                if items:
+                    stack.extend(items[::-1])
+            for field in node.fields[::-1]:
+                child = getattr(node, field)
+                if child is not None:
+                    push(child)
+        arena.roots.append(index[id(stmt)])
+    return arena
+
+
+def from_arena(arena):
+    nodes = []
+    append = nodes.append
+    constants = arena.constants
+    children = arena.children
+    types = token.TYPES
+    Token = token.Token
+    rows = zip(
+        arena.kinds,
+        arena.token_types,
+        arena.literals,
+        arena.offsets,
+        arena.scalars,
+        arena.child_starts,
+    )
+    for kind, type_code, literal, offset, scalar, pos in rows:
+        cls = _classes[kind]
+        node = cls.__new__(cls)
+        node.token = Token(types[type_code], constants[literal], None if offset < 0 else offset)
+        if cls.scalar:
+            setattr(node, cls.scalar, None if scalar < 0 else constants[scalar])
+        for field in cls.fields:
+            child = children[pos]
+            setattr(node, field, None if child < 0 else nodes[child])
+            pos += 1
+        for field in cls.list_fields:
+            count = children[pos]
+            setattr(node, field, [nodes[child] for child in children[pos + 1:pos + 1 + count]])
+            pos += 1 + count
+        append(node)
+
+    program = ast.Program()
+    program.statements = [nodes[i] for i in arena.roots]
+    return program
+
+
+def dump(program, shift=0):
+    """Returns the arena form of a program as a flat, marshal-friendly tuple.
+
+    `shift` is added to every known source offset.
+    """
+    a = to_arena(program)
+    if shift:
+        a.offsets = array("l", [offset + shift if offset >= 0 else offset for offset in a.offsets])
+    columns = tuple((getattr(a, name).typecode, getattr(a, name).tobytes()) for name in _columns)
+    return (FORMAT, columns, tuple(a.constants))
+
+
+def load(data):
+    format, columns, constants = data
+    if format != FORMAT:
+        raise ValueError("unsupported AST dump format: %r" % (format,))
+    a = Arena()
+    for name, (typecode, raw) in zip(_columns, columns):
+        column = array(typecode)
+        column.frombytes(raw)
+        setattr(a, name, column)
+    a.constants = list(constants)
+    return from_arena(a)
+
+
+def dumps(program, shift=0):
+    return marshal.dumps(dump(program, shift))
+
+
+def loads(data):
+    return load(marshal.loads(data))
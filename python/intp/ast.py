@@ -1,7 +1,65 @@
-import io
+# Integer node kinds, used as tags by the arena form (see intp.arena).
+LET_STATEMENT = 1
+RETURN_STATEMENT = 2
+EXPRESSION_STATEMENT = 3
+IDENTIFIER = 4
+INTEGER_LITERAL = 5
+PREFIX_EXPRESSION = 6
+INFIX_EXPRESSION = 7
+BOOLEAN = 8
+BLOCK_STATEMENT = 9
+IF_EXPRESSION = 10
+FUNCTION_LITERAL = 11
+CALL_EXPRESSION = 12
+ARRAY_LITERAL = 13
+INDEX_EXPRESSION = 14
+
+
+def to_string(node):
+    """Serializes a node in one pass over an explicit stack.
+
+    Each node describes itself through parts(), a list of strings and child
+    nodes; the pieces are appended to a single buffer, so deep trees are
+    neither copied once per level nor limited by the recursion limit.
+    """
+    out = []
+    write = out.append
+    stack = [node]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        item = pop()
+        if type(item) is str:
+            write(item)
+        elif item is not None:
+            push(item.parts()[::-1])
+    return "".join(out)
+
+
+class Node:
+    __slots__ = ()
+
+    kind = None
+    # child node attributes, attributes holding lists of child nodes, and the
+    # one attribute holding a plain value (a string or an int), if any
+    fields = ()
+    list_fields = ()
+    scalar = None
+
+    def token_literal(self):
+        return self.token.literal
+
+    @property
+    def offset(self):
+        return self.token.offset
+
+    def string(self):
+        return to_string(self)
 
 
 class Program:
+    __slots__ = ("statements",)
+
     def __init__(self):
         self.statements = []
 
@@ -11,120 +69,244 @@ class Program:
         return ""
 
     def string(self):
-        out = io.StringIO()
-        for stmt in self.statements:
-            out.write(stmt.string())
-        return out.getvalue()
+        return to_string(self)
 
+    def parts(self):
+        return self.statements
+
+
+class LetStatement(Node):
+    __slots__ = ("token", "name", "value")
+
+    kind = LET_STATEMENT
+    fields = ("name", "value")
 
-class LetStatement:
     def __init__(self, token):
         self.token = token
         self.name = None
         self.value = None
 
-    def token_literal(self):
-        return self.token.literal
-
-    def string(self):
-        out = io.StringIO()
-        out.write(self.token_literal() + " ")
-        out.write(self.name.string())
-        out.write(" = ")
+    def parts(self):
         if self.value:
-            out.write(self.value.string())
-        out.write(";")
-        return out.getvalue()
+            return [self.token_literal() + " ", self.name, " = ", self.value, ";"]
+        return [self.token_literal() + " ", self.name, " = ;"]
+
+
+class Identifier(Node):
+    __slots__ = ("token", "value")
 
+    kind = IDENTIFIER
+    scalar = "value"
 
-class Identifier:
     def __init__(self, token, value):
         self.token = token
         self.value = value
 
-    def token_literal(self):
-        return self.token.literal
-
     def string(self):
         return self.value
 
+    def parts(self):
+        return [self.value]
+
+
+class ReturnStatement(Node):
+    __slots__ = ("token", "return_value")
+
+    kind = RETURN_STATEMENT
+    fields = ("return_value",)
 
-class ReturnStatement:
     def __init__(self, token):
         self.token = token
         self.return_value = None
 
-    def token_literal(self):
-        return self.token.literal
-
-    def string(self):
-        out = io.StringIO()
-        out.write(self.token_literal() + " ")
+    def parts(self):
         if self.return_value:
-            out.write(self.return_value.string())
-        out.write(";")
-        return self.getvalue()
+            return [self.token_literal() + " ", self.return_value, ";"]
+        return [self.token_literal() + " ;"]
+
 
+class ExpressionStatement(Node):
+    __slots__ = ("token", "expression")
+
+    kind = EXPRESSION_STATEMENT
+    fields = ("expression",)
 
-class ExpressionStatement:
     def __init__(self, token):
         self.token = token
         self.expression = None
 
-    def token_literal(self):
-        return self.token.literal
-
-    def string(self):
+    def parts(self):
         if self.expression:
-            return self.expression.string()
-        return ""
+            return [self.expression]
+        return []
+
+
+class IntegerLiteral(Node):
+    __slots__ = ("token", "value")
 
+    kind = INTEGER_LITERAL
+    scalar = "value"
 
-class IntegerLiteral:
     def __init__(self, token):
         self.token = token
         self.value = None
 
-    def token_literal(self):
-        return self.token.literal
-
     def string(self):
         return self.token.literal
 
+    def parts(self):
+        return [self.token.literal]
+
+
+class PrefixExpression(Node):
+    __slots__ = ("token", "operator", "right")
+
+    kind = PREFIX_EXPRESSION
+    fields = ("right",)
+    scalar = "operator"
 
-class PrefixExpression:
     def __init__(self, token):
         self.token = token
         self.operator = None
         self.right = None
 
-    def token_literal(self):
-        return self.token.literal
+    def parts(self):
+        return ["(" + self.operator, self.right, ")"]
 
-    def string(self):
-        out = io.StringIO()
-        out.write("(")
-        out.write(self.operator)
-        out.write(self.right.string())
-        out.write(")")
-        return out.getvalue()
 
+class InfixExpression(Node):
+    __slots__ = ("token", "left", "operator", "right")
+
+    kind = INFIX_EXPRESSION
+    fields = ("left", "right")
+    scalar = "operator"
 
-class InfixExpression:
     def __init__(self, token):
         self.token = token
         self.left = None
         self.operator = ""
         self.right = None
 
-    def token_literal(self):
-        return self.token.literal
+    def parts(self):
+        return ["(", self.left, " " + self.operator + " ", self.right, ")"]
+
+
+class Boolean(Node):
+    __slots__ = ("token", "value")
+
+    kind = BOOLEAN
+    scalar = "value"
+
+    def __init__(self, token, value):
+        self.token = token
+        self.value = value
 
     def string(self):
-        out = io.StringIO()
-        out.write("(")
-        out.write(self.left.string())
-        out.write(" " + self.operator + " ")
-        out.write(self.right.string())
-        out.write(")")
-        return out.getvalue()
+        return self.token.literal
+
+    def parts(self):
+        return [self.token.literal]
+
+
+class BlockStatement(Node):
+    __slots__ = ("token", "statements")
+
+    kind = BLOCK_STATEMENT
+    list_fields = ("statements",)
+
+    def __init__(self, token):
+        self.token = token
+        self.statements = []
+
+    def parts(self):
+        return self.statements
+
+
+class IfExpression(Node):
+    __slots__ = ("token", "condition", "consequence", "alternative")
+
+    kind = IF_EXPRESSION
+    fields = ("condition", "consequence", "alternative")
+
+    def __init__(self, token):
+        self.token = token
+        self.condition = None
+        self.consequence = None
+        self.alternative = None
+
+    def parts(self):
+        out = ["if", self.condition, " ", self.consequence]
+        if self.alternative:
+            out += ["else ", self.alternative]
+        return out
+
+
+class FunctionLiteral(Node):
+    __slots__ = ("token", "parameters", "body")
+
+    kind = FUNCTION_LITERAL
+    fields = ("body",)
+    list_fields = ("parameters",)
+
+    def __init__(self, token):
+        self.token = token
+        self.parameters = []
+        self.body = None
+
+    def parts(self):
+        return [self.token_literal(), "("] + _joined(self.parameters) + [") ", self.body]
+
+
+class CallExpression(Node):
+    __slots__ = ("token", "function", "arguments")
+
+    kind = CALL_EXPRESSION
+    fields = ("function",)
+    list_fields = ("arguments",)
+
+    def __init__(self, token, function):
+        self.token = token
+        self.function = function
+        self.arguments = []
+
+    def parts(self):
+        return [self.function, "("] + _joined(self.arguments) + [")"]
+
+
+class ArrayLiteral(Node):
+    __slots__ = ("token", "elements")
+
+    kind = ARRAY_LITERAL
+    list_fields = ("elements",)
+
+    def __init__(self, token):
+        self.token = token
+        self.elements = []
+
+    def parts(self):
+        return ["["] + _joined(self.elements) + ["]"]
+
+
+class IndexExpression(Node):
+    __slots__ = ("token", "left", "index")
+
+    kind = INDEX_EXPRESSION
+    fields = ("left", "index")
+
+    def __init__(self, token, left):
+        self.token = token
+        self.left = left
+        self.index = None
+
+    def parts(self):
+        return ["(", self.left, "[", self.index, "])"]
+
+
+def _joined(nodes):
+    # the nodes separated by ", ", as parts
+    out = []
+    for node in nodes:
+        if out:
+            out.append(", ")
+        out.append(node)
+    return out
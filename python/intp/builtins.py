@@ -0,0 +1,190 @@
+"""The builtin functions: len, first, last, rest, push, sum, range, map
+and filter.
+
+The functions on arrays work on a packed vector (see intp.vectors) as a
+whole where they can: sum adds it in one call, range makes one at once,
+and map and filter run a function that only does arithmetic on its
+argument (a vectors.Kernel) over every element without the evaluator.
+Any other function is applied to one element at a time.
+"""
+from intp import object
+from intp import vectors
+
+Array = object.Array
+Integer = object.Integer
+Error = object.Error
+NULL = object.NULL
+integer = object.integer
+
+
+def make_array(elements):
+    """Returns an Array of a list of objects, packed if they are all
+    integers that fit."""
+    values = []
+    for element in elements:
+        if element.__class__ is not Integer:
+            return Array(elements)
+        values.append(element.value)
+    packed = vectors.pack(values)
+    return Array(elements if packed is None else packed)
+
+
+def objects(array):
+    """Returns the elements of an Array as a list of objects."""
+    elements = array.elements
+    if elements.__class__ is list:
+        return elements
+    return [integer(value) for value in elements.tolist()]
+
+
+def _wrong_count(args, want):
+    return Error("wrong number of arguments. got=%d, want=%s" % (len(args), want))
+
+
+def _array_argument(name, args, count=1):
+    # the Error for args not being an array and count - 1 more, or None
+    if len(args) != count:
+        return _wrong_count(args, count)
+    if args[0].__class__ is not Array:
+        return Error("argument to `%s` must be ARRAY, got %s" % (name, args[0].type()))
+    return None
+
+
+def _len(args, apply):
+    if len(args) != 1:
+        return _wrong_count(args, 1)
+    if args[0].__class__ is not Array:
+        return Error("argument to `len` not supported, got " + args[0].type())
+    return integer(len(args[0].elements))
+
+
+def _first(args, apply):
+    error = _array_argument("first", args)
+    if error is not None:
+        return error
+    return _element(args[0], 0)
+
+
+def _last(args, apply):
+    error = _array_argument("last", args)
+    if error is not None:
+        return error
+    return _element(args[0], len(args[0].elements) - 1)
+
+
+def _element(array, i):
+    elements = array.elements
+    if not 0 <= i < len(elements):
+        return NULL
+    if elements.__class__ is list:
+        return elements[i]
+    return integer(int(elements[i]))
+
+
+def _rest(args, apply):
+    error = _array_argument("rest", args)
+    if error is not None:
+        return error
+    elements = args[0].elements
+    if not len(elements):
+        return NULL
+    return Array(elements[1:])
+
+
+def _push(args, apply):
+    error = _array_argument("push", args, 2)
+    if error is not None:
+        return error
+    array, value = args
+    elements = array.elements
+    if elements.__class__ is not list and value.__class__ is Integer:
+        packed = vectors.append(elements, value.value)
+        if packed is not None:
+            return Array(packed)
+    return Array(objects(array) + [value])
+
+
+def _sum(args, apply):
+    error = _array_argument("sum", args)
+    if error is not None:
+        return error
+    elements = args[0].elements
+    if elements.__class__ is not list:
+        return integer(vectors.total(elements))
+    for element in elements:
+        if element.__class__ is not Integer:
+            return Error("argument to `sum` must be ARRAY of INTEGER, got " + element.type())
+    return integer(sum(element.value for element in elements))
+
+
+def _range(args, apply):
+    if len(args) not in (1, 2):
+        return _wrong_count(args, "1 or 2")
+    for arg in args:
+        if arg.__class__ is not Integer:
+            return Error("argument to `range` must be INTEGER, got " + arg.type())
+    start, stop = (0, args[0].value) if len(args) == 1 else (args[0].value, args[1].value)
+    if stop - start > vectors.MAX_LENGTH:
+        return Error("range too long: %d elements, the most is %d" % (stop - start, vectors.MAX_LENGTH))
+    packed = vectors.span(start, stop)
+    if packed is None:
+        return Array([integer(value) for value in range(start, stop)])
+    return Array(packed)
+
+
+def _function_argument(name, args):
+    error = _array_argument(name, args, 2)
+    if error is None and args[1].__class__ not in (object.Function, object.Builtin):
+        error = Error("argument to `%s` must be FUNCTION, got %s" % (name, args[1].type()))
+    return error
+
+
+def _map(args, apply):
+    error = _function_argument("map", args)
+    if error is not None:
+        return error
+    array, function = args
+    if array.elements.__class__ is not list:
+        k = vectors.kernel(function)
+        if k is not None:
+            elements = vectors.map_vector(k, array.elements)
+            if elements is not None:
+                return Array(elements)
+    return make_array([apply(function, [element]) for element in objects(array)])
+
+
+def _filter(args, apply):
+    error = _function_argument("filter", args)
+    if error is not None:
+        return error
+    array, function = args
+    if array.elements.__class__ is not list:
+        k = vectors.kernel(function)
+        if k is not None:
+            elements = vectors.filter_vector(k, array.elements)
+            if elements is not None:
+                return Array(elements)
+    kept = []
+    for element in objects(array):
+        result = apply(function, [element])
+        if result is not object.FALSE and result is not NULL:
+            kept.append(element)
+    if array.elements.__class__ is not list:
+        return make_array(kept)
+    return Array(kept)
+
+
+BUILTINS = {
+    name: object.Builtin(name, fn)
+    for name, fn in [
+        ("len", _len),
+        ("first", _first),
+        ("last", _last),
+        ("rest", _rest),
+        ("push", _push),
+        ("sum", _sum),
+        ("range", _range),
+        ("map", _map),
+        ("filter", _filter),
+    ]
+}
@@ -0,0 +1,194 @@
+import hashlib
+import marshal
+import os
+import tempfile
+from collections import OrderedDict
+
+from intp import arena
+from intp import lexer
+from intp import parser
+
+SUFFIX = ".ast"
+# Bump whenever what an entry holds changes; it is part of the key.
+ENTRY_VERSION = "2"
+
+
+class ParseCache:
+    """Caches parse results by the content of the source.
+
+    Entries are keyed by a hash of the parser version and the source text and
+    hold the serialized program together with its parse errors and their
+    offsets, so a hit can be reported the same way as a parse. A small
+    in-memory LRU sits in front of a directory of entry files. Files are
+    written to a temporary name and renamed into place, so processes sharing
+    the directory never see a partial entry. When the directory grows past
+    max_bytes the least recently used files (by modification time, which is
+    bumped on every hit) are removed.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, memory_entries=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def key(self, source):
+        h = hashlib.sha256()
+        h.update(parser.VERSION.encode())
+        h.update(b"\0")
+        h.update(ENTRY_VERSION.encode())
+        h.update(b"\0")
+        h.update(source.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def parse(self, source):
+        """Returns (program, errors, error_offsets) for the source, parsing
+        only on a miss."""
+        key = self.key(source)
+
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._load(data)
+
+        data = self._read(key)
+        if data is not None:
+            try:
+                result = self._load(data)
+            except (EOFError, ValueError, TypeError, IndexError, KeyError):
+                # a damaged entry, whether it does not unmarshal or does not
+                # make a tree, is treated as missing and replaced below
+                if self._remove(self._path(key)) and self._disk_bytes is not None:
+                    self._disk_bytes -= len(data)
+            else:
+                self.disk_hits += 1
+                self._remember(key, data)
+                return result
+
+        self.misses += 1
+        p = parser.Parser(lexer.Lexer(source))
+        program = p.parse_program()
+        data = marshal.dumps((arena.dump(program), p.errors, p.error_offsets))
+        self._write(key, data)
+        self._remember(key, data)
+        return program, p.errors, p.error_offsets
+
+    def clear(self):
+        self._memory.clear()
+        for entry in self._entries():
+            self._remove(entry.path)
+        self._disk_bytes = 0
+
+    def _load(self, data):
+        dump, errors, error_offsets = marshal.loads(data)
+        if len(errors) != len(error_offsets):
+            raise ValueError("errors and error offsets do not match")
+        return arena.load(dump), list(errors), list(error_offsets)
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _write(self, key, data):
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # another process may have written the entry since the read
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+
+        if self._disk_bytes is None:
+            self._disk_bytes = self._disk_usage()
+        else:
+            self._disk_bytes += len(data) - replaced
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as it:
+                return [entry for entry in it if entry.name.endswith(SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _disk_usage(self):
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def _evict(self):
+        # Other processes may be adding and removing entries too, so the
+        # directory is rescanned rather than trusting the running total.
+        files = []
+        for entry in self._entries():
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, entry.path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                self.evictions += 1
+            total -= size
+        self._disk_bytes = total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
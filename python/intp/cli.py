@@ -0,0 +1,326 @@
+"""The command line: the REPL, or one of the batch commands.
+
+    python main.py                              start the REPL
+    python main.py run [FILE...]                evaluate, print each value
+    python main.py parse [FILE...] [--format sexpr|json|binary]
+    python main.py tokens [FILE]
+
+Without a FILE, or for "-", the input is stdin. tokens, and parse in the
+text formats, handle stdin as it arrives: a line at a time, and a
+top-level statement at a time. run reads it to the end first, since a
+program's value is only known there. --jobs N handles several files in N
+worker processes, and --time writes the time of each phase to stderr.
+
+parse writes one line per top-level statement in the sexpr and json
+formats, and the intp.arena dump of each input in the binary format.
+
+The exit status is 1 if any input has parse errors (or ILLEGAL tokens), 2
+for bad usage or an unreadable file and 3 if an evaluation failed. When
+several apply, the highest wins. Each command imports only the modules it
+uses.
+"""
+import argparse
+import collections
+import functools
+import sys
+import time
+
+EXIT_OK = 0
+EXIT_PARSE_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_RUNTIME_ERROR = 3
+
+STDIN = "-"
+FORMATS = ("sexpr", "json", "binary")
+
+# What a command made of one input: its exit status, the text (or, for
+# the binary format, bytes) for stdout, lines for stderr and the seconds
+# spent in each phase.
+Output = collections.namedtuple("Output", ["code", "out", "err", "times"])
+
+
+def main(argv):
+    p = argparse.ArgumentParser(prog="intp", description="The Monkey programming language.")
+    commands = p.add_subparsers(dest="command", metavar="COMMAND")
+
+    run = commands.add_parser("run", help="evaluate programs and print their values")
+    run.add_argument("files", nargs="*", metavar="FILE")
+    parse = commands.add_parser("parse", help="print the parsed programs")
+    parse.add_argument("files", nargs="*", metavar="FILE")
+    parse.add_argument("--format", choices=FORMATS, default="sexpr")
+    for command in (run, parse):
+        command.add_argument("--jobs", type=int, default=1, metavar="N", help="worker processes for several files")
+    tokens = commands.add_parser("tokens", help="print the tokens of a program")
+    tokens.add_argument("file", nargs="?", default=STDIN, metavar="FILE")
+    for command in (run, parse, tokens):
+        command.add_argument("--time", action="store_true", help="report the time of each phase on stderr")
+
+    args = p.parse_args(argv[1:])
+    if args.command is None:
+        return _repl()
+    if args.command == "tokens":
+        return _tokens(args.file, args.time)
+    paths = args.files or [STDIN]
+    if args.command == "parse":
+        if args.format != "binary" and paths == [STDIN]:
+            return _parse_stream(sys.stdin, args.format, args.time)
+        worker = functools.partial(parse_file, format=args.format, timed=args.time)
+    else:
+        worker = functools.partial(run_file, timed=args.time)
+    return _each(worker, paths, args.jobs)
+
+
+def _repl():
+    import getpass
+
+    from intp import repl
+
+    try:
+        user = getpass.getuser()
+    except Exception:
+        # no login name, as for a uid without a passwd entry
+        user = "there"
+    print("Hello %s! This is the Monkey programming language!" % user)
+    print("Feel free to type in commands")
+    repl.start()
+    return EXIT_OK
+
+
+def _each(worker, paths, jobs):
+    if jobs > 1 and len(paths) > 1 and STDIN not in paths:
+        import concurrent.futures
+
+        with concurrent.futures.ProcessPoolExecutor(min(jobs, len(paths))) as executor:
+            return _report(executor.map(worker, paths), paths)
+    return _report(map(worker, paths), paths)
+
+
+def _report(outputs, paths):
+    code = EXIT_OK
+    for path, output in zip(paths, outputs):
+        _write(output.out)
+        for line in output.err:
+            sys.stderr.write(line + "\n")
+        if output.times:
+            _write_times(path, output.times)
+        code = max(code, output.code)
+    return code
+
+
+def _write(out):
+    if isinstance(out, bytes):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(out)
+        sys.stdout.buffer.flush()
+    elif out:
+        sys.stdout.write(out)
+
+
+def _write_times(path, times):
+    phases = ", ".join("%s %.3f ms" % (phase, seconds * 1000) for phase, seconds in times.items())
+    sys.stderr.write("%s: %s\n" % (_name(path), phases))
+
+
+def _name(path):
+    return "<stdin>" if path == STDIN else path
+
+
+def _read(path):
+    if path == STDIN:
+        return sys.stdin.read()
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _parse(source, times):
+    # Returns (program, parser); with times, lexing and parsing are timed
+    # apart, which costs a wrapper around the lexer.
+    from intp import lexer
+    from intp import parser
+
+    if times is None:
+        p = parser.Parser(lexer.Lexer(source).token_stream())
+        return p.parse_program(), p
+
+    from intp import stats
+
+    s = stats.Stats()
+    start = time.perf_counter()
+    p = parser.Parser(stats.InstrumentedLexer(lexer.Lexer(source), s))
+    program = p.parse_program()
+    elapsed = time.perf_counter() - start
+    times["lex"] = times.get("lex", 0.0) + s.lex_time
+    times["parse"] = times.get("parse", 0.0) + elapsed - s.lex_time
+    return program, p
+
+
+def _diagnostics(path, source, p, first_line=1, first_column=1):
+    # source starts at first_line and, on that line, at first_column
+    from intp import lines
+
+    index = lines.LineIndex(source)
+    out = []
+    for msg, offset in zip(p.errors, p.error_offsets):
+        if offset is None:
+            out.append("%s: %s" % (_name(path), msg))
+        else:
+            line, column = index.position(offset)
+            if line == 1:
+                column += first_column - 1
+            out.append("%s:%d:%d: %s" % (_name(path), line + first_line - 1, column, msg))
+    return out
+
+
+def _load(path, times):
+    # (source, None), or (None, the Output for an unreadable input)
+    start = time.perf_counter()
+    try:
+        source = _read(path)
+    except (OSError, UnicodeDecodeError) as e:
+        return None, Output(EXIT_USAGE, "", ["%s: %s" % (_name(path), e)], times)
+    if times is not None:
+        times["read"] = time.perf_counter() - start
+    return source, None
+
+
+def run_file(path, timed=False):
+    """Parses and evaluates one input. The value goes to stdout, and parse
+    errors or the runtime error to stderr."""
+    times = {} if timed else None
+    source, failed = _load(path, times)
+    if failed:
+        return failed
+    program, p = _parse(source, times)
+    if p.errors:
+        return Output(EXIT_PARSE_ERRORS, "", _diagnostics(path, source, p), times)
+
+    from intp import evaluator
+    from intp import object
+
+    start = time.perf_counter()
+    result = evaluator.eval(program, object.Environment(), tail_calls=True, memoize=True)
+    if timed:
+        times["eval"] = time.perf_counter() - start
+    if isinstance(result, object.Error):
+        return Output(EXIT_RUNTIME_ERROR, "", ["%s: %s" % (_name(path), result.inspect())], times)
+    return Output(EXIT_OK, "" if result is None else result.inspect() + "\n", [], times)
+
+
+def parse_file(path, format="sexpr", timed=False):
+    """Parses one input and renders it in format; parse errors go to
+    stderr, after whatever was parsed."""
+    times = {} if timed else None
+    source, failed = _load(path, times)
+    if failed:
+        return failed
+    program, p = _parse(source, times)
+    start = time.perf_counter()
+    out = _render(program, format)
+    if timed:
+        times["output"] = time.perf_counter() - start
+    code = EXIT_PARSE_ERRORS if p.errors else EXIT_OK
+    return Output(code, out, _diagnostics(path, source, p), times)
+
+
+def _render(program, format):
+    if format == "binary":
+        from intp import arena
+
+        return arena.dumps(program)
+    from intp import formats
+
+    render = formats.to_sexpr if format == "sexpr" else formats.to_json
+    return "".join(render(stmt) + "\n" for stmt in program.statements)
+
+
+def _parse_stream(stream, format, timed):
+    # Parses what has arrived each time it ends a top-level statement, so
+    # the output keeps up with the input. A Splitter is fed each line once
+    # and says where the parser would start a new statement. A statement
+    # can end mid-line, so each chunk starts at a line and a column of the
+    # whole input.
+    from intp import parallel
+
+    times = {} if timed else None
+    code = EXIT_OK
+    splitter = parallel.Splitter(1)
+    lines = []
+    offset = 0
+    first_line = 1
+    first_column = 1
+
+    def flush(chunk):
+        program, p = _parse(chunk, times)
+        start = time.perf_counter()
+        _write(_render(program, format))
+        sys.stdout.flush()
+        if timed:
+            times["output"] = times.get("output", 0.0) + time.perf_counter() - start
+        for line in _diagnostics(STDIN, chunk, p, first_line, first_column):
+            sys.stderr.write(line + "\n")
+        return EXIT_PARSE_ERRORS if p.errors else EXIT_OK
+
+    try:
+        for line in stream:
+            cuts = splitter.feed(line)
+            lines.append(line)
+            if cuts:
+                buffer = "".join(lines)
+                chunk = buffer[: cuts[-1] - offset]
+                lines = [buffer[cuts[-1] - offset :]]
+                offset = cuts[-1]
+                code = max(code, flush(chunk))
+                newlines = chunk.count("\n")
+                if newlines:
+                    first_line += newlines
+                    first_column = len(chunk) - chunk.rfind("\n")
+                else:
+                    first_column += len(chunk)
+    except UnicodeDecodeError as e:
+        sys.stderr.write("%s: %s\n" % (_name(STDIN), e))
+        return EXIT_USAGE
+    buffer = "".join(lines)
+    if buffer.strip():
+        code = max(code, flush(buffer))
+    if timed:
+        _write_times(STDIN, times)
+    return code
+
+
+def _tokens(path, timed):
+    # Monkey tokens never span lines, so each line is lexed on its own.
+    from intp import lexer
+    from intp import token
+
+    times = {} if timed else None
+    try:
+        stream = sys.stdin if path == STDIN else open(path, encoding="utf-8", newline="")
+    except OSError as e:
+        sys.stderr.write("%s: %s\n" % (path, e))
+        return EXIT_USAGE
+    code = EXIT_OK
+    lexing = 0.0
+    out = []
+    try:
+        for number, line in enumerate(stream, 1):
+            start = time.perf_counter()
+            l = lexer.Lexer(line)
+            tok = l.next_token()
+            while tok.type != token.EOF:
+                if tok.type == token.ILLEGAL:
+                    code = EXIT_PARSE_ERRORS
+                out.append("%d:%d\t%s\t%s\n" % (number, tok.offset + 1, tok.type, tok.literal))
+                tok = l.next_token()
+            lexing += time.perf_counter() - start
+            sys.stdout.write("".join(out))
+            del out[:]
+    except UnicodeDecodeError as e:
+        sys.stderr.write("%s: %s\n" % (_name(path), e))
+        return EXIT_USAGE
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    if timed:
+        times["lex"] = lexing
+        _write_times(path, times)
+    return code
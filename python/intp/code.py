@@ -0,0 +1,100 @@
+import collections
+
+# Opcodes. Each instruction is one opcode byte followed by its operands,
+# stored big-endian with the widths given in `definitions`. The VM tests
+# opcodes roughly in this order, most common first, and takes the arithmetic
+# and the comparison opcodes by range, so each group is numbered
+# consecutively.
+OP_CONSTANT = 0
+OP_ADD = 1
+OP_SUB = 2
+OP_MUL = 3
+OP_DIV = 4
+OP_GET_GLOBAL = 5
+OP_SET_GLOBAL = 6
+OP_EQUAL = 7
+OP_NOT_EQUAL = 8
+OP_GREATER_THAN = 9
+OP_LESS_THAN = 10
+OP_MINUS = 11
+OP_BANG = 12
+OP_TRUE = 13
+OP_FALSE = 14
+OP_POP = 15
+OP_RETURN_VALUE = 16
+
+Definition = collections.namedtuple("Definition", ["name", "operand_widths"])
+
+definitions = {
+    OP_CONSTANT: Definition("OpConstant", (2,)),
+    OP_ADD: Definition("OpAdd", ()),
+    OP_SUB: Definition("OpSub", ()),
+    OP_MUL: Definition("OpMul", ()),
+    OP_DIV: Definition("OpDiv", ()),
+    OP_GET_GLOBAL: Definition("OpGetGlobal", (2,)),
+    OP_SET_GLOBAL: Definition("OpSetGlobal", (2,)),
+    OP_EQUAL: Definition("OpEqual", ()),
+    OP_NOT_EQUAL: Definition("OpNotEqual", ()),
+    OP_GREATER_THAN: Definition("OpGreaterThan", ()),
+    OP_LESS_THAN: Definition("OpLessThan", ()),
+    OP_MINUS: Definition("OpMinus", ()),
+    OP_BANG: Definition("OpBang", ()),
+    OP_TRUE: Definition("OpTrue", ()),
+    OP_FALSE: Definition("OpFalse", ()),
+    OP_POP: Definition("OpPop", ()),
+    OP_RETURN_VALUE: Definition("OpReturnValue", ()),
+}
+
+
+def lookup(op):
+    definition = definitions.get(op)
+    if definition is None:
+        raise ValueError("opcode %d undefined" % op)
+    return definition
+
+
+def make(op, *operands):
+    definition = definitions.get(op)
+    if definition is None:
+        return b""
+    instruction = bytearray([op])
+    for operand, width in zip(operands, definition.operand_widths):
+        instruction += operand.to_bytes(width, "big")
+    return bytes(instruction)
+
+
+def read_operands(definition, ins, offset):
+    """Returns the operands of an instruction starting at `offset` and the
+    number of bytes they took."""
+    operands = []
+    for width in definition.operand_widths:
+        operands.append(int.from_bytes(ins[offset:offset + width], "big"))
+        offset += width
+    return operands, sum(definition.operand_widths)
+
+
+def read_uint16(ins, offset):
+    return (ins[offset] << 8) | ins[offset + 1]
+
+
+def disassemble(ins, constants=None):
+    """Renders instructions one per line, as "0000 OpConstant 1".
+
+    With the constant pool given, OpConstant also shows the constant.
+    """
+    out = []
+    i = 0
+    while i < len(ins):
+        try:
+            definition = lookup(ins[i])
+        except ValueError as e:
+            out.append("ERROR: %s" % e)
+            i += 1
+            continue
+        operands, read = read_operands(definition, ins, i + 1)
+        line = " ".join([definition.name] + [str(operand) for operand in operands])
+        if constants is not None and ins[i] == OP_CONSTANT:
+            line += " (%s)" % constants[operands[0]].inspect()
+        out.append("%04d %s" % (i, line))
+        i += 1 + read
+    return "\n".join(out)
@@ -0,0 +1,156 @@
+import collections
+
+from intp import ast
+from intp import code
+from intp import object
+
+GLOBAL_SCOPE = "GLOBAL"
+
+# the most constants, and globals, that an instruction operand can index
+MAX_CONSTANTS = 1 << 8 * code.definitions[code.OP_CONSTANT].operand_widths[0]
+MAX_GLOBALS = 1 << 8 * code.definitions[code.OP_GET_GLOBAL].operand_widths[0]
+
+Symbol = collections.namedtuple("Symbol", ["name", "scope", "index"])
+Bytecode = collections.namedtuple("Bytecode", ["instructions", "constants"])
+
+
+class CompileError(Exception):
+    pass
+
+
+class SymbolTable:
+    def __init__(self):
+        self.store = {}
+        self.num_definitions = 0
+
+    def define(self, name):
+        symbol = self.store.get(name)
+        if symbol is None:
+            if self.num_definitions == MAX_GLOBALS:
+                raise CompileError("too many globals")
+            symbol = Symbol(name, GLOBAL_SCOPE, self.num_definitions)
+            self.store[name] = symbol
+            self.num_definitions += 1
+        return symbol
+
+    def resolve(self, name):
+        return self.store.get(name)
+
+
+class Compiler:
+    """Compiles a Program into bytecode for intp.vm.
+
+    Instructions are appended to one bytearray and constants to a pool, in
+    which equal integers share a slot. Names are resolved to global slots
+    here, so an unknown identifier is a CompileError. Passing the symbol
+    table and constants of an earlier Compiler continues where it stopped,
+    as the REPL needs.
+    """
+
+    def __init__(self, symbol_table=None, constants=None):
+        self.instructions = bytearray()
+        self.constants = [] if constants is None else constants
+        self.symbol_table = SymbolTable() if symbol_table is None else symbol_table
+        self._integer_constants = {
+            obj.value: i for i, obj in enumerate(self.constants) if obj.__class__ is object.Integer
+        }
+
+    def compile(self, node):
+        try:
+            self._compile(node)
+        except RecursionError:
+            raise CompileError("expression nested too deeply") from None
+
+    def bytecode(self):
+        return Bytecode(self.instructions, self.constants)
+
+    def _compile(self, node):
+        if isinstance(node, ast.Program):
+            for stmt in node.statements:
+                self._compile(stmt)
+        elif node is None:
+            raise CompileError("missing expression")
+        else:
+            compile = self._compilers.get(node.kind)
+            if compile is None:
+                raise CompileError("cannot compile %s" % type(node).__name__)
+            compile(self, node)
+
+    def _emit(self, op, *operands):
+        position = len(self.instructions)
+        self.instructions += code.make(op, *operands)
+        return position
+
+    def _add_constant(self, obj):
+        if len(self.constants) == MAX_CONSTANTS:
+            raise CompileError("too many constants")
+        self.constants.append(obj)
+        return len(self.constants) - 1
+
+    def _compile_let_statement(self, node):
+        self._compile(node.value)
+        symbol = self.symbol_table.define(node.name.value)
+        self._emit(code.OP_SET_GLOBAL, symbol.index)
+
+    def _compile_return_statement(self, node):
+        self._compile(node.return_value)
+        self._emit(code.OP_RETURN_VALUE)
+
+    def _compile_expression_statement(self, node):
+        self._compile(node.expression)
+        self._emit(code.OP_POP)
+
+    def _compile_identifier(self, node):
+        symbol = self.symbol_table.resolve(node.value)
+        if symbol is None:
+            raise CompileError("identifier not found: " + node.value)
+        self._emit(code.OP_GET_GLOBAL, symbol.index)
+
+    def _compile_integer_literal(self, node):
+        index = self._integer_constants.get(node.value)
+        if index is None:
+            index = self._integer_constants[node.value] = self._add_constant(object.integer(node.value))
+        self._emit(code.OP_CONSTANT, index)
+
+    def _compile_boolean(self, node):
+        self._emit(code.OP_TRUE if node.value else code.OP_FALSE)
+
+    def _compile_prefix_expression(self, node):
+        op = self._prefix_operators.get(node.operator)
+        if op is None:
+            raise CompileError("unknown operator " + node.operator)
+        self._compile(node.right)
+        self._emit(op)
+
+    def _compile_infix_expression(self, node):
+        op = self._infix_operators.get(node.operator)
+        if op is None:
+            raise CompileError("unknown operator " + node.operator)
+        self._compile(node.left)
+        self._compile(node.right)
+        self._emit(op)
+
+    _compilers = {
+        ast.LET_STATEMENT: _compile_let_statement,
+        ast.RETURN_STATEMENT: _compile_return_statement,
+        ast.EXPRESSION_STATEMENT: _compile_expression_statement,
+        ast.IDENTIFIER: _compile_identifier,
+        ast.INTEGER_LITERAL: _compile_integer_literal,
+        ast.BOOLEAN: _compile_boolean,
+        ast.PREFIX_EXPRESSION: _compile_prefix_expression,
+        ast.INFIX_EXPRESSION: _compile_infix_expression,
+    }
+    _prefix_operators = {
+        "-": code.OP_MINUS,
+        "!": code.OP_BANG,
+    }
+    _infix_operators = {
+        "+": code.OP_ADD,
+        "-": code.OP_SUB,
+        "*": code.OP_MUL,
+        "/": code.OP_DIV,
+        "==": code.OP_EQUAL,
+        "!=": code.OP_NOT_EQUAL,
+        ">": code.OP_GREATER_THAN,
+        "<": code.OP_LESS_THAN,
+    }
@@ -0,0 +1,736 @@
+import collections
+import operator
+
+from intp import ast
+from intp import builtins
+from intp import object
+from intp import purity
+
+TRUE = object.TRUE
+FALSE = object.FALSE
+NULL = object.NULL
+Integer = object.Integer
+ReturnValue = object.ReturnValue
+integer = object.integer
+Function = object.Function
+Environment = object.Environment
+Frame = object.Frame
+Array = object.Array
+Builtin = object.Builtin
+BUILTINS = builtins.BUILTINS
+
+_TOO_DEEP = "expression nested too deeply"
+_STACK_OVERFLOW = "stack overflow"
+
+# the default number of results a memoized function keeps
+MEMO_SIZE = 1024
+
+
+# What the compile functions need besides the node. pure holds the ids of
+# the function literals to memoize, or is None with memoization off;
+# in_function is whether the node is in a function body.
+_Context = collections.namedtuple("_Context", ["resolver", "tail_calls", "pure", "memo_size", "in_function"])
+
+
+class _Failure(Exception):
+    # Raised inside compiled code and turned into an object.Error where the
+    # evaluation started, so the closures need no error checks of their own.
+    def __init__(self, message):
+        self.message = message
+
+
+def eval(node, env, resolver=None, tail_calls=False, memoize=False, memo_size=MEMO_SIZE):
+    return compile(node, resolver, tail_calls, memoize, memo_size)(env)
+
+
+def compile(node, resolver=None, tail_calls=False, memoize=False, memo_size=MEMO_SIZE):
+    """Compiles a node into a function that evaluates it in an Environment.
+
+    The tree is walked only once, here. Each node becomes a closure over the
+    closures of its children, specialized for its operator, so running the
+    result dispatches on nothing but the values it computes. The returned
+    function gives back an object (or None for a let statement), an
+    object.Error for a runtime error, and for a Program the value of its
+    first return statement.
+
+    Given the intp.resolver.Resolver that resolved the program, variables
+    live in the slots of an object.Frame instead, which must then be passed
+    in place of the Environment.
+
+    With tail_calls, a call in tail position of a function body returns to
+    the call that is running the function, which then runs the callee in a
+    loop (a trampoline), so recursion through tail calls takes no Python
+    stack. A function calling itself that way also reuses its environment
+    unless the body makes closures that could have captured it.
+
+    With memoize, the functions of a Program that intp.purity finds pure
+    keep the results of their calls with integer and boolean arguments in
+    a Memo of up to memo_size entries, and give them back for the same
+    arguments instead of running again. Only integer, boolean and null
+    results are kept, since other values can be told apart by identity.
+    """
+    pure = None
+    if memoize and memo_size > 0 and isinstance(node, ast.Program):
+        pure = purity.pure_functions(node)
+    context = _Context(resolver, tail_calls, pure, memo_size, False)
+    try:
+        if isinstance(node, ast.Program):
+            return _compile_program(node, context)
+        return _guard(_compile(node, context))
+    except RecursionError:
+        return _guard(_too_deep)
+
+
+def _compile_program(program, context):
+    statements = [_compile(stmt, context) for stmt in program.statements]
+
+    def run(env):
+        result = None
+        for statement in statements:
+            result = statement(env)
+            if result.__class__ is ReturnValue:
+                return result.value
+        return result
+
+    if context.resolver is None:
+        return _guard(run)
+
+    scope = context.resolver.scope
+
+    def run_in_frame(frame):
+        # the scope may have grown since the frame was made (in the REPL)
+        missing = len(scope) - len(frame.slots)
+        if missing > 0:
+            frame.slots.extend([None] * missing)
+        return run(frame)
+
+    return _guard(run_in_frame)
+
+
+def _guard(code):
+    def run(env):
+        try:
+            return code(env)
+        except _Failure as e:
+            return object.Error(e.message)
+        except RecursionError:
+            return object.Error(_STACK_OVERFLOW)
+
+    return run
+
+
+def _too_deep(env):
+    raise _Failure(_TOO_DEEP)
+
+
+def _compile(node, context):
+    if node is None:
+        return _null
+    return _compilers[node.kind](node, context)
+
+
+def _null(env):
+    return NULL
+
+
+def _compile_let_statement(node, context):
+    value = _compile(node.value, context)
+    # The purity analysis sees one program, but the top-level scope of the
+    # REPL outlives it: rebinding a name there, or binding the name of a
+    # builtin, ends the memoization of the functions made so far, before
+    # the value can make a new one.
+    rebinds = context.pure is not None and not context.in_function
+    shadows = node.name.value in BUILTINS
+    if context.resolver is not None:
+        slot = context.resolver.location(node.name).slot
+        if rebinds:
+
+            def let_top_slot(frame):
+                if shadows or frame.slots[slot] is not None:
+                    memo_stats(frame).epoch += 1
+                frame.slots[slot] = value(frame)
+
+            return let_top_slot
+
+        def let_slot(frame):
+            frame.slots[slot] = value(frame)
+
+        return let_slot
+
+    name = node.name.value
+    if rebinds:
+
+        def let_top(env):
+            if shadows or name in env.store:
+                memo_stats(env).epoch += 1
+            env.set(name, value(env))
+
+        return let_top
+
+    def let(env):
+        env.set(name, value(env))
+
+    return let
+
+
+def _compile_return_statement(node, context):
+    value = _compile(node.return_value, context)
+
+    def return_(env):
+        return ReturnValue(value(env))
+
+    return return_
+
+
+def _compile_expression_statement(node, context):
+    return _compile(node.expression, context)
+
+
+def _compile_identifier(node, context):
+    name = node.value
+    message = "identifier not found: " + name
+    # a builtin is what the name means wherever no variable has it
+    builtin = BUILTINS.get(name)
+    if context.resolver is not None:
+        return _compile_slot(context.resolver.location(node), message, builtin)
+
+    def identifier(env):
+        val = env.get(name)
+        if val is None:
+            if builtin is not None:
+                return builtin
+            raise _Failure(message)
+        return val
+
+    return identifier
+
+
+def _compile_slot(location, message, builtin):
+    if location is None:
+        if builtin is not None:
+            return lambda frame: builtin
+
+        def unresolved(frame):
+            raise _Failure(message)
+
+        return unresolved
+
+    depth, slot = location
+    if depth == 0:
+
+        def local(frame):
+            val = frame.slots[slot]
+            if val is None:
+                if builtin is not None:
+                    return builtin
+                raise _Failure(message)
+            return val
+
+        return local
+
+    def outer(frame):
+        for _ in range(depth):
+            frame = frame.outer
+        val = frame.slots[slot]
+        if val is None:
+            if builtin is not None:
+                return builtin
+            raise _Failure(message)
+        return val
+
+    return outer
+
+
+def _compile_integer_literal(node, context):
+    value = integer(node.value)
+    return lambda env: value
+
+
+def _compile_boolean(node, context):
+    value = TRUE if node.value else FALSE
+    return lambda env: value
+
+
+def _compile_prefix_expression(node, context):
+    op = node.operator
+    right = _compile(node.right, context)
+
+    if op == "!":
+
+        def bang(env):
+            value = right(env)
+            if value is FALSE or value is NULL:
+                return TRUE
+            return FALSE
+
+        return bang
+
+    if op == "-":
+
+        def minus(env):
+            value = right(env)
+            if value.__class__ is not Integer:
+                raise _Failure("unknown operator: -" + value.type())
+            return integer(-value.value)
+
+        return minus
+
+    def unknown(env):
+        raise _Failure("unknown operator: %s%s" % (op, right(env).type()))
+
+    return unknown
+
+
+def _divide(a, b):
+    # Monkey integers divide like Go's, truncating toward zero.
+    if b == 0:
+        raise _Failure("division by zero")
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+_arithmetic = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": _divide,
+}
+_comparisons = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _non_integer_infix(op, left, right):
+    if op == "==":
+        return TRUE if left is right else FALSE
+    if op == "!=":
+        return FALSE if left is right else TRUE
+    if left.type() != right.type():
+        raise _Failure("type mismatch: %s %s %s" % (left.type(), op, right.type()))
+    raise _Failure("unknown operator: %s %s %s" % (left.type(), op, right.type()))
+
+
+def _compile_infix_expression(node, context):
+    op = node.operator
+    left = _compile(node.left, context)
+    right = _compile(node.right, context)
+
+    fn = _arithmetic.get(op)
+    if fn is not None:
+
+        def arithmetic(env):
+            lval = left(env)
+            rval = right(env)
+            if lval.__class__ is Integer and rval.__class__ is Integer:
+                return integer(fn(lval.value, rval.value))
+            return _non_integer_infix(op, lval, rval)
+
+        return arithmetic
+
+    fn = _comparisons.get(op)
+    if fn is not None:
+
+        def comparison(env):
+            lval = left(env)
+            rval = right(env)
+            if lval.__class__ is Integer and rval.__class__ is Integer:
+                return TRUE if fn(lval.value, rval.value) else FALSE
+            return _non_integer_infix(op, lval, rval)
+
+        return comparison
+
+    def unknown(env):
+        lval = left(env)
+        rval = right(env)
+        raise _Failure("unknown operator: %s %s %s" % (lval.type(), op, rval.type()))
+
+    return unknown
+
+
+def _compile_array_literal(node, context):
+    elements = [_compile(element, context) for element in node.elements]
+
+    def array(env):
+        return builtins.make_array([element(env) for element in elements])
+
+    return array
+
+
+def _compile_index_expression(node, context):
+    left = _compile(node.left, context)
+    index = _compile(node.index, context)
+
+    def index_(env):
+        lval = left(env)
+        ival = index(env)
+        if lval.__class__ is not Array or ival.__class__ is not Integer:
+            raise _Failure("index operator not supported: " + lval.type())
+        elements = lval.elements
+        i = ival.value
+        if not 0 <= i < len(elements):
+            return NULL
+        if elements.__class__ is list:
+            return elements[i]
+        return integer(int(elements[i]))
+
+    return index_
+
+
+def _compile_block_statement(node, context):
+    return _block([_compile(stmt, context) for stmt in node.statements])
+
+
+def _block(statements):
+    if len(statements) == 1:
+        return statements[0]
+
+    def block(env):
+        result = None
+        for statement in statements:
+            result = statement(env)
+            if result.__class__ is ReturnValue:
+                return result
+        return result
+
+    return block
+
+
+def _compile_if_expression(node, context, compile_block=_compile_block_statement):
+    condition = _compile(node.condition, context)
+    consequence = compile_block(node.consequence, context)
+    if node.alternative is None:
+
+        def if_(env):
+            value = condition(env)
+            if value is not FALSE and value is not NULL:
+                result = consequence(env)
+                return NULL if result is None else result
+            return NULL
+
+        return if_
+
+    alternative = compile_block(node.alternative, context)
+
+    def if_else(env):
+        value = condition(env)
+        if value is not FALSE and value is not NULL:
+            result = consequence(env)
+        else:
+            result = alternative(env)
+        return NULL if result is None else result
+
+    return if_else
+
+
+# What the evaluator keeps in object.Function.code: the compiled body, a
+# function making the environment of a call from the closed-over one and the
+# arguments, and one resetting such an environment for another call, or None
+# where that is not safe.
+_Code = collections.namedtuple("_Code", ["body", "bind", "rebind"])
+
+
+class _TailCall:
+    # Returned by a call in tail position instead of its result; the _apply
+    # running the function makes the call.
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function, arguments):
+        self.function = function
+        self.arguments = arguments
+
+
+def _compile_function_literal(node, context):
+    parameters = node.parameters
+    body_node = node.body
+    memoized = context.pure is not None and id(node) in context.pure
+    context = context._replace(in_function=True)
+    if context.tail_calls:
+        body = _compile_body(body_node, context, True)
+    else:
+        body = _compile(body_node, context)
+    if context.resolver is None:
+        bind, rebind = _environment_binders(node)
+    else:
+        bind, rebind = _frame_binders(node, context.resolver)
+    if not context.tail_calls or _makes_closures(body_node):
+        rebind = None
+    code = _Code(body, bind, rebind)
+    if memoized:
+        size = context.memo_size
+
+        def memoized_function(env):
+            return Function(parameters, body_node, env, code, Memo(size, memo_stats(env)))
+
+        return memoized_function
+
+    def function(env):
+        return Function(parameters, body_node, env, code)
+
+    return function
+
+
+def _environment_binders(node):
+    names = [parameter.value for parameter in node.parameters]
+
+    def bind(outer, args):
+        env = Environment(outer)
+        store = env.store
+        for name, arg in zip(names, args):
+            store[name] = arg
+        return env
+
+    def rebind(env, args):
+        store = env.store
+        store.clear()
+        for name, arg in zip(names, args):
+            store[name] = arg
+
+    return bind, rebind
+
+
+def _frame_binders(node, resolver):
+    size = len(resolver.function_scope(node))
+    blank = [None] * size
+    slots = [resolver.location(parameter).slot for parameter in node.parameters]
+    count = len(slots)
+    rest = blank[count:]
+    # parameters take the first slots unless a name is repeated
+    distinct = slots == list(range(count))
+
+    def bind(outer, args):
+        frame = Frame(size, outer)
+        if distinct and len(args) == count:
+            frame.slots[:count] = args
+        else:
+            values = frame.slots
+            for slot, arg in zip(slots, args):
+                values[slot] = arg
+        return frame
+
+    def rebind(frame, args):
+        values = frame.slots
+        if distinct and len(args) == count:
+            values[:count] = args
+            values[count:] = rest
+        else:
+            values[:] = blank
+            for slot, arg in zip(slots, args):
+                values[slot] = arg
+
+    return bind, rebind
+
+
+def _makes_closures(root):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.kind == ast.FUNCTION_LITERAL:
+            return True
+        stack.extend(getattr(node, field) for field in node.fields)
+        for field in node.list_fields:
+            stack.extend(getattr(node, field) or [])
+    return False
+
+
+def _compile_body(block, context, tail):
+    # The statements of a function body, or of an if in statement position
+    # in one: a return of a call is a tail call there, and so is a call that
+    # is the last statement when the block itself is in tail position.
+    last = len(block.statements) - 1
+    return _block(
+        [_compile_body_statement(stmt, context, tail and i == last) for i, stmt in enumerate(block.statements)]
+    )
+
+
+def _compile_body_statement(stmt, context, tail):
+    kind = stmt.kind
+    if kind == ast.RETURN_STATEMENT:
+        value = stmt.return_value
+        if value is not None and value.kind == ast.CALL_EXPRESSION:
+            call = _compile_call_expression(value, context, _TailCall)
+
+            def return_call(env):
+                return ReturnValue(call(env))
+
+            return return_call
+    elif kind == ast.EXPRESSION_STATEMENT and stmt.expression is not None:
+        expression = stmt.expression
+        if expression.kind == ast.IF_EXPRESSION:
+            return _compile_if_expression(
+                expression, context, lambda block, context: _compile_body(block, context, tail)
+            )
+        if tail and expression.kind == ast.CALL_EXPRESSION:
+            return _compile_call_expression(expression, context, _TailCall)
+    return _compile(stmt, context)
+
+
+def _compile_call_expression(node, context, apply=None):
+    function = _compile(node.function, context)
+    arguments = [_compile(argument, context) for argument in node.arguments]
+    apply = apply or _apply
+
+    def call(env):
+        return apply(function(env), [argument(env) for argument in arguments])
+
+    return call
+
+
+def _apply(function, args, memoize=True):
+    if function.__class__ is not Function:
+        if function.__class__ is Builtin:
+            return _apply_builtin(function, args)
+        raise _Failure("not a function: " + function.type())
+    if memoize and function.memo is not None:
+        return _apply_memoized(function, args)
+    code = function.code
+    env = code.bind(function.env, args)
+    while True:
+        result = code.body(env)
+        if result.__class__ is ReturnValue:
+            result = result.value
+        if result.__class__ is not _TailCall:
+            return NULL if result is None else result
+
+        # the trampoline: run the callee of a tail call here
+        callee = result.function
+        args = result.arguments
+        if callee is function and code.rebind is not None:
+            code.rebind(env, args)
+            continue
+        if callee.__class__ is not Function:
+            return _apply(callee, args)
+        function = callee
+        code = function.code
+        env = code.bind(function.env, args)
+
+
+def _apply_builtin(builtin, args):
+    result = builtin.fn(args, _apply)
+    if result.__class__ is object.Error:
+        raise _Failure(result.message)
+    return result
+
+
+def _apply_memoized(function, args):
+    memo = function.memo
+    if memo.epoch != memo.stats.epoch:
+        function.memo = None
+        return _apply(function, args, False)
+    key = []
+    for arg in args:
+        cls = arg.__class__
+        if cls is Integer:
+            key.append(arg.value)
+        elif cls is object.Boolean:
+            # TRUE and FALSE are the only booleans and never equal an int
+            key.append(arg)
+        else:
+            return _apply(function, args, False)
+    key = tuple(key)
+    result = memo.get(key)
+    if result is None:
+        result = _apply(function, args, False)
+        if result.__class__ in _memoizable:
+            memo.put(key, result)
+    return result
+
+
+_memoizable = (Integer, object.Boolean, object.Null)
+
+
+class Memo:
+    """The results of one pure function by its arguments, keeping at most
+    `size` and dropping the least recently used first.
+
+    Each table counts its hits, misses and evictions, and adds them to
+    `stats`, the MemoStats of the top-level scope the function was made in.
+    `epoch` is the count of rebindings in that scope when the function was
+    made; once another happens the function is no longer memoized.
+    """
+
+    __slots__ = ("size", "stats", "epoch", "table", "hits", "misses", "evictions")
+
+    def __init__(self, size=MEMO_SIZE, stats=None):
+        self.size = size
+        self.stats = stats = MemoStats() if stats is None else stats
+        self.epoch = stats.epoch
+        self.table = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        table = self.table
+        result = table.get(key)
+        if result is None:
+            self.misses += 1
+            self.stats.misses += 1
+            return None
+        table.move_to_end(key)
+        self.hits += 1
+        self.stats.hits += 1
+        return result
+
+    def put(self, key, result):
+        table = self.table
+        table[key] = result
+        if len(table) > self.size:
+            table.popitem(last=False)
+            self.evictions += 1
+            self.stats.evictions += 1
+
+
+class MemoStats:
+    """Hits, misses and evictions of the Memo tables of one top-level scope
+    since the last reset, and `epoch`, the count of top-level rebindings
+    there (see _compile_let_statement)."""
+
+    def __init__(self):
+        self.epoch = 0
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def memo_stats(env):
+    """Returns the MemoStats of the top-level scope of an Environment or a
+    Frame, made on first use. Each top-level scope (a REPL, a server
+    session) has its own, so rebinding a name in one leaves the functions
+    of the others memoized."""
+    while env.outer is not None:
+        env = env.outer
+    stats = env.memo_stats
+    if stats is None:
+        stats = env.memo_stats = MemoStats()
+    return stats
+
+
+_compilers = {
+    ast.LET_STATEMENT: _compile_let_statement,
+    ast.RETURN_STATEMENT: _compile_return_statement,
+    ast.EXPRESSION_STATEMENT: _compile_expression_statement,
+    ast.IDENTIFIER: _compile_identifier,
+    ast.INTEGER_LITERAL: _compile_integer_literal,
+    ast.BOOLEAN: _compile_boolean,
+    ast.PREFIX_EXPRESSION: _compile_prefix_expression,
+    ast.INFIX_EXPRESSION: _compile_infix_expression,
+    ast.BLOCK_STATEMENT: _compile_block_statement,
+    ast.IF_EXPRESSION: _compile_if_expression,
+    ast.FUNCTION_LITERAL: _compile_function_literal,
+    ast.CALL_EXPRESSION: _compile_call_expression,
+    ast.ARRAY_LITERAL: _compile_array_literal,
+    ast.INDEX_EXPRESSION: _compile_index_expression,
+}
@@ -0,0 +1,103 @@
+"""Renderings of a parsed tree for tools: S-expressions and JSON.
+
+Like ast.to_string, both work from an explicit stack of strings and
+nodes, so any depth the parser accepts can be written out.
+"""
+import json
+
+from intp import ast
+
+
+def to_sexpr(node):
+    """Returns a node as an S-expression, such as (let x (+ 1 (f 2)))."""
+    return _render(node, _sexpr_parts)
+
+
+def to_json(node):
+    """Returns a node as a JSON object naming its class ("type"), its
+    source offset and its fields, with child nodes as nested objects."""
+    return _render(node, _json_parts)
+
+
+def _render(node, parts):
+    out = []
+    write = out.append
+    stack = [node]
+    pop = stack.pop
+    push = stack.extend
+    while stack:
+        item = pop()
+        if type(item) is str:
+            write(item)
+        else:
+            push(parts(item)[::-1])
+    return "".join(out)
+
+
+def _spaced(nodes):
+    # the nodes, each after a space, as parts
+    out = []
+    for node in nodes:
+        out.append(" ")
+        out.append(node)
+    return out
+
+
+def _sexpr_parts(node):
+    if node is None:
+        return ["nil"]
+    if isinstance(node, ast.Program):
+        return ["(program"] + _spaced(node.statements) + [")"]
+    return _sexpr[node.kind](node)
+
+
+_sexpr = {
+    ast.LET_STATEMENT: lambda n: ["(let ", n.name, " ", n.value, ")"],
+    ast.RETURN_STATEMENT: lambda n: ["(return ", n.return_value, ")"],
+    ast.EXPRESSION_STATEMENT: lambda n: [n.expression],
+    ast.IDENTIFIER: lambda n: [n.value],
+    ast.INTEGER_LITERAL: lambda n: [n.token.literal],
+    ast.PREFIX_EXPRESSION: lambda n: ["(" + n.operator + " ", n.right, ")"],
+    ast.INFIX_EXPRESSION: lambda n: ["(" + n.operator + " ", n.left, " ", n.right, ")"],
+    ast.BOOLEAN: lambda n: [n.token.literal],
+    ast.BLOCK_STATEMENT: lambda n: ["(do"] + _spaced(n.statements) + [")"],
+    ast.IF_EXPRESSION: lambda n: ["(if ", n.condition, " ", n.consequence]
+    + ([" ", n.alternative] if n.alternative is not None else [])
+    + [")"],
+    ast.FUNCTION_LITERAL: lambda n: [
+        "(fn (" + " ".join(p.value for p in n.parameters) + ") ",
+        n.body,
+        ")",
+    ],
+    ast.CALL_EXPRESSION: lambda n: ["(", n.function] + _spaced(n.arguments) + [")"],
+    ast.ARRAY_LITERAL: lambda n: ["(array"] + _spaced(n.elements) + [")"],
+    ast.INDEX_EXPRESSION: lambda n: ["(index ", n.left, " ", n.index, ")"],
+}
+
+
+def _json_parts(node):
+    if node is None:
+        return ["null"]
+    if isinstance(node, ast.Program):
+        return ['{"type": "Program", "statements": '] + _json_list(node.statements) + ["}"]
+    out = ['{"type": "%s", "offset": %s' % (type(node).__name__, json.dumps(node.offset))]
+    if node.scalar is not None:
+        out.append(', "%s": %s' % (node.scalar, json.dumps(getattr(node, node.scalar))))
+    for field in node.fields:
+        out.append(', "%s": ' % field)
+        out.append(getattr(node, field))
+    for field in node.list_fields:
+        out.append(', "%s": ' % field)
+        out += _json_list(getattr(node, field) or [])
+    out.append("}")
+    return out
+
+
+def _json_list(nodes):
+    out = ["["]
+    for node in nodes:
+        if len(out) > 1:
+            out.append(", ")
+        out.append(node)
+    out.append("]")
+    return out
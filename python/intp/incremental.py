@@ -0,0 +1,146 @@
+import bisect
+from array import array
+
+from intp import ast
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+class Document:
+    """A parsed source that can be edited without reparsing all of it.
+
+    Besides the program and its token stream, a document remembers one step
+    per top-level parse attempt: where it started, the statement it produced
+    (None if it failed) and its errors. After an edit only the tokens around
+    the change are lexed again. Parsing restarts one step before the first
+    changed token and stops as soon as it reaches the start of an old step
+    that lies past the edit, because from there on the parser sees exactly
+    the tokens it saw before. Everything after that point is reused with its
+    offsets shifted. The result is the same as parsing the new text from
+    scratch.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = lexer.Lexer(source).token_stream()
+        self.program = ast.Program()
+        self._starts = array("l")
+        self._nodes = []
+        self._errors = []
+        self._parse(0)
+        self.program.statements = [node for node in self._nodes if node is not None]
+
+    @property
+    def errors(self):
+        return [msg for step in self._errors for msg, _ in step]
+
+    @property
+    def error_offsets(self):
+        return [offset for step in self._errors for _, offset in step]
+
+    def edit(self, offset, removed, inserted):
+        """Replaces `removed` characters at `offset` with the `inserted` text."""
+        old = self.tokens
+        if offset < 0 or removed < 0 or offset + removed > len(self.source):
+            raise ValueError("edit out of range")
+        source = self.source[:offset] + inserted + self.source[offset + removed:]
+        delta = len(inserted) - removed
+        old_end = offset + removed
+        new_end = offset + len(inserted)
+
+        # Restart one step before the step holding the first token the edit
+        # can touch (one that ends at or after the offset may be extended).
+        first = bisect.bisect_left(old.ends, offset)
+        step = bisect.bisect_right(self._starts, old.starts[first]) - 2
+        if step <= 0:
+            step = 0
+            restart = 0
+        else:
+            restart = self._starts[step]
+        index = bisect.bisect_left(old.starts, restart)
+
+        # Lex from the restart point until a token starts where an old token
+        # past the edit started; from there the old tokens are still valid.
+        tokens = token.TokenStream(source)
+        tokens.types = old.types[:index]
+        tokens.starts = old.starts[:index]
+        tokens.ends = old.ends[:index]
+        synced = None
+        for code, start, end in lexer.scan(source, restart):
+            if start >= new_end and start - delta >= old_end:
+                i = bisect.bisect_left(old.starts, start - delta)
+                if old.starts[i] == start - delta:
+                    synced = i
+                    break
+            tokens.types.append(code)
+            tokens.starts.append(start)
+            tokens.ends.append(end)
+        if synced is None:
+            tokens.types.append(token.CODES[token.EOF])
+            tokens.starts.append(len(source))
+            tokens.ends.append(len(source))
+        else:
+            tokens.types.extend(old.types[synced:])
+            tokens.starts.extend(array("l", [start + delta for start in old.starts[synced:]]))
+            tokens.ends.extend(array("l", [end + delta for end in old.ends[synced:]]))
+
+        old_starts, old_nodes, old_errors = self._starts, self._nodes, self._errors
+        self.source = source
+        self.tokens = tokens
+        self._starts = old_starts[:step]
+        self._nodes = old_nodes[:step]
+        self._errors = old_errors[:step]
+
+        if synced is None:
+            self._parse(index)
+        else:
+            sync_offset = tokens.starts[len(tokens) - len(old) + synced]
+            resume = self._parse(index, sync_offset, old_starts, delta)
+            if resume is not None:
+                self._starts.extend(array("l", [start + delta for start in old_starts[resume:]]))
+                self._nodes.extend(_shift_nodes(old_nodes[resume:], delta))
+                self._errors.extend(
+                    [(msg, offset + delta) for msg, offset in errors] if errors else errors
+                    for errors in old_errors[resume:]
+                )
+        self.program.statements = [node for node in self._nodes if node is not None]
+
+    def _parse(self, index, sync_offset=None, old_starts=None, delta=0):
+        # Parses steps from token `index` on. Returns the index of the first
+        # old step to reuse once the parser is back in step, or None when it
+        # ran to the end.
+        self.tokens.position = index
+        p = parser.Parser(self.tokens)
+        for start, stmt, first_error in p._steps():
+            self._starts.append(start.offset)
+            self._nodes.append(stmt)
+            self._errors.append(list(zip(p.errors[first_error:], p.error_offsets[first_error:])))
+            if sync_offset is not None and start.offset >= sync_offset:
+                i = bisect.bisect_left(old_starts, start.offset - delta)
+                if i < len(old_starts) and old_starts[i] == start.offset - delta:
+                    return i + 1
+        return None
+
+
+def _shift_nodes(nodes, delta):
+    # Nodes never share tokens, except that an expression statement shares
+    # its first token with the first node of its expression.
+    shared = set()
+    stack = [node for node in nodes if node is not None]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        tok = node.token
+        if tok not in shared and tok.offset is not None:
+            tok.offset += delta
+        if node.kind == ast.EXPRESSION_STATEMENT:
+            shared.add(tok)
+        for field in node.fields:
+            child = getattr(node, field)
+            if child is not None:
+                push(child)
+        for field in node.list_fields:
+            stack.extend(getattr(node, field) or [])
+    return nodes
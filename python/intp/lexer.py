@@ -1,14 +1,64 @@
+import codecs
+import re
+
+from . import lines
 from . import token
 
+_operators = {
+    "=": token.ASSIGN,
+    "==": token.EQ,
+    "!": token.BANG,
+    "!=": token.NOT_EQ,
+    ";": token.SEMICOLON,
+    "(": token.LPAREN,
+    ")": token.RPAREN,
+    ",": token.COMMA,
+    "+": token.PLUS,
+    "-": token.MINUS,
+    "*": token.ASTERISK,
+    "/": token.SLASH,
+    "<": token.LT,
+    ">": token.GT,
+    "{": token.LBRACE,
+    "}": token.RBRACE,
+    "[": token.LBRACKET,
+    "]": token.RBRACKET,
+}
+
+# One match per token: leading white space is skipped, then exactly one of the
+# groups matches (1: identifier, 2: integer, 3: operator or illegal character).
+_scanner = re.compile(r"[ \t\n\r]*(?:([A-Za-z_]+)|([0-9]+)|(==|!=|[^ \t\n\r]))")
+
 
 class Lexer:
     def __init__(self, input):
+        self.reset(input)
+
+    def reset(self, input):
         self.input = input
         self.position = 0
         self.read_position = 0
         self.ch = None
+        self._line_index = None
         self._read_char()
 
+    @classmethod
+    def from_stream(cls, stream, chunk_size=None):
+        return StreamLexer(stream, chunk_size)
+
+    @classmethod
+    def from_path(cls, path, chunk_size=None):
+        return StreamLexer(open(path, "rb"), chunk_size, close=True)
+
+    @classmethod
+    def from_mmap(cls, mm, chunk_size=None):
+        return StreamLexer(mm, chunk_size)
+
+    def line_index(self):
+        if self._line_index is None:
+            self._line_index = lines.LineIndex(self.input)
+        return self._line_index
+
     def _read_char(self):
         if self.read_position >= len(self.input):
             self.ch = None
@@ -40,16 +90,17 @@ class Lexer:
             return self.input[self.read_position]
 
     def next_token(self):
-        def _new_token(type):
-            return token.Token(type, self.ch)
-
         self._skip_white_space()
+        start = self.position
+
+        def _new_token(type):
+            return token.Token(type, self.ch, start)
 
         if self.ch == "=":
             if self._peek_char() == "=":
                 ch = self.ch
                 self._read_char()
-                tok = token.Token(token.EQ, ch + self.ch)
+                tok = token.Token(token.EQ, ch + self.ch, start)
             else:
                 tok = _new_token(token.ASSIGN)
         elif self.ch == ";":
@@ -64,7 +115,7 @@ class Lexer:
             if self._peek_char() == "=":
                 ch = self.ch
                 self._read_char()
-                tok = token.Token(token.NOT_EQ, ch + self.ch)
+                tok = token.Token(token.NOT_EQ, ch + self.ch, start)
             else:
                 tok = _new_token(token.BANG)
         elif self.ch == "+":
@@ -83,20 +134,198 @@ class Lexer:
             tok = _new_token(token.LBRACE)
         elif self.ch == "}":
             tok = _new_token(token.RBRACE)
+        elif self.ch == "[":
+            tok = _new_token(token.LBRACKET)
+        elif self.ch == "]":
+            tok = _new_token(token.RBRACKET)
         elif self.ch is None:
-            tok = token.Token(token.EOF, "")
+            # stay at the end, so every further EOF has the same offset
+            return token.Token(token.EOF, "", start)
         else:
             if is_letter(self.ch):
                 literal = self._read_identifier()
-                return token.Token(token.lookup_ident(literal), literal)
+                return token.Token(token.lookup_ident(literal), literal, start)
             elif is_digit(self.ch):
-                return token.Token(token.INT, self._read_number())
+                return token.Token(token.INT, self._read_number(), start)
             else:
                 tok = _new_token(token.ILLEGAL)
 
         self._read_char()
         return tok
 
+    def tokenize(self):
+        return list(self.iter_tokens())
+
+    def iter_tokens(self):
+        input = self.input
+        lookup_ident = token.lookup_ident
+        Token = token.Token
+        INT = token.INT
+        ILLEGAL = token.ILLEGAL
+        # operators are known up front; identifier types are cached on first sight
+        types = dict(_operators)
+
+        for m in _scanner.finditer(input, self.position):
+            kind = m.lastindex
+            literal = m[kind]
+            tp = types.get(literal)
+            if tp is None:
+                if kind == 1:
+                    tp = types[literal] = lookup_ident(literal)
+                elif kind == 2:
+                    tp = INT
+                else:
+                    tp = ILLEGAL
+            yield Token(tp, literal, m.start(kind))
+
+        self.read_position = len(input)
+        self._read_char()
+        yield Token(token.EOF, "", len(input))
+
+    def token_stream(self):
+        input = self.input
+        lookup_ident = token.lookup_ident
+        CODES = token.CODES
+        INT = CODES[token.INT]
+        ILLEGAL = CODES[token.ILLEGAL]
+        codes = {literal: CODES[tp] for literal, tp in _operators.items()}
+
+        stream = token.TokenStream(input)
+        types = stream.types.append
+        starts = stream.starts.append
+        ends = stream.ends.append
+        for m in _scanner.finditer(input, self.position):
+            kind = m.lastindex
+            literal = m[kind]
+            code = codes.get(literal)
+            if code is None:
+                if kind == 1:
+                    code = codes[literal] = CODES[lookup_ident(literal)]
+                elif kind == 2:
+                    code = INT
+                else:
+                    code = ILLEGAL
+            types(code)
+            starts(m.start(kind))
+            ends(m.end(kind))
+
+        types(CODES[token.EOF])
+        starts(len(input))
+        ends(len(input))
+
+        self.read_position = len(input)
+        self._read_char()
+        return stream
+
+
+class StreamLexer:
+    """Lexes a text or binary stream through a bounded buffer.
+
+    Only the unconsumed tail of the buffer is kept between reads, so memory
+    stays at about one chunk plus the longest token. A match that reaches the
+    end of the buffer may continue in the next chunk (an identifier, a number,
+    "=" before "="), so it is retried after the next read. Binary streams,
+    including mmap objects, are decoded as UTF-8 and offsets count characters.
+    """
+
+    chunk_size = 1 << 16
+
+    def __init__(self, stream, chunk_size=None, close=False):
+        self.stream = stream
+        if chunk_size:
+            self.chunk_size = chunk_size
+        self._close = close
+        self._decoder = None
+        self.buffer = ""
+        self.base = 0
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        while True:
+            data = self.stream.read(self.chunk_size)
+            if not data:
+                self.eof = True
+            if isinstance(data, (bytes, bytearray)):
+                if self._decoder is None:
+                    self._decoder = codecs.getincrementaldecoder("utf-8")()
+                # a chunk ending inside a character decodes to less, maybe
+                # to nothing; the decoder keeps the rest for the next one
+                data = self._decoder.decode(data, self.eof)
+            if data or self.eof:
+                break
+        if self.eof:
+            self.close()
+        self.base += self.pos
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+    def close(self):
+        if self._close:
+            self._close = False
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def line_index(self):
+        return None
+
+    def next_token(self):
+        while True:
+            m = _scanner.match(self.buffer, self.pos)
+            if m is None:
+                # nothing but white space is left in the buffer
+                self.pos = len(self.buffer)
+                if self.eof:
+                    return token.Token(token.EOF, "", self.base + self.pos)
+                self._fill()
+            elif m.end() == len(self.buffer) and not self.eof:
+                self._fill()
+            else:
+                break
+
+        self.pos = m.end()
+        kind = m.lastindex
+        literal = m[kind]
+        if kind == 1:
+            tp = token.lookup_ident(literal)
+        elif kind == 2:
+            tp = token.INT
+        else:
+            tp = _operators.get(literal, token.ILLEGAL)
+        return token.Token(tp, literal, self.base + m.start(kind))
+
+    def iter_tokens(self):
+        while True:
+            tok = self.next_token()
+            yield tok
+            if tok.type == token.EOF:
+                return
+
+    def tokenize(self):
+        return list(self.iter_tokens())
+
+
+def scan(input, pos=0):
+    """Yields (type code, start, end) for each token from pos on, without EOF."""
+    CODES = token.CODES
+    INT = CODES[token.INT]
+    ILLEGAL = CODES[token.ILLEGAL]
+    for m in _scanner.finditer(input, pos):
+        kind = m.lastindex
+        literal = m[kind]
+        if kind == 1:
+            code = CODES[token.lookup_ident(literal)]
+        elif kind == 2:
+            code = INT
+        else:
+            code = CODES[_operators.get(literal, token.ILLEGAL)]
+        yield code, m.start(kind), m.end(kind)
+
 
 def is_letter(ch):
     if ch is None:
@@ -0,0 +1,30 @@
+import bisect
+from array import array
+
+
+class LineIndex:
+    """Maps source offsets to 1-based (line, column) pairs.
+
+    The table of line start offsets is built on the first lookup, so sources
+    that never need a diagnostic never pay for it.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._starts = None
+
+    def _line_starts(self):
+        if self._starts is None:
+            starts = array("l", [0])
+            find = self.source.find
+            i = find("\n")
+            while i != -1:
+                starts.append(i + 1)
+                i = find("\n", i + 1)
+            self._starts = starts
+        return self._starts
+
+    def position(self, offset):
+        starts = self._line_starts()
+        line = bisect.bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
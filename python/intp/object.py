@@ -0,0 +1,195 @@
+INTEGER_OBJ = "INTEGER"
+BOOLEAN_OBJ = "BOOLEAN"
+NULL_OBJ = "NULL"
+RETURN_VALUE_OBJ = "RETURN_VALUE"
+ERROR_OBJ = "ERROR"
+FUNCTION_OBJ = "FUNCTION"
+BUILTIN_OBJ = "BUILTIN"
+ARRAY_OBJ = "ARRAY"
+
+
+class Object:
+    __slots__ = ()
+
+    def type(self):
+        raise NotImplementedError
+
+    def inspect(self):
+        raise NotImplementedError
+
+
+class Integer(Object):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def type(self):
+        return INTEGER_OBJ
+
+    def inspect(self):
+        return str(self.value)
+
+
+class Boolean(Object):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def type(self):
+        return BOOLEAN_OBJ
+
+    def inspect(self):
+        return "true" if self.value else "false"
+
+
+class Null(Object):
+    __slots__ = ()
+
+    def type(self):
+        return NULL_OBJ
+
+    def inspect(self):
+        return "null"
+
+
+class ReturnValue(Object):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def type(self):
+        return RETURN_VALUE_OBJ
+
+    def inspect(self):
+        return self.value.inspect()
+
+
+class Error(Object):
+    __slots__ = ("message",)
+
+    def __init__(self, message):
+        self.message = message
+
+    def type(self):
+        return ERROR_OBJ
+
+    def inspect(self):
+        return "ERROR: " + self.message
+
+
+class Function(Object):
+    """A function value: its literal's parameters and body, the environment
+    (or Frame) it closes over, `code`, whatever the evaluator made of the
+    body, and `memo`, the table of its results if it is memoized."""
+
+    __slots__ = ("parameters", "body", "env", "code", "memo")
+
+    def __init__(self, parameters, body, env, code=None, memo=None):
+        self.parameters = parameters
+        self.body = body
+        self.env = env
+        self.code = code
+        self.memo = memo
+
+    def type(self):
+        return FUNCTION_OBJ
+
+    def inspect(self):
+        params = ", ".join(p.string() for p in self.parameters)
+        return "fn(" + params + ") {\n" + self.body.string() + "\n}"
+
+
+class Builtin(Object):
+    """A function written in Python. fn takes the list of arguments and a
+    function applying a Monkey function to a list of arguments, and returns
+    an object, an Error on failure."""
+
+    __slots__ = ("name", "fn")
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+    def type(self):
+        return BUILTIN_OBJ
+
+    def inspect(self):
+        return "builtin function"
+
+
+class Array(Object):
+    """An array. `elements` is a packed vector (see intp.vectors) while
+    every element is an integer that fits in 64 bits, and a list of
+    objects otherwise."""
+
+    __slots__ = ("elements",)
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    def type(self):
+        return ARRAY_OBJ
+
+    def inspect(self):
+        elements = self.elements
+        if elements.__class__ is list:
+            return "[" + ", ".join(element.inspect() for element in elements) + "]"
+        return "[" + ", ".join(map(str, elements.tolist())) + "]"
+
+
+TRUE = Boolean(True)
+FALSE = Boolean(False)
+NULL = Null()
+
+# Integers are immutable, so the small ones are made once and shared.
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1023
+SMALL_INTS = [Integer(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+
+def integer(value):
+    if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+        return SMALL_INTS[value - SMALL_INT_MIN]
+    return Integer(value)
+
+
+def boolean(value):
+    return TRUE if value else FALSE
+
+
+class Environment:
+    __slots__ = ("store", "outer", "memo_stats")
+
+    def __init__(self, outer=None):
+        self.store = {}
+        self.outer = outer
+        # see intp.evaluator.memo_stats
+        self.memo_stats = None
+
+    def get(self, name):
+        env = self
+        while env is not None:
+            obj = env.store.get(name)
+            if obj is not None:
+                return obj
+            env = env.outer
+        return None
+
+    def set(self, name, val):
+        self.store[name] = val
+        return val
+
+
+class Frame:
+    """The variables of one resolved scope, by slot (see intp.resolver)."""
+
+    __slots__ = ("slots", "outer", "memo_stats")
+
+    def __init__(self, size=0, outer=None):
+        self.slots = [None] * size
+        self.outer = outer
+        # see intp.evaluator.memo_stats
+        self.memo_stats = None
@@ -0,0 +1,243 @@
+import collections
+
+from intp import ast
+from intp import token
+
+INT = "INTEGER"
+BOOL = "BOOLEAN"
+
+FOLD = "fold"
+IDENTITY = "identity"
+DOUBLE_NEGATION = "double negation"
+PROPAGATE = "propagate"
+
+Change = collections.namedtuple("Change", ["offset", "rule", "node"])
+
+
+def optimize(program):
+    """Simplifies a Program in place and returns (program, changes).
+
+    Operators with literal operands are folded, identities such as x * 1,
+    x + 0 and -(-x) are removed when x is known to be an integer (or, for
+    !!x, a boolean), and identifiers bound by let to a literal are replaced
+    by that literal after the binding. Anything that would fail at run time,
+    such as 1 / 0 or 1 + true, is left alone, so the program gives the same
+    result and the same errors. Ifs, functions and calls are left as they
+    are. `changes` lists one Change per rewrite: the offset of the
+    rewritten node, the rule applied and the new node.
+    """
+    return Optimizer().optimize(program)
+
+
+class Optimizer:
+    def __init__(self):
+        self.changes = []
+        # literal values and types of the names bound so far
+        self._constants = {}
+        self._types = {}
+
+    def optimize(self, program):
+        for stmt in program.statements:
+            # a let in the block of an if binds in this scope too, but only
+            # if its branch runs, so nothing is known of its name any more
+            for name in _block_lets(stmt):
+                self._constants.pop(name, None)
+                self._types.pop(name, None)
+            kind = stmt.kind
+            if kind == ast.LET_STATEMENT:
+                name = stmt.name.value
+                stmt.value, value_type = self._expression(stmt.value)
+                if stmt.value is not None and stmt.value.kind in (ast.INTEGER_LITERAL, ast.BOOLEAN):
+                    self._constants[name] = stmt.value.value
+                else:
+                    self._constants.pop(name, None)
+                self._types[name] = value_type
+            elif kind == ast.RETURN_STATEMENT:
+                stmt.return_value, _ = self._expression(stmt.return_value)
+            elif kind == ast.EXPRESSION_STATEMENT:
+                stmt.expression, _ = self._expression(stmt.expression)
+        return program, self.changes
+
+    def _expression(self, root):
+        # Post-order over an explicit stack. Finished nodes leave their
+        # replacement and its type (INT, BOOL or None if unknown) on
+        # `results`, where their parent picks them up.
+        if root is None:
+            return None, None
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            kind = node.kind
+            if kind == ast.INFIX_EXPRESSION:
+                if not expanded:
+                    stack.append((node, True))
+                    if node.right is not None:
+                        stack.append((node.right, False))
+                    if node.left is not None:
+                        stack.append((node.left, False))
+                    continue
+                right = results.pop() if node.right is not None else (None, None)
+                left = results.pop() if node.left is not None else (None, None)
+                node.left, left_type = left
+                node.right, right_type = right
+                results.append(self._infix(node, left_type, right_type))
+            elif kind == ast.PREFIX_EXPRESSION:
+                if not expanded:
+                    stack.append((node, True))
+                    if node.right is not None:
+                        stack.append((node.right, False))
+                    continue
+                node.right, right_type = results.pop() if node.right is not None else (None, None)
+                results.append(self._prefix(node, right_type))
+            elif kind == ast.INTEGER_LITERAL:
+                results.append((node, INT))
+            elif kind == ast.BOOLEAN:
+                results.append((node, BOOL))
+            elif kind == ast.IDENTIFIER:
+                results.append(self._identifier(node))
+            else:
+                results.append((node, None))
+        return results.pop()
+
+    def _identifier(self, node):
+        name = node.value
+        value = self._constants.get(name)
+        if value is None:
+            return node, self._types.get(name)
+        return self._replace(node, PROPAGATE, _literal(value, node.offset))
+
+    def _prefix(self, node, right_type):
+        op = node.operator
+        right = node.right
+        if right is None:
+            return node, None
+        if op == "!":
+            if right.kind == ast.BOOLEAN:
+                return self._replace(node, FOLD, _literal(not right.value, node.offset))
+            if right.kind == ast.INTEGER_LITERAL:
+                return self._replace(node, FOLD, _literal(False, node.offset))
+            if right.kind == ast.PREFIX_EXPRESSION and right.operator == "!" and self._type(right.right) == BOOL:
+                return self._replace(node, DOUBLE_NEGATION, right.right)
+            return node, BOOL
+        if op == "-":
+            if right.kind == ast.INTEGER_LITERAL:
+                return self._replace(node, FOLD, _literal(-right.value, node.offset))
+            if right.kind == ast.PREFIX_EXPRESSION and right.operator == "-" and self._type(right.right) == INT:
+                return self._replace(node, DOUBLE_NEGATION, right.right)
+            return node, INT
+        return node, None
+
+    def _infix(self, node, left_type, right_type):
+        op = node.operator
+        left = node.left
+        right = node.right
+        if left is None or right is None:
+            return node, None
+
+        if op in _arithmetic:
+            if left.kind == ast.INTEGER_LITERAL and right.kind == ast.INTEGER_LITERAL:
+                a = left.value
+                b = right.value
+                if op == "/" and b == 0:
+                    # stays a runtime "division by zero"
+                    return node, INT
+                return self._replace(node, FOLD, _literal(_arithmetic[op](a, b), node.offset))
+            identity = _identities.get(op)
+            if identity is not None:
+                if right_type == INT and left.kind == ast.INTEGER_LITERAL and left.value == identity[0]:
+                    return self._replace(node, IDENTITY, right)
+                if left_type == INT and right.kind == ast.INTEGER_LITERAL and right.value == identity[1]:
+                    return self._replace(node, IDENTITY, left)
+            return node, INT
+
+        if op in _comparisons:
+            literals = (ast.INTEGER_LITERAL, ast.BOOLEAN)
+            if left.kind in literals and right.kind in literals:
+                if left.kind == right.kind:
+                    if op in ("==", "!=") or left.kind == ast.INTEGER_LITERAL:
+                        value = _comparisons[op](left.value, right.value)
+                        return self._replace(node, FOLD, _literal(value, node.offset))
+                elif op in ("==", "!="):
+                    # values of different types are never equal
+                    return self._replace(node, FOLD, _literal(op == "!=", node.offset))
+            return node, BOOL
+
+        return node, None
+
+    def _replace(self, node, rule, new):
+        self.changes.append(Change(node.offset, rule, new))
+        return new, self._type(new)
+
+    def _type(self, node):
+        # An operator's result has one type whatever its operands are, or
+        # else the operator fails.
+        if node is None:
+            return None
+        kind = node.kind
+        if kind == ast.INTEGER_LITERAL:
+            return INT
+        if kind == ast.BOOLEAN:
+            return BOOL
+        if kind == ast.IDENTIFIER:
+            return self._types.get(node.value)
+        if kind == ast.PREFIX_EXPRESSION:
+            return BOOL if node.operator == "!" else INT
+        if kind == ast.INFIX_EXPRESSION:
+            return INT if node.operator in _arithmetic else BOOL
+        return None
+
+
+def _block_lets(stmt):
+    # the names bound by lets nested in stmt, outside function bodies
+    names = []
+    stack = [getattr(stmt, field) for field in stmt.fields]
+    while stack:
+        node = stack.pop()
+        if node is None or node.kind == ast.FUNCTION_LITERAL:
+            continue
+        if node.kind == ast.LET_STATEMENT and node.name is not None:
+            names.append(node.name.value)
+        stack.extend(getattr(node, field) for field in node.fields)
+        for field in node.list_fields:
+            stack.extend(getattr(node, field) or [])
+    return names
+
+
+def _literal(value, offset):
+    if value is True or value is False:
+        literal = "true" if value else "false"
+        return ast.Boolean(token.Token(token.TRUE if value else token.FALSE, literal, offset), value)
+    node = ast.IntegerLiteral(token.Token(token.INT, str(value), offset))
+    node.value = value
+    return node
+
+
+def _divide(a, b):
+    # truncates toward zero, as Monkey division does
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+_arithmetic = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": _divide,
+}
+_comparisons = {
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+# (n, m) such that n op x == x and x op m == x for any integer x; None
+# where no such literal exists on that side
+_identities = {
+    "+": (0, 0),
+    "-": (None, 0),
+    "*": (1, 1),
+    "/": (None, 1),
+}
@@ -0,0 +1,200 @@
+import collections
+import concurrent.futures
+import os
+import re
+
+from intp import arena
+from intp import lexer
+from intp import parser
+
+# a ";" with the operator just before it, if any, or a bracket
+_nesting = re.compile(r"([-+*/<>=!]?)[ \t\n\r]*;|[(){}\[\]]")
+_closing = {"(": ")", "{": "}", "[": "]"}
+_white_space = re.compile(r"[ \t\n\r]*")
+
+
+class FileResult(collections.namedtuple("FileResult", ["path", "data", "errors"])):
+    """The parse of one file.
+
+    `data` is the program in arena.dumps() form (None if the file could not
+    be read) and `errors` the file's own parse errors, or the read error.
+    """
+
+    __slots__ = ()
+
+    def program(self):
+        if self.data is None:
+            return None
+        return arena.loads(self.data)
+
+
+def parse_file(path):
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return FileResult(path, None, [str(e)])
+    p = parser.Parser(lexer.Lexer(source).token_stream())
+    program = p.parse_program()
+    return FileResult(path, arena.dumps(program), p.errors)
+
+
+def _parse_chunk(paths):
+    return [parse_file(path) for path in paths]
+
+
+def _chunks(paths, size):
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_files(paths, jobs=None, chunksize=8, ordered=True):
+    """Parses many files in a pool of worker processes.
+
+    Yields a FileResult per path. Paths are sent to the workers `chunksize`
+    at a time. With ordered=False results come back as soon as their chunk
+    is done instead of in the order of `paths`. jobs defaults to the number
+    of CPUs; with jobs=1 everything runs in this process.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        for path in paths:
+            yield parse_file(path)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        chunks = _chunks(paths, chunksize)
+        if ordered:
+            for results in executor.map(_parse_chunk, chunks):
+                yield from results
+        else:
+            futures = [executor.submit(_parse_chunk, chunk) for chunk in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                yield from future.result()
+
+
+class Splitter:
+    """Finds the offsets at which a source can be cut into independent
+    chunks, fed to it piece by piece as it arrives.
+
+    A cut is made after a ";" outside any ()/{}/[] nesting once the current
+    chunk is at least `size` characters long, at the next character that is
+    not white space. The parser always starts a new top-level statement
+    there, except in two cases, which are skipped: when that character is
+    another ";" (an empty statement consumes one ";" as its terminator), and
+    when the ";" follows an operator, as in "-;" or "a +;". There the ";" is
+    parsed as the missing operand, and the expression goes on with whatever
+    comes next ("-; + 5" is "((-) + 5)"). Once a closing bracket does not
+    match the innermost open one the nesting is unknown and no further cuts
+    are made.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.offset = 0
+        self.open = []
+        self.next_cut = size
+        # whether the last character that was not white space is an
+        # operator, and whether a cut is due at the next one
+        self.operator = False
+        self.pending = False
+        self.broken = False
+
+    def feed(self, text):
+        """Returns the offsets of the cuts found in text, relative to the
+        whole source fed so far."""
+        cuts = []
+        base = self.offset
+        self.offset += len(text)
+        if self.broken:
+            return cuts
+        first = _white_space.match(text).end()
+        if first == len(text):
+            return cuts
+        if self.pending:
+            self.pending = False
+            if text[first] != ";":
+                cuts.append(base + first)
+                self.next_cut = base + first + self.size
+        operator = self.operator
+        self.operator = text.rstrip(" \t\n\r")[-1] in "-+*/<>=!"
+        for m in _nesting.finditer(text):
+            ch = m.group()[-1]
+            if ch == ";":
+                if self.open or base + m.end() < self.next_cut:
+                    continue
+                if m.group(1) or (m.start() == 0 and operator):
+                    continue
+                after = _white_space.match(text, m.end()).end()
+                if after == len(text):
+                    self.pending = True
+                elif text[after] != ";":
+                    cuts.append(base + after)
+                    self.next_cut = base + after + self.size
+            elif ch in _closing:
+                self.open.append(_closing[ch])
+            elif not self.open or self.open.pop() != ch:
+                self.broken = True
+                self.pending = False
+                break
+        return cuts
+
+
+def split_statements(source, size):
+    """Returns offsets at which the source can be cut into independent
+    chunks; see Splitter."""
+    return Splitter(size).feed(source)
+
+
+def _parse_slice(source, base):
+    p = parser.Parser(lexer.Lexer(source).token_stream())
+    program = p.parse_program()
+    error_offsets = [offset if offset is None else offset + base for offset in p.error_offsets]
+    return arena.dumps(program, base), p.errors, error_offsets
+
+
+def parse_source(source, jobs=None, chunks_per_job=4):
+    """Parses one large source in parallel, split at top-level statements.
+
+    The source is cut with split_statements() into about chunks_per_job
+    chunks per worker, the chunks are parsed in worker processes, and the
+    statements are joined into one Program with offsets relative to the
+    whole source. Returns (program, errors, error_offsets), the same as
+    Parser.parse_program() followed by its errors and error_offsets. jobs
+    defaults to the number of CPUs; with jobs=1 the source is parsed in
+    this process without splitting it.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        p = parser.Parser(lexer.Lexer(source).token_stream())
+        return p.parse_program(), p.errors, p.error_offsets
+    size = max(1, len(source) // (jobs * chunks_per_job))
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        return _parse_chunks(source, size, executor.map)
+
+
+def _parse_chunks(source, size, map=map):
+    bounds = [0] + split_statements(source, size) + [len(source)]
+    starts = bounds[:-1]
+    chunks = [source[start:end] for start, end in zip(starts, bounds[1:])]
+
+    program = None
+    errors = []
+    error_offsets = []
+    for data, chunk_errors, chunk_offsets in map(_parse_slice, chunks, starts):
+        chunk = arena.loads(data)
+        if program is None:
+            program = chunk
+        else:
+            program.statements.extend(chunk.statements)
+        errors.extend(chunk_errors)
+        error_offsets.extend(chunk_offsets)
+    return program, errors, error_offsets
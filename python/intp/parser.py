@@ -1,6 +1,11 @@
 from intp import ast
+from intp import lexer
 from intp import token
 
+# Bump whenever the trees or errors produced for a given source change; it is
+# part of the parse cache key.
+VERSION = "4"
+
 LOWEST = 0
 EQUALS = 1
 LESSGREATER = 2
@@ -8,44 +13,38 @@ SUM = 3
 PRODUCT = 4
 PREFIX = 5
 CALL = 6
+INDEX = 7
 
 
 class Parser:
     def __init__(self, lexer):
         self.lexer = lexer
+        self._start()
+
+    def _start(self):
         self.cur_token = None
         self.peek_token = None
         self.errors = []
-        self.prefix_parse_fns = {
-            token.IDENT: self._parse_identifier,
-            token.INT: self._parse_integer_literal,
-            token.BANG: self._parse_prefix_expression,
-            token.MINUS: self._parse_prefix_expression,
-        }
-        self.infix_parse_fns = {
-            token.PLUS: self._parse_infix_expression,
-            token.MINUS: self._parse_infix_expression,
-            token.SLASH: self._parse_infix_expression,
-            token.ASTERISK: self._parse_infix_expression,
-            token.EQ: self._parse_infix_expression,
-            token.NOT_EQ: self._parse_infix_expression,
-            token.LT: self._parse_infix_expression,
-            token.GT: self._parse_infix_expression,
-        }
-        self.precedences = {
-            token.EQ: EQUALS,
-            token.NOT_EQ: EQUALS,
-            token.LT: LESSGREATER,
-            token.GT: LESSGREATER,
-            token.PLUS: SUM,
-            token.MINUS: SUM,
-            token.SLASH: PRODUCT,
-            token.ASTERISK: PRODUCT,
-        }
-
+        self.error_offsets = []
         self._next_token()
         self._next_token()
 
+    def reset(self, source):
+        # A Lexer starts over on the new source; other token sources (a
+        # TokenStream, a StreamLexer) cannot, so one of the same kind is made.
+        if isinstance(self.lexer, lexer.Lexer):
+            self.lexer.reset(source)
+        elif isinstance(self.lexer, token.TokenStream):
+            self.lexer = lexer.Lexer(source).token_stream()
+        else:
+            self.lexer = lexer.Lexer(source)
+        self._start()
+
+    def parse_many(self, sources):
+        for source in sources:
+            self.reset(source)
+            yield self.parse_program(), self.errors
+
     def _next_token(self):
         self.cur_token = self.peek_token
         self.peek_token = self.lexer.next_token()
@@ -65,17 +64,18 @@ class Parser:
         stmt.name = ast.Identifier(self.cur_token, self.cur_token.literal)
         if not self._expect_peek(token.ASSIGN):
             return None
-        while not self._cur_token_is(token.SEMICOLON):
+        self._next_token()
+        stmt.value = self._parse_expression(LOWEST)
+        if self._peek_token_is(token.SEMICOLON):
             self._next_token()
         return stmt
 
     def _parse_return_statement(self):
         stmt = ast.ReturnStatement(self.cur_token)
         self._next_token()
-
-        while not self._cur_token_is(token.SEMICOLON):
+        stmt.return_value = self._parse_expression(LOWEST)
+        if self._peek_token_is(token.SEMICOLON):
             self._next_token()
-
         return stmt
 
     def _parse_expression_statement(self):
@@ -86,19 +86,71 @@ class Parser:
         return stmt
 
     def _parse_expression(self, precedence):
-        prefix = self.prefix_parse_fns[self.cur_token.type]
-        if not prefix:
-            self.errors.append(f"no prefix parse function for %s found" % self.cur_token.type)
-            return None
-        left_exp = prefix()
-        while not self._peek_token_is(token.SEMICOLON) and precedence < self._peek_precedence():
-            infix = self.infix_parse_fns[self.peek_token.type]
-            if not infix:
-                return left_exp
-            self._next_token()
-            left_exp = infix(left_exp)
+        # Prefix and infix operators and parentheses found in the tables are
+        # applied here on an explicit stack instead of through
+        # _parse_prefix_expression, _parse_infix_expression and
+        # _parse_grouped_expression, so long or deeply nested expressions
+        # neither recurse nor hit the recursion limit. The result is the same
+        # tree the recursive functions build. A pending group is kept on the
+        # stack as None.
+        parse_prefix_expression = Parser._parse_prefix_expression
+        parse_infix_expression = Parser._parse_infix_expression
+        parse_grouped_expression = Parser._parse_grouped_expression
+        prefix_parse_fns = self.prefix_parse_fns
+        infix_parse_fns = self.infix_parse_fns
+        precedences = self.precedences
+        pending = []
+        while True:
+            prefix = prefix_parse_fns.get(self.cur_token.type)
+            if prefix is None:
+                self._no_prefix_parse_fn_error(self.cur_token)
+                if not pending:
+                    return None
+                left, precedence = pending.pop()
+                if left is None:
+                    self._expect_peek(token.RPAREN)
+            elif prefix is parse_prefix_expression:
+                expression = ast.PrefixExpression(self.cur_token)
+                expression.operator = self.cur_token.literal
+                pending.append((expression, precedence))
+                precedence = PREFIX
+                self._next_token()
+                continue
+            elif prefix is parse_grouped_expression:
+                pending.append((None, precedence))
+                precedence = LOWEST
+                self._next_token()
+                continue
+            else:
+                left = prefix(self)
 
-        return left_exp
+            while True:
+                peek_type = self.peek_token.type
+                infix = None
+                if peek_type != token.SEMICOLON and precedence < precedences.get(peek_type, LOWEST):
+                    infix = infix_parse_fns.get(peek_type)
+                if infix is None:
+                    if not pending:
+                        return left
+                    exp, precedence = pending.pop()
+                    if exp is None:
+                        if not self._expect_peek(token.RPAREN):
+                            left = None
+                    else:
+                        exp.right = left
+                        left = exp
+                    continue
+
+                self._next_token()
+                if infix is parse_infix_expression:
+                    exp = ast.InfixExpression(self.cur_token)
+                    exp.operator = self.cur_token.literal
+                    exp.left = left
+                    pending.append((exp, precedence))
+                    precedence = precedences.get(peek_type, LOWEST)
+                    self._next_token()
+                    break
+                left = infix(self, left)
 
     def _parse_identifier(self):
         return ast.Identifier(self.cur_token, self.cur_token.literal)
@@ -108,6 +160,9 @@ class Parser:
         lit.value = int(self.cur_token.literal)
         return lit
 
+    def _parse_boolean(self):
+        return ast.Boolean(self.cur_token, self._cur_token_is(token.TRUE))
+
     def _parse_prefix_expression(self):
         expression = ast.PrefixExpression(self.cur_token)
         expression.operator = self.cur_token.literal
@@ -127,6 +182,150 @@ class Parser:
 
         return exp
 
+    def _parse_grouped_expression(self):
+        self._next_token()
+        exp = self._parse_expression(LOWEST)
+        if not self._expect_peek(token.RPAREN):
+            return None
+        return exp
+
+    def _parse_if_expression(self):
+        expression = ast.IfExpression(self.cur_token)
+        if not self._expect_peek(token.LPAREN):
+            return None
+        self._next_token()
+        expression.condition = self._parse_expression(LOWEST)
+        if not self._expect_peek(token.RPAREN):
+            return None
+        if not self._expect_peek(token.LBRACE):
+            return None
+        expression.consequence = self._parse_block_statement()
+
+        if self._peek_token_is(token.ELSE):
+            self._next_token()
+            if not self._expect_peek(token.LBRACE):
+                return None
+            expression.alternative = self._parse_block_statement()
+
+        return expression
+
+    def _parse_block_statement(self):
+        block = ast.BlockStatement(self.cur_token)
+        self._next_token()
+        while not self._cur_token_is(token.RBRACE) and not self._cur_token_is(token.EOF):
+            stmt = self._parse_statement()
+            if stmt:
+                block.statements.append(stmt)
+            self._next_token()
+        return block
+
+    def _parse_function_literal(self):
+        lit = ast.FunctionLiteral(self.cur_token)
+        if not self._expect_peek(token.LPAREN):
+            return None
+        lit.parameters = self._parse_function_parameters()
+        if lit.parameters is None or not self._expect_peek(token.LBRACE):
+            return None
+        lit.body = self._parse_block_statement()
+        return lit
+
+    def _parse_function_parameters(self):
+        identifiers = []
+        if self._peek_token_is(token.RPAREN):
+            self._next_token()
+            return identifiers
+
+        self._next_token()
+        identifiers.append(ast.Identifier(self.cur_token, self.cur_token.literal))
+        while self._peek_token_is(token.COMMA):
+            self._next_token()
+            self._next_token()
+            identifiers.append(ast.Identifier(self.cur_token, self.cur_token.literal))
+
+        if not self._expect_peek(token.RPAREN):
+            return None
+        return identifiers
+
+    def _parse_call_expression(self, function):
+        exp = ast.CallExpression(self.cur_token, function)
+        exp.arguments = self._parse_expression_list(token.RPAREN)
+        # a call with a broken argument is dropped, so lists never hold None
+        if exp.arguments is None or None in exp.arguments:
+            return None
+        return exp
+
+    def _parse_array_literal(self):
+        array = ast.ArrayLiteral(self.cur_token)
+        array.elements = self._parse_expression_list(token.RBRACKET)
+        if array.elements is None or None in array.elements:
+            return None
+        return array
+
+    def _parse_index_expression(self, left):
+        exp = ast.IndexExpression(self.cur_token, left)
+        self._next_token()
+        exp.index = self._parse_expression(LOWEST)
+        if exp.index is None or not self._expect_peek(token.RBRACKET):
+            return None
+        return exp
+
+    def _parse_expression_list(self, end):
+        # the comma-separated expressions up to the `end` token
+        items = []
+        if self._peek_token_is(end):
+            self._next_token()
+            return items
+
+        self._next_token()
+        items.append(self._parse_expression(LOWEST))
+        while self._peek_token_is(token.COMMA):
+            self._next_token()
+            self._next_token()
+            items.append(self._parse_expression(LOWEST))
+
+        if not self._expect_peek(end):
+            return None
+        return items
+
+    # The dispatch tables are shared by all instances and hold plain
+    # functions, which are called with the parser as their first argument.
+    prefix_parse_fns = {
+        token.IDENT: _parse_identifier,
+        token.INT: _parse_integer_literal,
+        token.BANG: _parse_prefix_expression,
+        token.MINUS: _parse_prefix_expression,
+        token.TRUE: _parse_boolean,
+        token.FALSE: _parse_boolean,
+        token.LPAREN: _parse_grouped_expression,
+        token.IF: _parse_if_expression,
+        token.FUNCTION: _parse_function_literal,
+        token.LBRACKET: _parse_array_literal,
+    }
+    infix_parse_fns = {
+        token.PLUS: _parse_infix_expression,
+        token.MINUS: _parse_infix_expression,
+        token.SLASH: _parse_infix_expression,
+        token.ASTERISK: _parse_infix_expression,
+        token.EQ: _parse_infix_expression,
+        token.NOT_EQ: _parse_infix_expression,
+        token.LT: _parse_infix_expression,
+        token.GT: _parse_infix_expression,
+        token.LPAREN: _parse_call_expression,
+        token.LBRACKET: _parse_index_expression,
+    }
+    precedences = {
+        token.EQ: EQUALS,
+        token.NOT_EQ: EQUALS,
+        token.LT: LESSGREATER,
+        token.GT: LESSGREATER,
+        token.PLUS: SUM,
+        token.MINUS: SUM,
+        token.SLASH: PRODUCT,
+        token.ASTERISK: PRODUCT,
+        token.LPAREN: CALL,
+        token.LBRACKET: INDEX,
+    }
+
     def _cur_token_is(self, tp):
         return self.cur_token.type == tp
 
@@ -143,26 +342,71 @@ class Parser:
 
     def _peek_error(self, tp):
         msg = "expected next token to be %s, got %s instead" % (tp, self.peek_token.type)
+        self._error(msg, self.peek_token.offset)
+
+    def _error(self, msg, offset):
         self.errors.append(msg)
+        self.error_offsets.append(offset)
+
+    def diagnostics(self):
+        index = self.lexer.line_index()
+        result = []
+        for msg, offset in zip(self.errors, self.error_offsets):
+            if offset is None:
+                result.append(msg)
+            elif index is None:
+                result.append("offset %d: %s" % (offset, msg))
+            else:
+                line, column = index.position(offset)
+                result.append("%d:%d: %s" % (line, column, msg))
+        return result
+
+    def _no_prefix_parse_fn_error(self, tok):
+        self._error("no prefix parse function for %s found" % tok.type, tok.offset)
 
     def _peek_precedence(self):
-        prec = self.precedences[self.peek_token.type]
-        if prec:
-            return prec
-        return LOWEST
+        return self.precedences.get(self.peek_token.type, LOWEST)
 
     def _cur_precedence(self):
-        prec = self.precedences[self.cur_token.type]
-        if prec:
-            return prec
-        return LOWEST
+        return self.precedences.get(self.cur_token.type, LOWEST)
+
+    def _steps(self):
+        # One step per attempt at a top-level statement: the token it started
+        # at, the statement (None if it failed) and the index of its first
+        # error in self.errors.
+        while self.cur_token.type != token.EOF:
+            start = self.cur_token
+            first_error = len(self.errors)
+            try:
+                stmt = self._parse_statement()
+            except RecursionError:
+                # blocks and calls nest through recursive calls; give up on
+                # the rest of the source rather than on the whole parse
+                self._error("expression nested too deeply", self.cur_token.offset)
+                stmt = None
+                while self.cur_token.type != token.EOF:
+                    self._next_token()
+            yield start, stmt, first_error
+            self._next_token()
+
+    def iter_statements(self):
+        for _, stmt, first_error in self._steps():
+            errors = self.errors[first_error:]
+            if stmt or errors:
+                yield stmt, errors
 
     def parse_program(self):
         program = ast.Program()
-        while self.cur_token.type != token.EOF:
-            stmt = self._parse_statement()
+        for stmt, _ in self.iter_statements():
             if stmt:
                 program.statements.append(stmt)
-            self._next_token()
 
         return program
+
+
+def parse_many(sources):
+    """Parses each source with one reused Lexer and Parser.
+
+    Yields (program, errors) per source.
+    """
+    return Parser(lexer.Lexer("")).parse_many(sources)
@@ -0,0 +1,119 @@
+from intp import ast
+from intp import builtins
+
+# what a parameter is bound to, as far as the analysis knows
+_PARAMETER = object()
+
+
+def pure_functions(program):
+    """Returns the ids of the function literals of a Program that are pure.
+
+    Monkey has no assignment and no side-effecting builtins, so a function
+    can only give different results for the same arguments through the
+    names it captures from enclosing scopes. A literal is pure when every
+    such name is bound exactly once in its scope (counting the lets in
+    blocks, which share the scope) to a constant expression, one of
+    integer and boolean literals and operators, or to a pure function
+    literal. Functions that call each other are pure unless something
+    outside them makes them impure. Capturing a parameter of an enclosing
+    function, or a name the program does not bind, makes a literal impure:
+    its value is unknown here.
+    """
+    return _Analysis(program).pure()
+
+
+class _Scope:
+    __slots__ = ("bindings", "outer")
+
+    def __init__(self, outer=None):
+        # name -> the values bound to it, in order
+        self.bindings = {}
+        self.outer = outer
+
+
+class _Analysis:
+    def __init__(self, program):
+        self.literals = []
+        # id(literal) -> its scope
+        self.scopes = {}
+        # (identifier, scope) for every use of a name
+        self.uses = []
+        top = _Scope()
+        stack = [(stmt, top) for stmt in program.statements]
+        while stack:
+            node, scope = stack.pop()
+            if node is None:
+                continue
+            kind = node.kind
+            if kind == ast.IDENTIFIER:
+                self.uses.append((node, scope))
+                continue
+            if kind == ast.LET_STATEMENT:
+                scope.bindings.setdefault(node.name.value, []).append(node.value)
+                stack.append((node.value, scope))
+                continue
+            if kind == ast.FUNCTION_LITERAL:
+                inner = self.scopes[id(node)] = _Scope(scope)
+                self.literals.append(node)
+                for parameter in node.parameters:
+                    inner.bindings.setdefault(parameter.value, []).append(_PARAMETER)
+                stack.append((node.body, inner))
+                continue
+            for field in node.fields:
+                stack.append((getattr(node, field), scope))
+            for field in node.list_fields:
+                for child in getattr(node, field) or ():
+                    stack.append((child, scope))
+
+    def pure(self):
+        literal_of = {id(self.scopes[id(literal)]): literal for literal in self.literals}
+        impure = set()
+        # id(literal) -> ids of the literals whose purity it depends on
+        depends = {}
+        for identifier, scope in self.uses:
+            name = identifier.value
+            # the literals between the use and the binding capture the name
+            capturing = []
+            while scope is not None and name not in scope.bindings:
+                literal = literal_of.get(id(scope))
+                if literal is not None:
+                    capturing.append(id(literal))
+                scope = scope.outer
+            if not capturing:
+                continue
+            if scope is None and name in builtins.BUILTINS:
+                # the builtins are pure, and the evaluator ends memoization
+                # when a later input binds one of their names
+                continue
+            values = scope.bindings[name] if scope is not None else ()
+            value = values[0] if len(values) == 1 else None
+            if value is None or value is _PARAMETER:
+                impure.update(capturing)
+            elif value.kind == ast.FUNCTION_LITERAL:
+                for key in capturing:
+                    depends.setdefault(key, set()).add(id(value))
+            elif not _constant(value):
+                impure.update(capturing)
+
+        pure = {id(literal) for literal in self.literals} - impure
+        changed = True
+        while changed:
+            changed = False
+            for key in list(pure):
+                if not depends.get(key, set()) <= pure:
+                    pure.discard(key)
+                    changed = True
+        return pure
+
+
+_constant_kinds = frozenset([ast.INTEGER_LITERAL, ast.BOOLEAN, ast.PREFIX_EXPRESSION, ast.INFIX_EXPRESSION])
+
+
+def _constant(root):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is None or node.kind not in _constant_kinds:
+            return False
+        stack.extend(getattr(node, field) for field in node.fields)
+    return True
@@ -1,18 +1,64 @@
+from . import evaluator
 from . import lexer
-from . import token
+from . import object
+from . import parser
+from . import stats
 
 PROMPT = ">> "
+STATS_COMMAND = ":stats"
+
+MONKEY_FACE = r'''            __,__
+   .--.  .-"     "-.  .--.
+  / .. \/  .-. .-.  \/ .. \
+ | |  '|  /   Y   \  |'  | |
+ | \   \  \ > | < /  /   / |
+  \ '- ,\.-"""""""-./, -' /
+   ''-' /_   ^ ^   _\ '-''
+       |  \._   _./  |
+       \   \ '~' /   /
+        '._ '-=-' _.'
+           '-----'
+'''
 
 
 def start():
+    env = object.Environment()
+    last = None
     while True:
         print(PROMPT, end="")
 
-        line = input()
-        l = lexer.Lexer(line)
+        try:
+            line = input()
+        except EOFError:
+            break
+        if line.strip() == STATS_COMMAND:
+            print_stats(last)
+            continue
+        last = line
+        p = parser.Parser(lexer.Lexer(line))
+
+        program = p.parse_program()
+        if p.errors:
+            print_parse_errors(p.errors)
+            continue
+
+        evaluated = evaluator.eval(program, env, tail_calls=True, memoize=True)
+        if evaluated is not None:
+            print(evaluated.inspect())
+
+
+def print_parse_errors(errors):
+    print(MONKEY_FACE, end="")
+    print("Woops! We ran into some monkey business here!")
+    print(" parse errors:")
+    for msg in errors:
+        print("\t" + msg)
+
 
-        while True:
-            tok = l.next_token()
-            if tok.type == token.EOF:
-                break
-            print(tok.type)
+def print_stats(line):
+    # The input is parsed again under intp.stats, so that lines that are
+    # not asked about are parsed without any instrumentation.
+    if line is None:
+        print("no input yet")
+        return
+    print(stats.parse(line)[2].report())
@@ -0,0 +1,134 @@
+import collections
+
+from intp import ast
+from intp import builtins
+
+Location = collections.namedtuple("Location", ["depth", "slot"])
+
+
+class Scope:
+    """The names bound in one lexical scope, each with its slot number."""
+
+    __slots__ = ("names", "outer")
+
+    def __init__(self, outer=None):
+        self.names = {}
+        self.outer = outer
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name):
+        depth = 0
+        scope = self
+        while scope is not None:
+            slot = scope.names.get(name)
+            if slot is not None:
+                return Location(depth, slot)
+            scope = scope.outer
+            depth += 1
+        return None
+
+
+class Resolver:
+    """Resolves every identifier of a program to a (depth, slot) Location.
+
+    Depth counts scopes outward from the one the identifier appears in and
+    slot indexes the names of that scope in order of first binding, so a
+    runtime environment can be a list per scope. The program is one scope,
+    each function literal another, holding its parameters and lets; the
+    blocks of an if share the scope around them, as at run time. A let
+    binds its name after its value is resolved; binding a name again in the
+    same scope reuses its slot. A name bound nowhere may be a builtin,
+    and then has no location. Function bodies are resolved once the
+    enclosing scope is complete, since a function runs only when called and
+    so may use (or recurse through) names bound after it. Uses of unbound
+    names and bindings that shadow a name of an enclosing scope are
+    reported in `errors` and `error_offsets`, as the parser reports its
+    errors. Passing the scope of an earlier Resolver continues from its
+    bindings, as the REPL needs.
+    """
+
+    def __init__(self, scope=None):
+        self.scope = Scope() if scope is None else scope
+        self.locations = {}
+        self.scopes = {}
+        self.errors = []
+        self.error_offsets = []
+        self._functions = collections.deque()
+
+    def location(self, identifier):
+        return self.locations.get(id(identifier))
+
+    def function_scope(self, literal):
+        return self.scopes.get(id(literal))
+
+    def resolve(self, program):
+        for stmt in program.statements:
+            self._resolve(stmt)
+        # bodies may hold more function literals, which are queued in turn
+        functions = self._functions
+        top = self.scope
+        while functions:
+            literal, outer = functions.popleft()
+            self.scope = self.scopes[id(literal)] = Scope(outer)
+            for parameter in literal.parameters:
+                self._declare(parameter)
+            if literal.body is not None:
+                self._resolve(literal.body)
+        self.scope = top
+        return self
+
+    def _declare(self, identifier):
+        name = identifier.value
+        names = self.scope.names
+        slot = names.get(name)
+        if slot is None:
+            outer = self.scope.outer
+            if outer is not None and outer.lookup(name) is not None:
+                self._error("%s shadows a binding of an enclosing scope" % name, identifier.offset)
+            slot = names[name] = len(names)
+        self.locations[id(identifier)] = Location(0, slot)
+
+    def _resolve(self, root):
+        # Nodes are resolved left to right over an explicit stack, so deep
+        # expressions do not recurse. A let pushes its name as a 1-tuple
+        # under its value, to be declared once the value is done.
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if node.__class__ is tuple:
+                self._declare(node[0])
+                continue
+            kind = node.kind
+            if kind == ast.IDENTIFIER:
+                location = self.scope.lookup(node.value)
+                if location is None:
+                    if node.value in builtins.BUILTINS:
+                        continue
+                    self._error("identifier not found: " + node.value, node.offset)
+                else:
+                    self.locations[id(node)] = location
+                continue
+            if kind == ast.LET_STATEMENT:
+                if node.name is not None:
+                    stack.append((node.name,))
+                stack.append(node.value)
+                continue
+            if kind == ast.FUNCTION_LITERAL:
+                self._functions.append((node, self.scope))
+                continue
+            children = [getattr(node, field) for field in node.fields]
+            for field in node.list_fields:
+                children.extend(getattr(node, field) or [])
+            stack.extend(reversed(children))
+
+    def _error(self, msg, offset):
+        self.errors.append(msg)
+        self.error_offsets.append(offset)
+
+
+def resolve(program, scope=None):
+    return Resolver(scope).resolve(program)
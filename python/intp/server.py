@@ -0,0 +1,370 @@
+"""A local evaluation server speaking line-delimited JSON.
+
+Each request is one line holding an object with an "op" of "lex", "parse"
+or "eval", the "source" to work on and optionally an "id", which the
+response repeats, and a "timeout" in seconds (at most the server's). The
+response is one line too:
+
+    {"id": 1, "op": "lex", "source": "let x = 1;"}
+    {"id": 1, "tokens": [["LET", "let"], ["IDENT", "x"], ...]}
+    {"id": 2, "op": "parse", "source": "1 + 2 * 3"}
+    {"id": 2, "program": "(1 + (2 * 3))", "errors": []}
+    {"id": 3, "op": "eval", "source": "let x = 2; x * 3"}
+    {"id": 3, "value": "6", "errors": []}
+
+A request the server cannot serve gets {"id": ..., "error": message}
+instead. Every connection is a session of its own: its evals share one
+environment, as the lines of the REPL do, and see nothing of the others.
+An eval that would bind names once the session has kept max_history
+bytes of such inputs gets the error "session history full" and is not
+run; reconnecting starts a new session.
+
+Run from the python/ directory:
+
+    python -m intp.server [--port 7070 | --unix PATH] [--workers N]
+"""
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+
+from intp import ast
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import token
+
+DEFAULT_TIMEOUT = 5.0
+MAX_PENDING = 64
+MAX_REQUEST = 1024 * 1024
+MAX_HISTORY = 1024 * 1024
+# environments a worker process keeps, for the sessions it ran last
+WORKER_SESSIONS = 64
+# how much longer than a worker's own timer the server waits for it
+_GRACE = 1.0
+# the time a replay of a session's inputs may take: this many times what
+# they took when they were first run, and _GRACE more
+_REPLAY_SLACK = 2.0
+
+TIMEOUT = "timeout"
+HISTORY_FULL = "session history full"
+
+
+class Server:
+    """Runs requests in a pool of `workers` processes (one per CPU by default).
+
+    At most `max_pending` requests are run or waiting for a worker at a
+    time; a connection whose request finds them all taken is not read from
+    until one is free, so a client sending faster than the workers keep up
+    is held back by its own socket buffers. Requests longer than
+    `max_request` bytes close the connection, and one running longer than
+    its timeout is abandoned with a "timeout" error.
+
+    The environment of a session lives in the worker that ran its last
+    eval, tagged with a number the server gives every eval. Any worker can
+    run the next one: if it does not hold the environment the server
+    tagged last, the server sends the session's earlier inputs along and
+    the worker evaluates them again first. Monkey has no side effects, so
+    that rebuilds the same environment. Only the inputs that bind names at
+    the top level are kept for that, up to `max_history` bytes of them, and
+    their replay runs under a timer of its own, set from the time they took
+    the first time, so a long session does not eat into the timeout of the
+    request that needs it.
+    """
+
+    def __init__(
+        self,
+        workers=None,
+        timeout=DEFAULT_TIMEOUT,
+        max_pending=MAX_PENDING,
+        max_request=MAX_REQUEST,
+        max_history=MAX_HISTORY,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.max_request = max_request
+        self.max_history = max_history
+        self._executor = None
+        self._pending = None
+        self._sessions = itertools.count(1)
+        self._tags = itertools.count(1)
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Starts listening on a TCP port, or on the Unix socket at path,
+        and returns the asyncio.Server."""
+        self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        if path is not None:
+            return await asyncio.start_unix_server(self._serve, path, limit=self.max_request)
+        return await asyncio.start_server(self._serve, host, port, limit=self.max_request)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _serve(self, reader, writer):
+        session = _Session(next(self._sessions))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    _send(writer, {"id": None, "error": "request too large"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                async with self._pending:
+                    response = await self._respond(line, session)
+                _send(writer, response)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # the client went away, or the server is shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line, session):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"id": None, "error": "invalid JSON"}
+        if not isinstance(request, dict):
+            return {"id": None, "error": "request must be an object"}
+        id = request.get("id")
+        op = request.get("op")
+        source = request.get("source")
+        if op not in _operations:
+            return {"id": id, "error": "unknown op: %s" % op}
+        if not isinstance(source, str):
+            return {"id": id, "error": "source must be a string"}
+        timeout = request.get("timeout", self.timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            return {"id": id, "error": "timeout must be a positive number"}
+        timeout = min(timeout, self.timeout)
+
+        try:
+            if op == "eval":
+                result = await self._evaluate(session, source, timeout)
+            else:
+                result = await self._run(timeout, _operations[op], source)
+        except asyncio.TimeoutError:
+            result = {"error": TIMEOUT}
+        except concurrent.futures.BrokenExecutor:
+            # a worker died; the next request gets a fresh pool
+            self._executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+            result = {"error": "worker failed"}
+        response = {"id": id}
+        response.update(result)
+        return response
+
+    async def _evaluate(self, session, source, timeout):
+        tag = next(self._tags)
+        room = self.max_history - session.history_bytes
+        args = (_evaluate, session.id, session.tag, tag, source, timeout, room)
+        result = await self._run(timeout, *args)
+        if result is None:
+            # the worker does not have the environment; send the history
+            replay_timeout = _REPLAY_SLACK * session.seconds + _GRACE
+            result = await self._run(timeout + replay_timeout, *args, tuple(session.history), replay_timeout)
+        binds = result.pop("binds", False)
+        seconds = result.pop("seconds", 0.0)
+        if "value" in result and not result["errors"]:
+            session.tag = tag
+            if binds:
+                session.history.append(source)
+                session.history_bytes += len(source)
+                session.seconds += seconds
+        return result
+
+    def _run(self, timeout, fn, *args):
+        loop = asyncio.get_running_loop()
+        return asyncio.wait_for(loop.run_in_executor(self._executor, fn, *args), timeout + _GRACE)
+
+
+class _Session:
+    __slots__ = ("id", "history", "history_bytes", "seconds", "tag")
+
+    def __init__(self, id):
+        self.id = id
+        # the inputs that bound names, their length and the time they took
+        # to evaluate, and the tag of the last eval
+        self.history = []
+        self.history_bytes = 0
+        self.seconds = 0.0
+        self.tag = 0
+
+
+def _send(writer, response):
+    writer.write(json.dumps(response).encode() + b"\n")
+
+
+# What the workers run. Each returns the fields of its response.
+
+
+def _lex(source):
+    l = lexer.Lexer(source)
+    tokens = []
+    while True:
+        tok = l.next_token()
+        if tok.type == token.EOF:
+            return {"tokens": tokens}
+        tokens.append([tok.type, tok.literal])
+
+
+def _parse(source):
+    p = parser.Parser(lexer.Lexer(source))
+    program = p.parse_program()
+    return {"program": program.string(), "errors": p.errors}
+
+
+_operations = {"lex": _lex, "parse": _parse, "eval": None}
+
+# session id -> (tag, Environment), least recently used first
+_environments = collections.OrderedDict()
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _Timeout()
+
+
+def _evaluate(session, base, tag, source, timeout, room, history=None, replay_timeout=None):
+    # Returns None when this worker does not hold the environment tagged
+    # base and no history came to rebuild it from. The result also says
+    # whether the input binds names ("binds") and how long it ran
+    # ("seconds"), for the server to keep in the session's history.
+    entry = _environments.pop(session, None)
+    if entry is not None and entry[0] == base:
+        env = entry[1]
+    elif history is None and base != 0:
+        return None
+    else:
+        env = None
+
+    p = parser.Parser(lexer.Lexer(source))
+    program = p.parse_program()
+    binds = _binds(program)
+    if p.errors or (binds and len(source) > room):
+        if env is not None:
+            _environments[session] = (base, env)
+        if p.errors:
+            return {"value": None, "errors": p.errors}
+        return {"error": HISTORY_FULL}
+
+    # The timer interrupts the evaluation wherever it is, so the
+    # environment of a session that times out is dropped.
+    signal.signal(signal.SIGALRM, _alarm)
+    try:
+        if env is None:
+            env = object.Environment()
+            signal.setitimer(signal.ITIMER_REAL, replay_timeout or timeout)
+            for past in history or ():
+                _eval(parser.Parser(lexer.Lexer(past)).parse_program(), env)
+        start = time.perf_counter()
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        result = _eval(program, env)
+        seconds = time.perf_counter() - start
+    except _Timeout:
+        return {"error": TIMEOUT}
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    _environments[session] = (tag, env)
+    if len(_environments) > WORKER_SESSIONS:
+        _environments.popitem(last=False)
+    return {"value": None if result is None else result.inspect(), "errors": [], "binds": binds, "seconds": seconds}
+
+
+def _binds(program):
+    # whether a program binds names at the top level, which includes the
+    # blocks of its ifs; without that, it leaves the environment as it was
+    stack = list(program.statements)
+    while stack:
+        node = stack.pop()
+        if node is None or node.kind == ast.FUNCTION_LITERAL:
+            continue
+        if node.kind == ast.LET_STATEMENT:
+            return True
+        stack.extend(getattr(node, field) for field in node.fields)
+        for field in node.list_fields:
+            stack.extend(getattr(node, field) or [])
+    return False
+
+
+def _eval(program, env):
+    return evaluator.eval(program, env, tail_calls=True, memoize=True)
+
+
+class Client:
+    """A connection to a Server, sending one request at a time."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=0, path=None):
+        if path is not None:
+            return cls(*await asyncio.open_unix_connection(path))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op, source, **fields):
+        fields.update(id=next(self._ids), op=op, source=source)
+        _send(self.writer, fields)
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(server, host, port, path):
+    listener = await server.start(host, port, path)
+    names = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print("serving on %s with %d workers" % (names, server.workers), flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv):
+    p = argparse.ArgumentParser(prog="intp.server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=7070)
+    p.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    p.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    p.add_argument("--max-history", type=int, default=MAX_HISTORY, help="bytes of binding inputs kept per session")
+    args = p.parse_args(argv[1:])
+    server = Server(args.workers, args.timeout, args.max_pending, max_history=args.max_history)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
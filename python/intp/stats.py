@@ -0,0 +1,126 @@
+import collections
+import time
+
+from intp import ast
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+class Stats:
+    """Counters and timers for one parse.
+
+    tokens counts the tokens the lexer produced by type and nodes the AST
+    nodes built by class name. lex_time is the time spent in next_token and
+    parse_time the rest of parse_program, both in seconds. max_depth is the
+    deepest nesting of expressions in any statement.
+    """
+
+    def __init__(self):
+        self.tokens = collections.Counter()
+        self.nodes = collections.Counter()
+        self.lex_time = 0.0
+        self.parse_time = 0.0
+        self.max_depth = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return {
+            "tokens": dict(self.tokens),
+            "nodes": dict(self.nodes),
+            "lex_time": self.lex_time,
+            "parse_time": self.parse_time,
+            "max_depth": self.max_depth,
+            "errors": self.errors,
+        }
+
+    def report(self):
+        return "\n".join(
+            [
+                "tokens:     %d%s" % (sum(self.tokens.values()), _counts(self.tokens)),
+                "nodes:      %d%s" % (sum(self.nodes.values()), _counts(self.nodes)),
+                "lexing:     %.3f ms" % (self.lex_time * 1000),
+                "parsing:    %.3f ms" % (self.parse_time * 1000),
+                "max depth:  %d" % self.max_depth,
+                "errors:     %d" % self.errors,
+            ]
+        )
+
+
+def _counts(counter):
+    if not counter:
+        return ""
+    return " (%s)" % ", ".join("%s %d" % item for item in counter.most_common())
+
+
+class InstrumentedLexer:
+    """Wraps a lexer, counting and timing the tokens it hands out.
+
+    Only this wrapper pays for the bookkeeping: Lexer and Parser themselves
+    are unchanged, so parsing without it costs nothing extra.
+    """
+
+    def __init__(self, lexer, stats):
+        self.lexer = lexer
+        self.stats = stats
+        self._at_eof = False
+
+    def next_token(self):
+        start = time.perf_counter()
+        tok = self.lexer.next_token()
+        self.stats.lex_time += time.perf_counter() - start
+        # the parser peeks past the end, which repeats EOF; count it once
+        if not self._at_eof:
+            self.stats.tokens[tok.type] += 1
+            self._at_eof = tok.type == token.EOF
+        return tok
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
+
+
+def parse(source, stats=None):
+    """Parses source while recording Stats.
+
+    Returns (program, errors, stats). The tree is counted after parsing, so
+    the walk is not part of parse_time.
+    """
+    if stats is None:
+        stats = Stats()
+    lex_time = stats.lex_time
+    start = time.perf_counter()
+    p = parser.Parser(InstrumentedLexer(lexer.Lexer(source), stats))
+    program = p.parse_program()
+    elapsed = time.perf_counter() - start
+    stats.parse_time += elapsed - (stats.lex_time - lex_time)
+    stats.errors += len(p.errors)
+    count(program, stats)
+    return program, p.errors, stats
+
+
+def count(program, stats):
+    """Adds the nodes and the expression depth of a Program to stats."""
+    nodes = stats.nodes
+    nodes["Program"] += 1
+    max_depth = stats.max_depth
+    # (node, depth), where depth counts the expressions from the statement
+    stack = [(stmt, 0) for stmt in program.statements]
+    while stack:
+        node, depth = stack.pop()
+        nodes[type(node).__name__] += 1
+        if node.kind not in _statements:
+            depth += 1
+            if depth > max_depth:
+                max_depth = depth
+        for field in node.fields:
+            child = getattr(node, field)
+            if child is not None:
+                stack.append((child, depth))
+        for field in node.list_fields:
+            for child in getattr(node, field) or ():
+                stack.append((child, depth))
+    stats.max_depth = max_depth
+    return stats
+
+
+_statements = (ast.LET_STATEMENT, ast.RETURN_STATEMENT, ast.EXPRESSION_STATEMENT, ast.BLOCK_STATEMENT)
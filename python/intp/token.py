@@ -1,7 +1,15 @@
+from array import array
+
+from . import lines
+
+
 class Token:
-    def __init__(self, type, literal):
+    __slots__ = ("type", "literal", "offset")
+
+    def __init__(self, type, literal, offset=None):
         self.type = type
         self.literal = literal
+        self.offset = offset
 
 
 ILLEGAL = "ILLEGAL"
@@ -30,6 +38,8 @@ LPAREN = "("
 RPAREN = ")"
 LBRACE = "{"
 RBRACE = "}"
+LBRACKET = "["
+RBRACKET = "]"
 
 FUNCTION = "FUNCTION"
 LET = "LET"
@@ -39,6 +49,40 @@ IF = "IF"
 ELSE = "ELSE"
 RETURN = "RETURN"
 
+# Small integer codes for token types, used by the compact TokenStream.
+TYPES = [
+    ILLEGAL,
+    EOF,
+    IDENT,
+    INT,
+    ASSIGN,
+    PLUS,
+    MINUS,
+    BANG,
+    ASTERISK,
+    SLASH,
+    LT,
+    GT,
+    EQ,
+    NOT_EQ,
+    COMMA,
+    SEMICOLON,
+    LPAREN,
+    RPAREN,
+    LBRACE,
+    RBRACE,
+    LBRACKET,
+    RBRACKET,
+    FUNCTION,
+    LET,
+    TRUE,
+    FALSE,
+    IF,
+    ELSE,
+    RETURN,
+]
+CODES = {tp: code for code, tp in enumerate(TYPES)}
+
 _keywords = {
     "fn": FUNCTION,
     "let": LET,
@@ -52,3 +96,48 @@ _keywords = {
 
 def lookup_ident(ident):
     return _keywords.get(ident, IDENT)
+
+
+class TokenStream:
+    """Token types as codes plus start/end offsets into the source.
+
+    Literals are sliced from the source only when a token is asked for, so a
+    stream costs a few bytes per token instead of a Token object and a string.
+    The last entry is always EOF.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("l")
+        self.ends = array("l")
+        self.position = 0
+        self._line_index = None
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i):
+        start = self.starts[i]
+        return Token(TYPES[self.types[i]], self.source[start:self.ends[i]], start)
+
+    def __iter__(self):
+        for i in range(len(self.types)):
+            yield self[i]
+
+    def type(self, i):
+        return TYPES[self.types[i]]
+
+    def literal(self, i):
+        return self.source[self.starts[i]:self.ends[i]]
+
+    def line_index(self):
+        if self._line_index is None:
+            self._line_index = lines.LineIndex(self.source)
+        return self._line_index
+
+    def next_token(self):
+        i = self.position
+        if i < len(self.types) - 1:
+            self.position = i + 1
+        return self[i]
@@ -0,0 +1,280 @@
+import ast as py
+import hashlib
+from collections import OrderedDict
+
+from intp import ast
+from intp import compiler
+from intp import formats
+from intp import object
+
+INT = object.INTEGER_OBJ
+BOOL = object.BOOLEAN_OBJ
+# the type of an expression that always fails
+NEVER = "NEVER"
+
+FUNCTION_NAME = "monkey_program"
+CACHE_SIZE = 256
+
+_TOO_DEEP = "expression nested too deeply"
+
+
+class _Failure(Exception):
+    def __init__(self, message):
+        self.message = message
+
+
+def _fail(message, *operands):
+    # The operands were evaluated (in order) before the call; only then does
+    # the operation itself fail.
+    raise _Failure(message)
+
+
+_LOCATION = {"lineno": 1, "col_offset": 0, "end_lineno": 1, "end_col_offset": 0}
+
+
+def _node(cls, *args):
+    # Locations are filled in as the nodes are made, because
+    # ast.fix_missing_locations would recurse over deep trees.
+    return cls(*args, **_LOCATION)
+
+
+def _name(id, ctx=None):
+    return _node(py.Name, id, ctx or py.Load())
+
+
+def _constant(value):
+    return _node(py.Constant, value)
+
+
+def _call(name, *args):
+    return _node(py.Call, _name(name), list(args), [])
+
+
+def _nth(index, *items):
+    # (items...)[index]: evaluates every item in order and keeps one
+    return _node(py.Subscript, _node(py.Tuple, list(items), py.Load()), _constant(index), py.Load())
+
+
+class _Generator:
+    """Turns a Program into the body of one Python function.
+
+    Monkey values become Python values: int for INTEGER and bool for
+    BOOLEAN. Every expression has a type known here, because a program is a
+    straight line of statements, so operand checks are done while generating
+    and only well-typed operations are emitted as plain Python operators.
+    Operations that must fail are emitted as calls to _fail() after their
+    operands, keeping Monkey's order of evaluation and its error messages.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.temps = 0
+
+    def program(self, program):
+        body = []
+        for stmt in program.statements:
+            last = stmt is program.statements[-1]
+            node, value_type = self.statement(stmt, last)
+            body.append(node)
+            if value_type is NEVER or stmt.kind == ast.RETURN_STATEMENT:
+                break
+        else:
+            if not program.statements or program.statements[-1].kind == ast.LET_STATEMENT:
+                body.append(_node(py.Return, _constant(None)))
+        args = py.arguments([], [], None, [], [], None, [])
+        return _node(py.FunctionDef, FUNCTION_NAME, args, body, [], None)
+
+    def statement(self, stmt, last):
+        if stmt.kind == ast.LET_STATEMENT:
+            value, value_type = self.expression(stmt.value)
+            name = stmt.name.value
+            self.types[name] = value_type
+            target = _name(_variable(name), py.Store())
+            return _node(py.Assign, [target], value), value_type
+        if stmt.kind == ast.RETURN_STATEMENT:
+            value, value_type = self.expression(stmt.return_value)
+            return _node(py.Return, value), value_type
+        value, value_type = self.expression(stmt.expression)
+        if last:
+            return _node(py.Return, value), value_type
+        return _node(py.Expr, value), value_type
+
+    def expression(self, node):
+        if node is None:
+            raise compiler.CompileError("missing expression")
+        kind = node.kind
+        if kind == ast.INTEGER_LITERAL:
+            return _constant(node.value), INT
+        if kind == ast.BOOLEAN:
+            return _constant(node.value), BOOL
+        if kind == ast.IDENTIFIER:
+            value_type = self.types.get(node.value)
+            if value_type is None:
+                return _call("_fail", _constant("identifier not found: " + node.value)), NEVER
+            return _name(_variable(node.value)), value_type
+        if kind == ast.PREFIX_EXPRESSION:
+            return self.prefix(node.operator, *self.expression(node.right))
+        if kind == ast.INFIX_EXPRESSION:
+            left, left_type = self.expression(node.left)
+            right, right_type = self.expression(node.right)
+            return self.infix(node.operator, left, left_type, right, right_type)
+        raise compiler.CompileError("cannot transpile %s" % type(node).__name__)
+
+    def prefix(self, op, right, right_type):
+        if right_type is NEVER:
+            return right, NEVER
+        if op == "!":
+            if right_type is BOOL:
+                return _node(py.UnaryOp, py.Not(), right), BOOL
+            # anything but false (and null) is truthy, so !x is false
+            return _nth(1, right, _constant(False)), BOOL
+        if op == "-" and right_type is INT:
+            return _node(py.UnaryOp, py.USub(), right), INT
+        return _call("_fail", _constant("unknown operator: %s%s" % (op, right_type)), right), NEVER
+
+    def infix(self, op, left, left_type, right, right_type):
+        if left_type is NEVER:
+            return left, NEVER
+        if right_type is NEVER:
+            return _nth(1, left, right), NEVER
+
+        if op == "==" or op == "!=":
+            if left_type != right_type:
+                # values of different types are never equal
+                return _nth(2, left, right, _constant(op == "!=")), BOOL
+            return _node(py.Compare, left, [_comparisons[op]()], [right]), BOOL
+        if left_type is INT and right_type is INT:
+            if op == "/":
+                return self.divide(left, right), INT
+            if op in _arithmetic:
+                return _node(py.BinOp, left, _arithmetic[op](), right), INT
+            if op in _comparisons:
+                return _node(py.Compare, left, [_comparisons[op]()], [right]), BOOL
+
+        if left_type != right_type:
+            message = "type mismatch: %s %s %s" % (left_type, op, right_type)
+        else:
+            message = "unknown operator: %s %s %s" % (left_type, op, right_type)
+        return _call("_fail", _constant(message), left, right), NEVER
+
+    def divide(self, left, right):
+        # Monkey truncates toward zero: (q if (q := (a := left) // (b := right))
+        # >= 0 or q * b == a else q + 1). Each division gets its own names,
+        # since its operands may contain divisions too.
+        self.temps += 1
+        a, b, q = ("_%s%d" % (c, self.temps) for c in "abq")
+        floor = _node(
+            py.BinOp,
+            _node(py.NamedExpr, _name(a, py.Store()), left),
+            py.FloorDiv(),
+            _node(py.NamedExpr, _name(b, py.Store()), right),
+        )
+        test = _node(
+            py.BoolOp,
+            py.Or(),
+            [
+                _node(py.Compare, _node(py.NamedExpr, _name(q, py.Store()), floor), [py.GtE()], [_constant(0)]),
+                _node(py.Compare, _node(py.BinOp, _name(q), py.Mult(), _name(b)), [py.Eq()], [_name(a)]),
+            ],
+        )
+        return _node(py.IfExp, test, _name(q), _node(py.BinOp, _name(q), py.Add(), _constant(1)))
+
+
+_arithmetic = {
+    "+": py.Add,
+    "-": py.Sub,
+    "*": py.Mult,
+}
+_comparisons = {
+    "<": py.Lt,
+    ">": py.Gt,
+    "==": py.Eq,
+    "!=": py.NotEq,
+}
+
+
+def _variable(name):
+    # keeps Monkey names apart from Python keywords, builtins and temporaries
+    return "v_" + name
+
+
+def transpile(program):
+    """Returns the Python module (an ast.Module) for a Program.
+
+    It defines one function, FUNCTION_NAME, that runs the program and
+    returns the value of its last expression or return statement as a
+    Python int or bool, or None if there is none.
+    """
+    try:
+        function = _Generator().program(program)
+    except RecursionError:
+        raise compiler.CompileError(_TOO_DEEP) from None
+    return py.Module([function], [])
+
+
+def source(program):
+    """Returns the generated code as Python source, for debugging."""
+    return py.unparse(transpile(program))
+
+
+_cache = OrderedDict()
+
+
+def program_hash(program):
+    # program.string() runs statements together ("1; 2" and "12" give the
+    # same), so the key is the S-expression, which spaces them apart
+    return hashlib.sha256(formats.to_sexpr(program).encode()).hexdigest()
+
+
+def compile_program(program):
+    """Returns the generated function for a Program.
+
+    Functions are cached by program_hash(), which covers everything that
+    affects the generated code, so a hot script is compiled only once.
+    """
+    key = program_hash(program)
+    function = _cache.get(key)
+    if function is not None:
+        _cache.move_to_end(key)
+        return function
+
+    module = transpile(program)
+    try:
+        code = compile(module, "<monkey %s>" % key[:12], "exec")
+    except RecursionError:
+        raise compiler.CompileError(_TOO_DEEP) from None
+    namespace = {"_fail": _fail}
+    exec(code, namespace)
+    function = namespace[FUNCTION_NAME]
+
+    _cache[key] = function
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return function
+
+
+def run(program):
+    """Runs a Program as Python code.
+
+    Returns what evaluator.eval() would: a Monkey object, None if the
+    program ends in a let statement, or an object.Error.
+    """
+    try:
+        value = compile_program(program)()
+    except _Failure as e:
+        return object.Error(e.message)
+    except ZeroDivisionError:
+        return object.Error("division by zero")
+    except compiler.CompileError as e:
+        return object.Error(str(e))
+    return to_object(value)
+
+
+def to_object(value):
+    if value is None:
+        return None
+    if value is True:
+        return object.TRUE
+    if value is False:
+        return object.FALSE
+    return object.integer(value)
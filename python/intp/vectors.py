@@ -0,0 +1,290 @@
+"""Packed storage for integer arrays, and operations on whole vectors.
+
+A vector is a numpy.ndarray of int64 when NumPy is installed and an
+array.array("q") otherwise; an object.Array keeps its elements in one for
+as long as they are all integers that fit in 64 bits. Monkey integers
+have no bounds, so everything here either gives exactly the result the
+evaluator would or returns None, and the caller then goes element by
+element through the evaluator instead.
+"""
+import array
+import itertools
+import operator
+
+from intp import ast
+from intp import object
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+# the most elements range() makes, so one call cannot take all the memory
+MAX_LENGTH = 1 << 25
+
+
+def pack(values):
+    """Returns a vector of a list of ints, or None if one does not fit."""
+    try:
+        if numpy is not None:
+            return numpy.array(values, dtype=numpy.int64)
+        return array.array("q", values)
+    except OverflowError:
+        return None
+
+
+def span(start, stop):
+    """Returns the vector of the ints from start up to stop, or None if
+    they do not fit. The caller keeps stop - start within MAX_LENGTH."""
+    if stop <= start:
+        return pack([])
+    if start < INT64_MIN or stop - 1 > INT64_MAX:
+        return None
+    if numpy is not None:
+        return numpy.arange(start, stop, dtype=numpy.int64)
+    return array.array("q", range(start, stop))
+
+
+def append(vector, value):
+    """Returns a new vector of the elements of vector and value, or None if
+    value does not fit."""
+    if not INT64_MIN <= value <= INT64_MAX:
+        return None
+    if numpy is not None:
+        return numpy.append(vector, numpy.int64(value))
+    vector = array.array("q", vector)
+    vector.append(value)
+    return vector
+
+
+def total(vector):
+    """Returns the sum of a vector as an int."""
+    if numpy is not None and len(vector):
+        # int64 sums wrap around; add in Python when they could
+        bound = max(-int(vector.min()), int(vector.max()))
+        if bound * len(vector) <= INT64_MAX:
+            return int(vector.sum())
+    return sum(vector.tolist())
+
+
+class Kernel:
+    """A Monkey function of one integer that only does arithmetic on it,
+    ready to run outside the evaluator.
+
+    scalar computes it for one int, and vector for a whole NumPy vector at
+    once; bounds takes the bounds of the argument and returns those of the
+    result, or None if some step could leave int64 or divide by zero.
+    boolean is whether the result is a comparison rather than an integer.
+    """
+
+    __slots__ = ("scalar", "vector", "bounds", "boolean")
+
+    def __init__(self, scalar, vector, bounds, boolean):
+        self.scalar = scalar
+        self.vector = vector
+        self.bounds = bounds
+        self.boolean = boolean
+
+
+def kernel(function):
+    """Returns the Kernel of an object.Function, or None if it is not one
+    parameter and a body of a single expression built from that parameter,
+    integer literals, unary minus and + - * /, with at most one of
+    < > == != on top."""
+    if function.__class__ is not object.Function or len(function.parameters) != 1:
+        return None
+    body = function.body
+    if body is None or len(body.statements) != 1:
+        return None
+    stmt = body.statements[0]
+    if stmt.kind == ast.EXPRESSION_STATEMENT:
+        expression = stmt.expression
+    elif stmt.kind == ast.RETURN_STATEMENT:
+        expression = stmt.return_value
+    else:
+        return None
+    if expression is None:
+        return None
+    name = function.parameters[0].value
+    try:
+        if expression.kind == ast.INFIX_EXPRESSION and expression.operator in _comparisons:
+            left = _term(expression.left, name)
+            right = _term(expression.right, name)
+            if left is None or right is None:
+                return None
+            return _comparison(_comparisons[expression.operator], left, right)
+        term = _term(expression, name)
+    except RecursionError:
+        return None
+    if term is None:
+        return None
+    return Kernel(term[0], term[1], term[2], False)
+
+
+def _term(node, name):
+    # (scalar, vector, bounds) of an arithmetic expression, or None
+    if node is None:
+        return None
+    kind = node.kind
+    if kind == ast.IDENTIFIER:
+        if node.value != name:
+            return None
+        return (_identity, _identity, _same_bounds)
+    if kind == ast.INTEGER_LITERAL:
+        value = node.value
+        if not INT64_MIN <= value <= INT64_MAX:
+            return None
+        return (lambda x: value, lambda v: value, lambda lo, hi: (value, value))
+    if kind == ast.PREFIX_EXPRESSION and node.operator == "-":
+        right = _term(node.right, name)
+        if right is None:
+            return None
+        scalar, vector, bounds = right
+
+        def negated_bounds(lo, hi):
+            b = bounds(lo, hi)
+            return b and _checked(-b[1], -b[0])
+
+        return (lambda x: -scalar(x), lambda v: -vector(v), negated_bounds)
+    if kind == ast.INFIX_EXPRESSION and node.operator in _arithmetic:
+        left = _term(node.left, name)
+        right = _term(node.right, name)
+        if left is None or right is None:
+            return None
+        return _arithmetic[node.operator](left, right)
+    return None
+
+
+def _identity(x):
+    return x
+
+
+def _same_bounds(lo, hi):
+    return lo, hi
+
+
+def _checked(lo, hi):
+    if lo < INT64_MIN or hi > INT64_MAX:
+        return None
+    return lo, hi
+
+
+def _combined(op, left, right):
+    # bounds of op over two intervals, from their corners
+    def bounds(lo, hi):
+        a = left(lo, hi)
+        b = right(lo, hi)
+        if a is None or b is None:
+            return None
+        if op is _divide and b[0] <= 0 <= b[1]:
+            return None
+        corners = [op(x, y) for x in a for y in b]
+        return _checked(min(corners), max(corners))
+
+    return bounds
+
+
+def _binary(op, vector_op):
+    def make(left, right):
+        ls, lv, lb = left
+        rs, rv, rb = right
+        return (
+            lambda x: op(ls(x), rs(x)),
+            lambda v: vector_op(lv(v), rv(v)),
+            _combined(op, lb, rb),
+        )
+
+    return make
+
+
+def _divide(a, b):
+    # truncating toward zero, as the evaluator does; a zero b raises
+    # ZeroDivisionError, which sends the caller back to the evaluator
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+def _vector_divide(a, b):
+    q = numpy.floor_divide(a, b)
+    return q + ((q < 0) & (q * b != a))
+
+
+_arithmetic = {
+    "+": _binary(operator.add, operator.add),
+    "-": _binary(operator.sub, operator.sub),
+    "*": _binary(operator.mul, operator.mul),
+    "/": _binary(_divide, _vector_divide),
+}
+_comparisons = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _comparison(op, left, right):
+    ls, lv, lb = left
+    rs, rv, rb = right
+
+    def bounds(lo, hi):
+        if lb(lo, hi) is None or rb(lo, hi) is None:
+            return None
+        return 0, 1
+
+    return Kernel(lambda x: op(ls(x), rs(x)), lambda v: op(lv(v), rv(v)), bounds, True)
+
+
+def _run(k, vector):
+    # The results of k over a vector: a NumPy array if it could be done
+    # at once, else a list of ints or bools, or None on a division by zero.
+    if numpy is not None and len(vector):
+        if k.bounds(int(vector.min()), int(vector.max())) is not None:
+            result = k.vector(vector)
+            if not isinstance(result, numpy.ndarray):
+                # the function did not use its parameter
+                result = numpy.full(len(vector), result)
+            return result
+    try:
+        return list(map(k.scalar, vector.tolist()))
+    except ZeroDivisionError:
+        return None
+
+
+def map_vector(k, vector):
+    """Returns the elements of the Array that k makes of each element of
+    vector: a vector, or a list of objects if they are booleans or do not
+    fit. None means the evaluator has to do it."""
+    results = _run(k, vector)
+    if results is None:
+        return None
+    if k.boolean:
+        return [object.TRUE if result else object.FALSE for result in _as_list(results)]
+    if results.__class__ is not list:
+        return results
+    packed = pack(results)
+    if packed is None:
+        return [object.integer(result) for result in results]
+    return packed
+
+
+def filter_vector(k, vector):
+    """Returns the vector of the elements of vector for which k is truthy,
+    or None if the evaluator has to do it."""
+    results = _run(k, vector)
+    if results is None:
+        return None
+    if not k.boolean:
+        # every integer is truthy
+        return vector.copy() if numpy is not None else array.array("q", vector)
+    if numpy is not None:
+        return vector[numpy.asarray(results, dtype=bool)]
+    return array.array("q", itertools.compress(vector, results))
+
+
+def _as_list(results):
+    return results if results.__class__ is list else results.tolist()
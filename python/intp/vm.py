@@ -0,0 +1,185 @@
+from intp import code
+from intp import object
+
+STACK_SIZE = 2048
+GLOBALS_SIZE = 65536
+
+
+class VMError(Exception):
+    pass
+
+
+def _binary_error(op, left, right):
+    name = _operator_names[op]
+    if left.type() != right.type():
+        return VMError("type mismatch: %s %s %s" % (left.type(), name, right.type()))
+    return VMError("unknown operator: %s %s %s" % (left.type(), name, right.type()))
+
+
+_operator_names = {
+    code.OP_ADD: "+",
+    code.OP_SUB: "-",
+    code.OP_MUL: "*",
+    code.OP_DIV: "/",
+    code.OP_GREATER_THAN: ">",
+    code.OP_LESS_THAN: "<",
+}
+
+
+class VM:
+    """Runs the bytecode of a Compiler on a preallocated value stack.
+
+    `sp` points at the next free slot, so after an OpPop the popped value is
+    still at stack[sp]; last_popped_stack_elem() reads it from there. Pass
+    the globals of an earlier VM to keep them, as the REPL needs.
+    """
+
+    def __init__(self, bytecode, globals=None):
+        self.constants = bytecode.constants
+        self.instructions = bytecode.instructions
+        self.stack = [None] * STACK_SIZE
+        self.sp = 0
+        self.globals = [None] * GLOBALS_SIZE if globals is None else globals
+
+    def stack_top(self):
+        if self.sp == 0:
+            return None
+        return self.stack[self.sp - 1]
+
+    def last_popped_stack_elem(self):
+        return self.stack[self.sp]
+
+    def run(self):
+        # Everything the loop touches is held in locals, the opcodes are
+        # tested roughly most common first, and arithmetic results are looked
+        # up in the small integer cache inline.
+        ins = self.instructions
+        end = len(ins)
+        constants = self.constants
+        stack = self.stack
+        globals = self.globals
+        Integer = object.Integer
+        integer = object.integer
+        small_ints = object.SMALL_INTS
+        SMALL_INT_MIN = object.SMALL_INT_MIN
+        SMALL_INT_MAX = object.SMALL_INT_MAX
+        TRUE = object.TRUE
+        FALSE = object.FALSE
+        NULL = object.NULL
+        OP_CONSTANT = code.OP_CONSTANT
+        OP_GET_GLOBAL = code.OP_GET_GLOBAL
+        OP_SET_GLOBAL = code.OP_SET_GLOBAL
+        OP_POP = code.OP_POP
+        OP_ADD = code.OP_ADD
+        OP_SUB = code.OP_SUB
+        OP_MUL = code.OP_MUL
+        OP_DIV = code.OP_DIV
+        OP_TRUE = code.OP_TRUE
+        OP_FALSE = code.OP_FALSE
+        OP_EQUAL = code.OP_EQUAL
+        OP_NOT_EQUAL = code.OP_NOT_EQUAL
+        OP_GREATER_THAN = code.OP_GREATER_THAN
+        OP_LESS_THAN = code.OP_LESS_THAN
+        OP_MINUS = code.OP_MINUS
+        OP_BANG = code.OP_BANG
+        OP_RETURN_VALUE = code.OP_RETURN_VALUE
+
+        sp = 0
+        ip = 0
+        try:
+            while ip < end:
+                op = ins[ip]
+                if op == OP_CONSTANT:
+                    stack[sp] = constants[(ins[ip + 1] << 8) | ins[ip + 2]]
+                    sp += 1
+                    ip += 3
+                elif op <= OP_DIV:  # OP_ADD to OP_DIV
+                    sp -= 1
+                    right = stack[sp]
+                    left = stack[sp - 1]
+                    if left.__class__ is not Integer or right.__class__ is not Integer:
+                        raise _binary_error(op, left, right)
+                    if op == OP_MUL:
+                        value = left.value * right.value
+                    elif op == OP_ADD:
+                        value = left.value + right.value
+                    elif op == OP_SUB:
+                        value = left.value - right.value
+                    else:
+                        a = left.value
+                        b = right.value
+                        if b == 0:
+                            raise VMError("division by zero")
+                        # truncate toward zero, as Monkey (and Go) do
+                        value = a // b
+                        if value < 0 and value * b != a:
+                            value += 1
+                    if SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+                        stack[sp - 1] = small_ints[value - SMALL_INT_MIN]
+                    else:
+                        stack[sp - 1] = Integer(value)
+                    ip += 1
+                elif op == OP_GET_GLOBAL:
+                    stack[sp] = globals[(ins[ip + 1] << 8) | ins[ip + 2]]
+                    sp += 1
+                    ip += 3
+                elif op == OP_SET_GLOBAL:
+                    sp -= 1
+                    globals[(ins[ip + 1] << 8) | ins[ip + 2]] = stack[sp]
+                    ip += 3
+                elif op <= OP_LESS_THAN:  # OP_EQUAL to OP_LESS_THAN
+                    sp -= 1
+                    right = stack[sp]
+                    left = stack[sp - 1]
+                    if left.__class__ is Integer and right.__class__ is Integer:
+                        a = left.value
+                        b = right.value
+                        if op == OP_EQUAL:
+                            result = a == b
+                        elif op == OP_NOT_EQUAL:
+                            result = a != b
+                        elif op == OP_GREATER_THAN:
+                            result = a > b
+                        else:
+                            result = a < b
+                    elif op == OP_EQUAL:
+                        result = left is right
+                    elif op == OP_NOT_EQUAL:
+                        result = left is not right
+                    else:
+                        raise _binary_error(op, left, right)
+                    stack[sp - 1] = TRUE if result else FALSE
+                    ip += 1
+                elif op == OP_MINUS:
+                    operand = stack[sp - 1]
+                    if operand.__class__ is not Integer:
+                        raise VMError("unknown operator: -" + operand.type())
+                    stack[sp - 1] = integer(-operand.value)
+                    ip += 1
+                elif op == OP_BANG:
+                    operand = stack[sp - 1]
+                    stack[sp - 1] = TRUE if operand is FALSE or operand is NULL else FALSE
+                    ip += 1
+                elif op == OP_TRUE:
+                    stack[sp] = TRUE
+                    sp += 1
+                    ip += 1
+                elif op == OP_FALSE:
+                    stack[sp] = FALSE
+                    sp += 1
+                    ip += 1
+                elif op == OP_POP:
+                    sp -= 1
+                    ip += 1
+                elif op == OP_RETURN_VALUE:
+                    # leaves the value where last_popped_stack_elem() looks
+                    sp -= 1
+                    break
+                else:
+                    raise VMError("opcode %d undefined" % op)
+        except IndexError:
+            if sp >= len(stack):
+                raise VMError("stack overflow") from None
+            raise VMError("invalid instruction at %d" % ip) from None
+        finally:
+            self.sp = sp
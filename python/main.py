@@ -1,8 +1,6 @@
-import os
-from intp import repl
+import sys
+
+from intp import cli
 
 if __name__ == "__main__":
-    user = os.getlogin()
-    print(f"Hello {user}! This is the Monkey programming language!")
-    print("Feel free to type in commands")
-    repl.start()
+    sys.exit(cli.main(sys.argv))
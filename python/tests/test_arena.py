@@ -0,0 +1,67 @@
+import unittest
+from intp import arena
+from intp import ast
+from intp import lexer
+from intp import parser
+from intp import token
+
+
+class TestArena(unittest.TestCase):
+    def test_round_trip(self):
+        input = """
+        let x = 5;
+        let y = 10;
+        -a * b + !c;
+        a + b * c - d / e == 3 < 4;
+        """
+        program = parser.Parser(lexer.Lexer(input)).parse_program()
+
+        a = arena.to_arena(program)
+        self.assertEqual(len(a.roots), 4)
+        self.assertEqual(a.kinds[a.roots[0]], ast.LET_STATEMENT)
+        self.assertEqual(a.kinds[a.roots[2]], ast.EXPRESSION_STATEMENT)
+
+        restored = arena.from_arena(a)
+        self.assertEqual(restored.string(), program.string())
+        for before, after in zip(program.statements, restored.statements):
+            self.assertIs(type(after), type(before))
+            self.assertEqual(after.offset, before.offset)
+        exp = restored.statements[2].expression
+        self.assertEqual(exp.operator, "+")
+        self.assertEqual(exp.left.right.value, "b")
+        self.assertEqual(restored.statements[0].name.value, "x")
+
+    def test_functions_and_calls(self):
+        input = "let f = fn(x, y) { if (x < y) { return x; } else { y } }; f(1, f(2, 3)); fn() {}();"
+        program = parser.Parser(lexer.Lexer(input)).parse_program()
+        restored = arena.loads(arena.dumps(program))
+        self.assertEqual(restored.string(), program.string())
+        literal = restored.statements[0].value
+        self.assertEqual([param.value for param in literal.parameters], ["x", "y"])
+        self.assertIsInstance(literal.body.statements[0].expression, ast.IfExpression)
+        self.assertEqual(restored.statements[1].expression.arguments[1].offset, 64)
+        self.assertEqual(restored.statements[2].expression.arguments, [])
+
+    def test_scalar_values_are_kept(self):
+        program = ast.Program()
+        statement = ast.LetStatement(token.Token(token.LET, "let"))
+        statement.name = ast.Identifier(token.Token(token.IDENT, "myVar"), "myVar")
+        statement.value = ast.Identifier(token.Token(token.IDENT, "anotherVar"), "anothervar")
+        program.statements = [statement]
+
+        restored = arena.from_arena(arena.to_arena(program))
+        self.assertEqual(restored.string(), "let myVar = anothervar;")
+        self.assertIsNone(restored.statements[0].offset)
+
+    def test_dumps_loads(self):
+        input = "let x = 5; -a * b + !c; 1 == 2 != 3;"
+        program = parser.Parser(lexer.Lexer(input)).parse_program()
+
+        data = arena.dumps(program)
+        self.assertIsInstance(data, bytes)
+        restored = arena.loads(data)
+        self.assertEqual(restored.string(), program.string())
+        self.assertEqual(
+            [stmt.offset for stmt in restored.statements],
+            [stmt.offset for stmt in program.statements],
+        )
@@ -13,3 +13,24 @@ class TestString(unittest.TestCase):
         program.statements = [statement]
 
         self.assertEqual(program.string(), "let myVar = anothervar;")
+
+    def test_return_statement_string(self):
+        statement = ast.ReturnStatement(token.Token(token.RETURN, "return"))
+        statement.return_value = ast.Identifier(token.Token(token.IDENT, "x"), "x")
+        self.assertEqual(statement.string(), "return x;")
+
+    def test_deep_string(self):
+        depth = 50000
+        exp = ast.Identifier(token.Token(token.IDENT, "x"), "x")
+        for _ in range(depth):
+            prefix = ast.PrefixExpression(token.Token(token.MINUS, "-"))
+            prefix.operator = "-"
+            prefix.right = exp
+            exp = prefix
+
+        self.assertEqual(exp.string(), "(-" * depth + "x" + ")" * depth)
+
+    def test_nodes_have_no_dict(self):
+        node = ast.Identifier(token.Token(token.IDENT, "x"), "x")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(node.kind, ast.IDENTIFIER)
@@ -0,0 +1,58 @@
+import unittest
+from benchmarks import corpus
+from benchmarks import suite
+from intp import lexer
+from intp import parser
+
+
+class TestCorpus(unittest.TestCase):
+    def test_generate(self):
+        source = corpus.generate(50, depth=4, seed=3)
+        self.assertEqual(source, corpus.generate(50, depth=4, seed=3))
+        self.assertNotEqual(source, corpus.generate(50, depth=4, seed=4))
+
+        p = parser.Parser(lexer.Lexer(source))
+        program = p.parse_program()
+        self.assertEqual(p.errors, [])
+        self.assertEqual(len(program.statements), 50)
+        for line in source.splitlines():
+            self.assertGreaterEqual(line.count("("), 4, line)
+
+    def test_operator_mix(self):
+        source = corpus.generate(20, depth=1, operators={"*": 1}, prefix_rate=0)
+        self.assertIn("*", source)
+        for op in "+-/<>!":
+            self.assertNotIn(op, source)
+        self.assertNotIn("==", source)
+
+
+class TestSuite(unittest.TestCase):
+    def test_run_suite(self):
+        results = suite.run_suite(statements=50, repeat=1, scenarios=["lexer", "string"])
+        self.assertEqual(
+            sorted(results),
+            ["lexer/deep", "lexer/flat", "lexer/nested", "string/deep", "string/flat", "string/nested"],
+        )
+        flat = results["lexer/flat"]
+        self.assertEqual(flat["statements"], 50)
+        self.assertGreater(flat["tokens_per_sec"], 0)
+        self.assertGreater(flat["peak_bytes"], 0)
+
+    def test_compare(self):
+        baseline = {
+            "lexer/flat": {"tokens_per_sec": 1000.0, "statements_per_sec": 10.0, "peak_bytes": 100},
+            "parser/flat": {"tokens_per_sec": 1000.0, "statements_per_sec": 10.0, "peak_bytes": 100},
+        }
+        results = {
+            "lexer/flat": {"tokens_per_sec": 950.0, "statements_per_sec": 1.0, "peak_bytes": 105},
+            "parser/flat": {"tokens_per_sec": 1000.0, "statements_per_sec": 8.0, "peak_bytes": 200},
+            "string/flat": {"tokens_per_sec": 1.0, "statements_per_sec": 1.0, "peak_bytes": 1},
+        }
+        self.assertEqual(
+            suite.compare(results, baseline, threshold=0.1),
+            [
+                "parser/flat: statements_per_sec 10 -> 8 (-20.0%)",
+                "parser/flat: peak_bytes 100 -> 200 (+100.0%)",
+            ],
+        )
+        self.assertEqual(suite.compare(results, baseline, threshold=1.5), [])
@@ -0,0 +1,101 @@
+import marshal
+import os
+import tempfile
+import unittest
+from intp import cache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_hits_and_misses(self):
+        c = cache.ParseCache(self.tmp.name)
+
+        program, errors, error_offsets = c.parse("let x = 5; a + b * c;")
+        self.assertEqual(program.string(), "let x = 5;(a + (b * c))")
+        self.assertEqual((errors, error_offsets), ([], []))
+        self.assertEqual(c.stats()["misses"], 1)
+
+        program, _, _ = c.parse("let x = 5; a + b * c;")
+        self.assertEqual(program.string(), "let x = 5;(a + (b * c))")
+        self.assertEqual(c.memory_hits, 1)
+
+        other = cache.ParseCache(self.tmp.name)
+        program, _, _ = other.parse("let x = 5; a + b * c;")
+        self.assertEqual(program.statements[1].offset, 11)
+        self.assertEqual(other.disk_hits, 1)
+        self.assertEqual(other.misses, 0)
+
+    def test_errors_are_cached(self):
+        c = cache.ParseCache(self.tmp.name, memory_entries=0)
+        _, errors, error_offsets = c.parse("let 5;")
+        _, cached, cached_offsets = c.parse("let 5;")
+        self.assertEqual(cached, errors)
+        self.assertEqual(len(cached), 1)
+        self.assertEqual(cached_offsets, error_offsets)
+        self.assertEqual(cached_offsets, [4])
+        self.assertEqual(c.disk_hits, 1)
+
+    def test_damaged_entry_is_reparsed(self):
+        c = cache.ParseCache(self.tmp.name, memory_entries=0)
+        c.parse("1 + 2;")
+        with open(os.path.join(self.tmp.name, c.key("1 + 2;") + cache.SUFFIX), "wb") as f:
+            f.write(b"garbage")
+
+        program, _, _ = c.parse("1 + 2;")
+        self.assertEqual(program.string(), "(1 + 2)")
+        self.assertEqual(c.misses, 2)
+
+    def test_entry_that_makes_no_tree_is_reparsed(self):
+        c = cache.ParseCache(self.tmp.name, memory_entries=0)
+        c.parse("1 + 2;")
+        path = os.path.join(self.tmp.name, c.key("1 + 2;") + cache.SUFFIX)
+        with open(path, "rb") as f:
+            (format, columns, constants), errors, error_offsets = marshal.loads(f.read())
+        kinds = columns[0][0], b"\xff" * len(columns[0][1])
+        damaged = [
+            ((format, columns, []), errors, error_offsets),
+            ((format, [kinds] + list(columns[1:]), constants), errors, error_offsets),
+            ((format, columns, constants), errors),
+            ((format, columns, constants), ["an error"], []),
+        ]
+        for i, entry in enumerate(damaged):
+            with open(path, "wb") as f:
+                f.write(marshal.dumps(entry))
+            program, _, _ = c.parse("1 + 2;")
+            self.assertEqual(program.string(), "(1 + 2)")
+            self.assertEqual(c.misses, 2 + i)
+
+    def test_disk_bytes(self):
+        c = cache.ParseCache(self.tmp.name, memory_entries=0)
+        c.parse("1;")
+        c.parse("22;")
+        key = c.key("1;")
+        # an entry written again replaces the old one
+        c._write(key, b"x" * 100)
+        c._write(key, b"x" * 10)
+        self.assertEqual(c._disk_bytes, c._disk_usage())
+
+    def test_lru_eviction(self):
+        c = cache.ParseCache(self.tmp.name, max_bytes=1, memory_entries=0)
+        c.parse("1;")
+        c.parse("2;")
+
+        files = [name for name in os.listdir(self.tmp.name) if name.endswith(cache.SUFFIX)]
+        self.assertEqual(files, [])
+        self.assertEqual(c.evictions, 2)
+
+        c = cache.ParseCache(self.tmp.name, max_bytes=10**6, memory_entries=0)
+        sources = ["%d;" % i for i in range(3)]
+        for i, source in enumerate(sources):
+            c.parse(source)
+            path = os.path.join(self.tmp.name, c.key(source) + cache.SUFFIX)
+            os.utime(path, (i, i))
+        size = os.path.getsize(path)
+
+        c.max_bytes = size * 2
+        c.parse("3;")
+        remaining = {name for name in os.listdir(self.tmp.name) if name.endswith(cache.SUFFIX)}
+        self.assertEqual(remaining, {c.key(s) + cache.SUFFIX for s in ["2;", "3;"]})
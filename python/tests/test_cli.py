@@ -0,0 +1,112 @@
+import io
+import marshal
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from intp import arena
+from intp import cli
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def intp(*args, input=""):
+    return subprocess.run([sys.executable, MAIN] + list(args), input=input, capture_output=True, text=True)
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, source):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_run_file(self):
+        good = self.write("good.monkey", "let f = fn(n) { n * 2 };\nf(21)")
+        self.assertEqual(cli.run_file(good), (cli.EXIT_OK, "42\n", [], None))
+        bad = self.write("bad.monkey", "let a = 1;\nlet = 2;")
+        output = cli.run_file(bad)
+        self.assertEqual(output.code, cli.EXIT_PARSE_ERRORS)
+        self.assertEqual(output.err[0], bad + ":2:5: expected next token to be IDENT, got = instead")
+        failing = self.write("failing.monkey", "1 + true")
+        self.assertEqual(cli.run_file(failing).err, [failing + ": ERROR: type mismatch: INTEGER + BOOLEAN"])
+        self.assertEqual(cli.run_file(self.write("let.monkey", "let a = 1;")).out, "")
+        missing = cli.run_file(os.path.join(self.tmp.name, "missing.monkey"))
+        self.assertEqual(missing.code, cli.EXIT_USAGE)
+
+        output = cli.run_file(good, timed=True)
+        self.assertEqual(list(output.times), ["read", "lex", "parse", "eval"])
+
+    def test_parse_file(self):
+        path = self.write("a.monkey", "let x = 1 + 2;\nx")
+        self.assertEqual(cli.parse_file(path).out, "(let x (+ 1 2))\nx\n")
+        self.assertEqual(cli.parse_file(path, "json").out.count("\n"), 2)
+        data = cli.parse_file(path, "binary").out
+        self.assertEqual(arena.loads(data).string(), "let x = (1 + 2);x")
+
+    def test_commands(self):
+        a = self.write("a.monkey", "let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(25)")
+        b = self.write("b.monkey", "let = 1;")
+        c = self.write("c.monkey", "2 * 3")
+        result = intp("run", a, b, c, "--jobs", "2")
+        self.assertEqual(result.returncode, cli.EXIT_PARSE_ERRORS)
+        self.assertEqual(result.stdout, "75025\n6\n")
+        self.assertIn(b + ":1:5:", result.stderr)
+
+        result = intp("run", "--time", input="let x = 2;\nx * x")
+        self.assertEqual((result.returncode, result.stdout), (0, "4\n"))
+        self.assertTrue(result.stderr.startswith("<stdin>: read "), result.stderr)
+        self.assertEqual(intp("run", input="-true").returncode, cli.EXIT_RUNTIME_ERROR)
+
+        result = intp("parse", input="let x = 1;\nlet f = fn(a) {\n  a;\n};\nf(x\n")
+        self.assertEqual(result.returncode, cli.EXIT_PARSE_ERRORS)
+        # the broken call is left out of the tree
+        self.assertEqual(result.stdout, "(let x 1)\n(let f (fn (a) (do a)))\nnil\n")
+        self.assertEqual(result.stderr, "<stdin>:6:1: expected next token to be ), got EOF instead\n")
+
+        result = subprocess.run([sys.executable, MAIN, "parse", "--format", "binary", a, c], capture_output=True)
+        self.assertEqual(result.returncode, 0)
+        f = io.BytesIO(result.stdout)
+        self.assertEqual(arena.load(marshal.load(f)).statements[1].string(), "fib(25)")
+        self.assertEqual(arena.load(marshal.load(f)).string(), "(2 * 3)")
+
+        result = intp("tokens", input="let x\n = @;\n")
+        self.assertEqual(result.returncode, cli.EXIT_PARSE_ERRORS)
+        self.assertEqual(result.stdout, "1:1\tLET\tlet\n1:5\tIDENT\tx\n2:2\t=\t=\n2:4\tILLEGAL\t@\n2:5\t;\t;\n")
+        self.assertEqual(intp("tokens", c).returncode, 0)
+        self.assertEqual(intp("run", "--jobs").returncode, cli.EXIT_USAGE)
+
+    def test_stdin_diagnostics_match_files(self):
+        # statements end mid-line, so stdin is parsed in chunks that do too
+        source = "let a = 1; let = 2;\nlet b = 1; let c = 2; let = 3;\nf(1, \n"
+        path = self.write("a.monkey", source)
+        from_file = intp("parse", path)
+        from_stdin = intp("parse", input=source)
+        self.assertEqual(from_stdin.stdout, from_file.stdout)
+        self.assertEqual(from_stdin.stderr, from_file.stderr.replace(path, "<stdin>"))
+        self.assertIn("<stdin>:1:16: ", from_stdin.stderr)
+
+        # the ";" after "-" is parsed as its operand, and the expression
+        # goes on into the next line
+        source = "a; -;\n+ 3;\nb -\n; c;\n"
+        path = self.write("b.monkey", source)
+        from_stdin = intp("parse", input=source)
+        self.assertEqual(from_stdin.stdout, intp("parse", path).stdout)
+        self.assertIn("(+ (- nil) 3)\n", from_stdin.stdout)
+
+    def test_undecodable_stdin(self):
+        env = dict(os.environ, PYTHONIOENCODING="utf-8:strict")
+        result = subprocess.run([sys.executable, MAIN, "parse"], input=b"let a = 1;\n\xff;\n", capture_output=True, env=env)
+        self.assertEqual(result.returncode, cli.EXIT_USAGE)
+        self.assertIn(b"<stdin>: 'utf-8' codec can't decode", result.stderr)
+        self.assertNotIn(b"Traceback", result.stderr)
+
+    def test_repl(self):
+        result = intp(input="1 + 2\n")
+        self.assertIn("This is the Monkey programming language!", result.stdout)
+        self.assertIn(">> 3\n", result.stdout)
@@ -0,0 +1,39 @@
+import unittest
+from intp import code
+from intp import object
+
+
+class TestCode(unittest.TestCase):
+    def test_make(self):
+        tests = [
+            [code.OP_CONSTANT, [65534], bytes([code.OP_CONSTANT, 255, 254])],
+            [code.OP_ADD, [], bytes([code.OP_ADD])],
+            [code.OP_SET_GLOBAL, [1], bytes([code.OP_SET_GLOBAL, 0, 1])],
+        ]
+        for op, operands, expected in tests:
+            self.assertEqual(code.make(op, *operands), expected)
+
+    def test_read_operands(self):
+        ins = code.make(code.OP_CONSTANT, 65535)
+        operands, read = code.read_operands(code.lookup(code.OP_CONSTANT), ins, 1)
+        self.assertEqual(operands, [65535])
+        self.assertEqual(read, 2)
+        self.assertEqual(code.read_uint16(ins, 1), 65535)
+
+    def test_lookup(self):
+        self.assertEqual(code.lookup(code.OP_POP).name, "OpPop")
+        with self.assertRaises(ValueError):
+            code.lookup(255)
+
+    def test_disassemble(self):
+        ins = (
+            code.make(code.OP_ADD)
+            + code.make(code.OP_CONSTANT, 2)
+            + code.make(code.OP_CONSTANT, 65535)
+            + code.make(code.OP_GET_GLOBAL, 1)
+        )
+        expected = "0000 OpAdd\n0001 OpConstant 2\n0004 OpConstant 65535\n0007 OpGetGlobal 1"
+        self.assertEqual(code.disassemble(ins), expected)
+
+        ins = code.make(code.OP_CONSTANT, 0) + code.make(code.OP_POP)
+        self.assertEqual(code.disassemble(ins, [object.integer(7)]), "0000 OpConstant 0 (7)\n0003 OpPop")
@@ -0,0 +1,115 @@
+import unittest
+from intp import code
+from intp import compiler
+from intp import lexer
+from intp import parser
+
+
+def compile(input):
+    c = compiler.Compiler()
+    c.compile(parser.Parser(lexer.Lexer(input)).parse_program())
+    return c.bytecode()
+
+
+class TestCompiler(unittest.TestCase):
+    def check(self, input, constants, instructions):
+        bytecode = compile(input)
+        self.assertEqual(
+            code.disassemble(bytecode.instructions),
+            code.disassemble(b"".join(instructions)),
+            input,
+        )
+        self.assertEqual([obj.value for obj in bytecode.constants], constants, input)
+
+    def test_integer_arithmetic(self):
+        make = code.make
+        self.check("1 + 2", [1, 2], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_CONSTANT, 1),
+            make(code.OP_ADD),
+            make(code.OP_POP),
+        ])
+        self.check("1; 2", [1, 2], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_POP),
+            make(code.OP_CONSTANT, 1),
+            make(code.OP_POP),
+        ])
+        self.check("2 / 1 * 2", [2, 1], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_CONSTANT, 1),
+            make(code.OP_DIV),
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_MUL),
+            make(code.OP_POP),
+        ])
+        self.check("-1 - 1", [1], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_MINUS),
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_SUB),
+            make(code.OP_POP),
+        ])
+
+    def test_boolean_expressions(self):
+        make = code.make
+        self.check("true", [], [make(code.OP_TRUE), make(code.OP_POP)])
+        self.check("1 < 2", [1, 2], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_CONSTANT, 1),
+            make(code.OP_LESS_THAN),
+            make(code.OP_POP),
+        ])
+        self.check("!(true != false)", [], [
+            make(code.OP_TRUE),
+            make(code.OP_FALSE),
+            make(code.OP_NOT_EQUAL),
+            make(code.OP_BANG),
+            make(code.OP_POP),
+        ])
+
+    def test_global_let_statements(self):
+        make = code.make
+        self.check("let one = 1; let two = one; return two;", [1], [
+            make(code.OP_CONSTANT, 0),
+            make(code.OP_SET_GLOBAL, 0),
+            make(code.OP_GET_GLOBAL, 0),
+            make(code.OP_SET_GLOBAL, 1),
+            make(code.OP_GET_GLOBAL, 1),
+            make(code.OP_RETURN_VALUE),
+        ])
+
+    def test_undefined_identifier(self):
+        with self.assertRaises(compiler.CompileError) as cm:
+            compile("let a = 1; a + b")
+        self.assertEqual(str(cm.exception), "identifier not found: b")
+
+    def test_unsupported_nodes(self):
+        with self.assertRaises(compiler.CompileError) as cm:
+            compile("if (true) { 1 }")
+        self.assertEqual(str(cm.exception), "cannot compile IfExpression")
+
+    def test_operand_limits(self):
+        # operands are two bytes wide
+        with self.assertRaises(compiler.CompileError) as cm:
+            compile("; ".join(str(i) for i in range(70000)))
+        self.assertEqual(str(cm.exception), "too many constants")
+
+        table = compiler.SymbolTable()
+        for i in range(compiler.MAX_GLOBALS):
+            table.define("x%d" % i)
+        with self.assertRaises(compiler.CompileError) as cm:
+            table.define("y")
+        self.assertEqual(str(cm.exception), "too many globals")
+        self.assertEqual(table.define("x0").index, 0)
+
+    def test_keeps_state(self):
+        first = compiler.Compiler()
+        first.compile(parser.Parser(lexer.Lexer("let a = 5;")).parse_program())
+        second = compiler.Compiler(first.symbol_table, first.constants)
+        second.compile(parser.Parser(lexer.Lexer("a + 5 + 6")).parse_program())
+        self.assertEqual([obj.value for obj in second.constants], [5, 6])
+        self.assertEqual(
+            code.disassemble(second.instructions),
+            "0000 OpGetGlobal 0\n0003 OpConstant 0\n0006 OpAdd\n0007 OpConstant 1\n0010 OpAdd\n0011 OpPop",
+        )
@@ -0,0 +1,363 @@
+import unittest
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+
+
+def run(input, tail_calls=False):
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    return evaluator.eval(program, object.Environment(), tail_calls=tail_calls)
+
+
+def run_all(input):
+    # every evaluation mode: environments or resolved frames, each with and
+    # without tail calls; memoizing must not change any result
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    results = []
+    for tail_calls in (False, True):
+        r = resolver.resolve(program)
+        for memoize in (False, True):
+            results.append(evaluator.eval(program, object.Environment(), tail_calls=tail_calls, memoize=memoize))
+            results.append(evaluator.eval(program, object.Frame(), r, tail_calls, memoize))
+    results = [result.inspect() if result else result for result in results]
+    assert results[2:4] == results[:2] and results[6:] == results[4:6], (input, results)
+    return results[:2] + results[4:6]
+
+
+class TestEvaluator(unittest.TestCase):
+    def test_eval_integer_expression(self):
+        tests = [
+            ["5", 5],
+            ["10", 10],
+            ["-5", -5],
+            ["-10", -10],
+            ["5 + 5 + 5 + 5 - 10", 10],
+            ["2 * 2 * 2 * 2 * 2", 32],
+            ["-50 + 100 + -50", 0],
+            ["5 * 2 + 10", 20],
+            ["5 + 2 * 10", 25],
+            ["20 + 2 * -10", 0],
+            ["50 / 2 * 2 + 10", 60],
+            ["2 * (5 + 10)", 30],
+            ["3 * 3 * 3 + 10", 37],
+            ["3 * (3 * 3) + 10", 37],
+            ["(5 + 10 * 2 + 15 / 3) * 2 + -10", 50],
+            ["7 / 2", 3],
+            ["-7 / 2", -3],
+            ["7 / -2", -3],
+            ["-8 / 2", -4],
+        ]
+        for input, expected in tests:
+            evaluated = run(input)
+            self.assertIsInstance(evaluated, object.Integer, input)
+            self.assertEqual(evaluated.value, expected, input)
+
+    def test_eval_boolean_expression(self):
+        tests = [
+            ["true", True],
+            ["false", False],
+            ["1 < 2", True],
+            ["1 > 2", False],
+            ["1 < 1", False],
+            ["1 == 1", True],
+            ["1 != 1", False],
+            ["1 == 2", False],
+            ["1 != 2", True],
+            ["true == true", True],
+            ["false == false", True],
+            ["true == false", False],
+            ["true != false", True],
+            ["(1 < 2) == true", True],
+            ["(1 > 2) == true", False],
+            ["true == 1", False],
+        ]
+        for input, expected in tests:
+            self.assertIs(run(input), object.TRUE if expected else object.FALSE, input)
+
+    def test_bang_operator(self):
+        tests = [
+            ["!true", False],
+            ["!false", True],
+            ["!5", False],
+            ["!!true", True],
+            ["!!false", False],
+            ["!!5", True],
+        ]
+        for input, expected in tests:
+            self.assertIs(run(input), object.boolean(expected), input)
+
+    def test_return_statements(self):
+        tests = [
+            ["return 10;", 10],
+            ["return 10; 9;", 10],
+            ["return 2 * 5; 9;", 10],
+            ["9; return 2 * 5; 9;", 10],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run(input).value, expected, input)
+
+    def test_error_handling(self):
+        tests = [
+            ["5 + true;", "type mismatch: INTEGER + BOOLEAN"],
+            ["5 + true; 5;", "type mismatch: INTEGER + BOOLEAN"],
+            ["-true", "unknown operator: -BOOLEAN"],
+            ["true + false;", "unknown operator: BOOLEAN + BOOLEAN"],
+            ["5; true + false; 5", "unknown operator: BOOLEAN + BOOLEAN"],
+            ["true < false", "unknown operator: BOOLEAN < BOOLEAN"],
+            ["foobar", "identifier not found: foobar"],
+            ["1 / (2 - 2)", "division by zero"],
+            ["-" * 5000 + "1", "expression nested too deeply"],
+        ]
+        for input, expected in tests:
+            evaluated = run(input)
+            self.assertIsInstance(evaluated, object.Error, input)
+            self.assertEqual(evaluated.message, expected, input)
+
+    def test_let_statements(self):
+        tests = [
+            ["let a = 5; a;", 5],
+            ["let a = 5 * 5; a;", 25],
+            ["let a = 5; let b = a; b;", 5],
+            ["let a = 5; let b = a; let c = a + b + 5; c;", 15],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run(input).value, expected, input)
+        self.assertIsNone(run("let a = 5;"))
+
+    def test_if_else_expressions(self):
+        tests = [
+            ["if (true) { 10 }", "10"],
+            ["if (false) { 10 }", "null"],
+            ["if (1) { 10 }", "10"],
+            ["if (1 < 2) { 10 }", "10"],
+            ["if (1 > 2) { 10 }", "null"],
+            ["if (1 > 2) { 10 } else { 20 }", "20"],
+            ["if (1 < 2) { 10 } else { 20 }", "10"],
+            ["if (true) { let a = 1; }", "null"],
+            ["if (10 > 1) { if (10 > 1) { return 10; } return 1; }", "10"],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run_all(input), [expected] * 4, input)
+
+    def test_functions(self):
+        tests = [
+            ["let identity = fn(x) { x; }; identity(5);", "5"],
+            ["let identity = fn(x) { return x; }; identity(5);", "5"],
+            ["let double = fn(x) { x * 2; }; double(5);", "10"],
+            ["let add = fn(x, y) { x + y; }; add(5, 5);", "10"],
+            ["let add = fn(x, y) { x + y; }; add(5 + 5, add(5, 5));", "20"],
+            ["fn(x) { x; }(5)", "5"],
+            ["fn() {}()", "null"],
+            ["let f = fn(x) { x + 2; }; f", "fn(x) {\n(x + 2)\n}"],
+            ["let newAdder = fn(x) { fn(y) { x + y }; }; let addTwo = newAdder(2); addTwo(2);", "4"],
+            ["let x = 1; let f = fn() { x }; let x = 2; f()", "2"],
+            ["let f = fn(a, b) { a }; f(1)", "1"],
+            ["let f = fn(a, b) { b }; f(1)", "ERROR: identifier not found: b"],
+            ["let f = fn(a) { a }; f(1, 2)", "1"],
+            ["5(1)", "ERROR: not a function: INTEGER"],
+            ["let f = fn() { 1 + true }; f(); 5", "ERROR: type mismatch: INTEGER + BOOLEAN"],
+            ["let fact = fn(n) { if (n < 2) { 1 } else { n * fact(n - 1) } }; fact(10)", "3628800"],
+            ["let f = fn() { let x = if (true) { return 1; }; 2 }; f()", "2"],
+            ["let mk = fn(n, f) { if (n == 0) { f } else { mk(n - 1, fn() { n }) } }; mk(3, 0)()", "1"],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run_all(input), [expected] * 4, input)
+
+    def test_tail_calls(self):
+        loops = [
+            "let loop = fn(n, acc) { if (n == 0) { acc } else { loop(n - 1, acc + n) } }; loop(%d, 0)",
+            "let loop = fn(n, acc) { if (n == 0) { return acc; } return loop(n - 1, acc + n); }; loop(%d, 0)",
+            "let loop = fn(n, acc) { if (n == 0) { acc } else { let next = fn() { n - 1 }; loop(next(), acc + n) } }; loop(%d, 0)",
+        ]
+        for input in loops:
+            self.assertEqual(run_all(input % 100), ["5050"] * 4, input)
+            results = run_all(input % 20000)
+            self.assertEqual(results[:2], ["ERROR: stack overflow"] * 2, input)
+            self.assertEqual(results[2:], ["200010000"] * 2, input)
+
+        even = (
+            "let even = fn(n) { if (n == 0) { true } else { odd(n - 1) } };"
+            "let odd = fn(n) { if (n == 0) { false } else { even(n - 1) } };"
+            "even(20001)"
+        )
+        self.assertEqual(run(even, tail_calls=True), object.FALSE)
+        # not in tail position: the multiplication waits for the call
+        fact = "let fact = fn(n) { if (n < 2) { 1 } else { n * fact(n - 1) } }; fact(20000)"
+        self.assertEqual(run(fact, tail_calls=True).message, "stack overflow")
+
+    def test_memoize(self):
+        program = parser.Parser(
+            lexer.Lexer("let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } }; fib(60)")
+        ).parse_program()
+        for frames in (False, True):
+            r = resolver.resolve(program) if frames else None
+            env = object.Frame() if frames else object.Environment()
+            self.assertEqual(evaluator.eval(program, env, r, memoize=True).value, 1548008755920)
+            self.assertEqual(evaluator.memo_stats(env).as_dict(), {"hits": 58, "misses": 61, "evictions": 0})
+            fib = env.slots[0] if frames else env.get("fib")
+            self.assertEqual((fib.memo.hits, fib.memo.misses, len(fib.memo.table)), (58, 61, 61))
+
+    def test_memo_size(self):
+        program = parser.Parser(lexer.Lexer("let f = fn(n) { n * 2 }; f(1) + f(2) + f(3) + f(1) + f(3)")).parse_program()
+        env = object.Environment()
+        self.assertEqual(evaluator.eval(program, env, memoize=True, memo_size=2).value, 20)
+        memo = env.get("f").memo
+        self.assertEqual(list(memo.table), [(1,), (3,)])
+        self.assertEqual((memo.hits, memo.misses, memo.evictions), (1, 4, 2))
+        evaluator.eval(program, env, memoize=True, memo_size=0)
+        self.assertIsNone(env.get("f").memo)
+
+    def test_memoized_arguments_and_results(self):
+        env = object.Environment()
+        program = parser.Parser(
+            lexer.Lexer("let f = fn(a, b) { if (b) { a } else { fn() { a } } }; let g = f(1, false); f(1, true) + f(true, true)")
+        ).parse_program()
+        self.assertEqual(evaluator.eval(program, env, memoize=True).inspect(), "ERROR: type mismatch: INTEGER + BOOLEAN")
+        memo = env.get("f").memo
+        # true and 1 are different keys, and functions are not kept
+        self.assertEqual(list(memo.table), [(1, object.TRUE), (object.TRUE, object.TRUE)])
+        self.assertEqual(evaluator.eval(program, env, memoize=True).inspect(), "ERROR: type mismatch: INTEGER + BOOLEAN")
+        self.assertIsNot(env.get("g"), run("let f = fn() { fn() { 1 } }; f()"))
+
+    def test_memoize_across_inputs(self):
+        # a name the functions of an earlier input use may be bound again
+        env = object.Environment()
+        results = []
+        for input in ["let k = 1; let f = fn(n) { n + k }; f(1)", "f(1)", "let k = 5; f(1)", "let g = fn(n) { n * k }; g(2) + g(2)"]:
+            program = parser.Parser(lexer.Lexer(input)).parse_program()
+            results.append(evaluator.eval(program, env, memoize=True).value)
+        self.assertEqual(results, [2, 2, 6, 20])
+        self.assertIsNone(env.get("f").memo)
+        # k is not bound in the input that makes g
+        self.assertIsNone(env.get("g").memo)
+
+        # each top-level scope counts its own rebindings
+        first, second = object.Environment(), object.Environment()
+        for env, input in [(first, "let f = fn(n) { n * 2 }; f(1)"), (second, "let k = 1; let k = 2;"), (first, "f(1)")]:
+            evaluator.eval(parser.Parser(lexer.Lexer(input)).parse_program(), env, memoize=True)
+        self.assertEqual(first.get("f").memo.hits, 1)
+        self.assertEqual(evaluator.memo_stats(second).epoch, 1)
+
+    def test_arrays(self):
+        tests = [
+            ["[1, 2 * 2, 3 + 3]", "[1, 4, 6]"],
+            ["[1, true, [2]]", "[1, true, [2]]"],
+            ["[]", "[]"],
+            ["[1, 2, 3][0]", "1"],
+            ["let i = 0; [1][i]", "1"],
+            ["[1, 2, 3][1 + 1]", "3"],
+            ["let myArray = [1, 2, 3]; myArray[0] + myArray[1] + myArray[2];", "6"],
+            ["[[1, 2], [3]][0][1]", "2"],
+            ["[1, 2, 3][3]", "null"],
+            ["[1, 2, 3][-1]", "null"],
+            ["[9223372036854775807 + 1][0]", "9223372036854775808"],
+            ["1[0]", "ERROR: index operator not supported: INTEGER"],
+            ["[1][true]", "ERROR: index operator not supported: ARRAY"],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run_all(input), [expected] * 4, input)
+
+    def test_packed_arrays(self):
+        self.assertIsNot(run("[1, 2, 3]").elements.__class__, list)
+        self.assertIsNot(run("push(range(3), 5)").elements.__class__, list)
+        self.assertIs(run("[1, true]").elements.__class__, list)
+        # integers that do not fit in 64 bits
+        self.assertIs(run("[9223372036854775807 + 1]").elements.__class__, list)
+        self.assertIs(run("push([1], 9223372036854775807 + 1)").elements.__class__, list)
+        self.assertIs(run("[1, 2][0]"), object.integer(1))
+
+    def test_builtin_functions(self):
+        tests = [
+            ["len([])", "0"],
+            ["len([1, 2, 3])", "3"],
+            ["len(1)", "ERROR: argument to `len` not supported, got INTEGER"],
+            ["len([1], [2])", "ERROR: wrong number of arguments. got=2, want=1"],
+            ["first([1, 2, 3])", "1"],
+            ["first([])", "null"],
+            ["first(1)", "ERROR: argument to `first` must be ARRAY, got INTEGER"],
+            ["last([1, 2, 3])", "3"],
+            ["last([])", "null"],
+            ["last(1)", "ERROR: argument to `last` must be ARRAY, got INTEGER"],
+            ["rest([1, 2, 3])", "[2, 3]"],
+            ["rest([true])", "[]"],
+            ["rest([])", "null"],
+            ["push([], 1)", "[1]"],
+            ["push([1], true)", "[1, true]"],
+            ["push(1, 1)", "ERROR: argument to `push` must be ARRAY, got INTEGER"],
+            ["sum([])", "0"],
+            ["sum(range(101))", "5050"],
+            ["sum([9223372036854775807, 9223372036854775807])", "18446744073709551614"],
+            ["sum([1, true])", "ERROR: argument to `sum` must be ARRAY of INTEGER, got BOOLEAN"],
+            ["range(4)", "[0, 1, 2, 3]"],
+            ["range(-2, 2)", "[-2, -1, 0, 1]"],
+            ["range(3, 1)", "[]"],
+            ["len(range(0, 100000000000))", "ERROR: range too long: 100000000000 elements, the most is 33554432"],
+            ["range(-1, 33554432)", "ERROR: range too long: 33554433 elements, the most is 33554432"],
+            ["len(range(9223372036854775807, 9223372036854775812))", "5"],
+            ["range(true)", "ERROR: argument to `range` must be INTEGER, got BOOLEAN"],
+            ["range()", "ERROR: wrong number of arguments. got=0, want=1 or 2"],
+            ["map([1, 2, 3], fn(x) { x * 2 })", "[2, 4, 6]"],
+            ["map([[1], [2, 3]], len)", "[1, 2]"],
+            ["map([1, true], fn(x) { x == true })", "[false, true]"],
+            ["map(1, len)", "ERROR: argument to `map` must be ARRAY, got INTEGER"],
+            ["map([1], 1)", "ERROR: argument to `map` must be FUNCTION, got INTEGER"],
+            ["map([1, 2], len)", "ERROR: argument to `len` not supported, got INTEGER"],
+            ["filter(range(10), fn(x) { x / 3 * 3 == x })", "[0, 3, 6, 9]"],
+            ["filter([1, true, [2]], fn(x) { x == true })", "[true]"],
+            ["filter(range(3), fn(x) { if (x == 1) { false } })", "[]"],
+            ["filter(1, len)", "ERROR: argument to `filter` must be ARRAY, got INTEGER"],
+            ["len", "builtin function"],
+            ["let len = fn(a) { 0 }; len([1])", "0"],
+            ["let f = fn(len) { len }; f(1)", "1"],
+        ]
+        for input, expected in tests:
+            self.assertEqual(run_all(input), [expected] * 4, input)
+
+    def test_vectorised_functions(self):
+        # arithmetic functions run on packed arrays at once; the same
+        # function written so that it cannot must give the same results
+        functions = [
+            "x * x - 3",
+            "-x / 3",
+            "7 / (x - 100)",
+            "x * 4611686018427387904",
+            "x - 9223372036854775807 - 10",
+            "x / 2 * 2 == x",
+            "x > 5",
+            "2",
+        ]
+        for body in functions:
+            for builtin in ("map", "filter"):
+                fast = "%s(range(-20, 20), fn(x) { %s })" % (builtin, body)
+                slow = "%s(range(-20, 20), fn(x) { let y = x; %s })" % (builtin, body.replace("x", "y"))
+                self.assertEqual(run_all(fast), run_all(slow), fast)
+        self.assertEqual(run_all("map(range(3), fn(x) { return x - 1; })"), ["[-1, 0, 1]"] * 4)
+        self.assertEqual(run_all("map(range(3), fn(x) { 6 / (x - 1) })"), ["ERROR: division by zero"] * 4)
+        self.assertEqual(run_all("filter(range(3), fn(x) { 6 / x })"), ["ERROR: division by zero"] * 4)
+
+    def test_builtin_bound_in_later_input(self):
+        env = object.Environment()
+        results = []
+        for input in ["let f = fn(n) { len(range(n)) }; f(3)", "f(3)", "let len = fn(a) { 0 }; f(3)"]:
+            program = parser.Parser(lexer.Lexer(input)).parse_program()
+            results.append(evaluator.eval(program, env, memoize=True).value)
+        self.assertEqual(results, [3, 3, 0])
+
+    def test_compile_once(self):
+        program = parser.Parser(lexer.Lexer("let x = x + 1; x * 2")).parse_program()
+        code = evaluator.compile(program)
+        env = object.Environment()
+        env.set("x", object.integer(0))
+        self.assertEqual([code(env).value for _ in range(3)], [2, 4, 6])
+
+    def test_shared_objects(self):
+        self.assertIs(run("2 + 3"), run("5"))
+        self.assertIs(run("-128"), object.integer(-128))
+        self.assertIsNot(run("1000 * 1000"), run("1000 * 1000"))
+        self.assertIs(run("1 < 2"), object.TRUE)
@@ -0,0 +1,48 @@
+import json
+import unittest
+from intp import formats
+from intp import lexer
+from intp import parser
+
+
+def parse(input):
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    return program
+
+
+class TestFormats(unittest.TestCase):
+    def test_sexpr(self):
+        tests = [
+            ("let x = -1 + 2 * 3;", "(let x (+ (- 1) (* 2 3)))"),
+            ("return !true;", "(return (! true))"),
+            ("if (a < b) { a } else { let c = b; c }", "(if (< a b) (do a) (do (let c b) c))"),
+            ("fn(x, y) { x }(1, f(2))", "((fn (x y) (do x)) 1 (f 2))"),
+            ("f()", "(f)"),
+            ("[1, a[0]][i + 1]", "(index (array 1 (index a 0)) (+ i 1))"),
+        ]
+        for input, expected in tests:
+            program = parse(input)
+            self.assertEqual(formats.to_sexpr(program.statements[0]), expected, input)
+        self.assertEqual(formats.to_sexpr(parse("1; 2")), "(program 1 2)")
+
+    def test_json(self):
+        program = parse("let f = fn(n) { n * 2 }; f(3)")
+        data = json.loads(formats.to_json(program))
+        self.assertEqual(data["type"], "Program")
+        let, call = data["statements"]
+        self.assertEqual(let["name"], {"type": "Identifier", "offset": 4, "value": "f"})
+        body = let["value"]["body"]["statements"][0]["expression"]
+        self.assertEqual((body["type"], body["operator"], body["right"]["value"]), ("InfixExpression", "*", 2))
+        self.assertEqual(let["value"]["parameters"], [{"type": "Identifier", "offset": 11, "value": "n"}])
+        self.assertEqual(call["expression"]["arguments"][0]["value"], 3)
+
+        p = parser.Parser(lexer.Lexer("let x = ;"))
+        self.assertIsNone(json.loads(formats.to_json(p.parse_program().statements[0]))["value"])
+
+    def test_deep(self):
+        depth = 5000
+        program = parse("-" * depth + "1")
+        self.assertEqual(formats.to_sexpr(program), "(program " + "(- " * depth + "1" + ")" * depth + ")")
+        self.assertEqual(formats.to_json(program).count('"PrefixExpression"'), depth)
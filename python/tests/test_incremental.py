@@ -0,0 +1,77 @@
+import random
+import unittest
+from intp import incremental
+
+
+def node_offsets(program):
+    offsets = []
+    stack = list(reversed(program.statements))
+    while stack:
+        node = stack.pop()
+        offsets.append((type(node).__name__, node.offset))
+        for field in reversed(node.fields):
+            child = getattr(node, field)
+            if child is not None:
+                stack.append(child)
+    return offsets
+
+
+class TestDocument(unittest.TestCase):
+    def assertSameAsFullParse(self, doc):
+        full = incremental.Document(doc.source)
+        self.assertEqual(doc.program.string(), full.program.string())
+        self.assertEqual(node_offsets(doc.program), node_offsets(full.program))
+        self.assertEqual(doc.errors, full.errors)
+        self.assertEqual(doc.error_offsets, full.error_offsets)
+        self.assertEqual(list(doc.tokens.types), list(full.tokens.types))
+        self.assertEqual(list(doc.tokens.starts), list(full.tokens.starts))
+        self.assertEqual(list(doc.tokens.ends), list(full.tokens.ends))
+
+    def test_edits(self):
+        source = "let x = 5;\nlet y = x + 1;\na * b - c;\n-d == e;\nf != g;\n"
+        edits = [
+            (8, 1, "10"),  # change a literal
+            (source.index("a *"), 1, "aa"),  # extend an identifier
+            (source.index("+"), 1, "="),  # turn an infix into an assignment
+            (source.index("-d"), 0, "="),  # make "=-"
+            (source.index("f !"), 1, ""),  # remove a statement start
+            (0, 0, "  "),  # leading white space
+            (len(source), 0, "h"),  # append
+            (source.index(";"), 1, ""),  # merge two statements
+        ]
+        for offset, removed, inserted in edits:
+            doc = incremental.Document(source)
+            doc.edit(offset, removed, inserted)
+            self.assertEqual(doc.source, source[:offset] + inserted + source[offset + removed:])
+            self.assertSameAsFullParse(doc)
+
+    def test_random_edits(self):
+        rnd = random.Random(7)
+        alphabet = list("ab15 =!;+-*/<>\n(){}[],") + ["fn", "if"]
+        statements = ["let x = 5;\n", "a + b * 3;\n", "-c != d;\n", "let 4;\n", "e f;\n"]
+        statements += ["let f = fn(x) { x };\n", "if (a) { [b, 1] } else { c };\n"]
+        source = "".join(rnd.choice(statements) for _ in range(30))
+        doc = incremental.Document(source)
+        for _ in range(600):
+            offset = rnd.randint(0, len(doc.source))
+            removed = rnd.randint(0, min(3, len(doc.source) - offset))
+            inserted = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 3)))
+            doc.edit(offset, removed, inserted)
+            self.assertSameAsFullParse(doc)
+
+    def test_reuses_statements_after_the_edit(self):
+        source = "".join("let v = %d;\n" % i for i in range(100))
+        doc = incremental.Document(source)
+        last = doc.program.statements[-1]
+        first = doc.program.statements[0]
+
+        doc.edit(source.index("50"), 2, "5000")
+
+        self.assertIs(doc.program.statements[-1], last)
+        self.assertIs(doc.program.statements[0], first)
+        self.assertEqual(last.offset, source.rindex("let") + 2)
+
+    def test_edit_out_of_range(self):
+        doc = incremental.Document("x;")
+        with self.assertRaises(ValueError):
+            doc.edit(1, 5, "")
@@ -1,3 +1,7 @@
+import io
+import mmap
+import os
+import tempfile
 import unittest
 from intp import token
 from intp import lexer
@@ -24,6 +28,7 @@ class TestNextToken(unittest.TestCase):
 
         10 == 10;
         10 != 9;
+        [1, 2];
         """
 
         tests = [
@@ -100,6 +105,12 @@ class TestNextToken(unittest.TestCase):
             (token.NOT_EQ, "!="),
             (token.INT, "9"),
             (token.SEMICOLON, ";"),
+            (token.LBRACKET, "["),
+            (token.INT, "1"),
+            (token.COMMA, ","),
+            (token.INT, "2"),
+            (token.RBRACKET, "]"),
+            (token.SEMICOLON, ";"),
             (token.EOF, ""),
         ]
 
@@ -109,3 +120,108 @@ class TestNextToken(unittest.TestCase):
             tok = l.next_token()
             self.assertEqual(tok.type, expected_type)
             self.assertEqual(tok.literal, expected_literal)
+
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize_matches_next_token(self):
+        inputs = [
+            "let five = 5;\nlet add = fn(x, y) { x + y; };",
+            "!-/*5; 5 < 10 > 5; 10 == 10; 10 != 9;",
+            "a[1] + [x, [y]][0]",
+            "a===b !== !!= =! x1_y2",
+            "@ # $ ? é 3.14 \x0b",
+            "   \t\r\n  ",
+            "",
+            "foo",
+        ]
+
+        for input in inputs:
+            expected = []
+            l = lexer.Lexer(input)
+            while True:
+                tok = l.next_token()
+                expected.append((tok.type, tok.literal))
+                if tok.type == token.EOF:
+                    break
+
+            actual = [(tok.type, tok.literal) for tok in lexer.Lexer(input).tokenize()]
+            self.assertEqual(actual, expected)
+
+    def test_offsets(self):
+        input = "let x =\n  y != 10;"
+        expected = [0, 4, 6, 10, 12, 15, 17, 18]
+
+        l = lexer.Lexer(input)
+        self.assertEqual([l.next_token().offset for _ in expected], expected)
+        self.assertEqual([tok.offset for tok in lexer.Lexer(input).tokenize()], expected)
+        self.assertEqual([tok.offset for tok in lexer.Lexer(input).token_stream()], expected)
+
+    def test_iter_tokens_advances_lexer(self):
+        l = lexer.Lexer("let x = 5;")
+        self.assertEqual(len(list(l.iter_tokens())), 6)
+        self.assertEqual(l.next_token().type, token.EOF)
+
+
+class TestTokenStream(unittest.TestCase):
+    def test_token_stream_matches_tokenize(self):
+        input = "let add = fn(x, y) { x + y; }; add(5, 10) == 15; !x != @"
+
+        expected = [(tok.type, tok.literal) for tok in lexer.Lexer(input).tokenize()]
+        stream = lexer.Lexer(input).token_stream()
+
+        self.assertEqual(len(stream), len(expected))
+        self.assertEqual([(tok.type, tok.literal) for tok in stream], expected)
+        self.assertEqual(stream.type(0), token.LET)
+        self.assertEqual(stream.literal(1), "add")
+        self.assertEqual(stream.type(len(stream) - 1), token.EOF)
+
+    def test_next_token_stops_at_eof(self):
+        stream = lexer.Lexer("x").token_stream()
+        self.assertEqual(stream.next_token().literal, "x")
+        self.assertEqual(stream.next_token().type, token.EOF)
+        self.assertEqual(stream.next_token().type, token.EOF)
+
+    def test_token_has_no_dict(self):
+        self.assertFalse(hasattr(token.Token(token.INT, "5"), "__dict__"))
+
+
+class TestStreamLexer(unittest.TestCase):
+    input = "let five = 55;\nlet ten_x = 10;\n10 == 10; 10 != 9; !x = y; @  \n"
+
+    def expected(self):
+        return [(t.type, t.literal, t.offset) for t in lexer.Lexer(self.input).tokenize()]
+
+    def test_chunk_boundaries(self):
+        for chunk_size in range(1, 8):
+            l = lexer.Lexer.from_stream(io.StringIO(self.input), chunk_size)
+            actual = [(t.type, t.literal, t.offset) for t in l.tokenize()]
+            self.assertEqual(actual, self.expected())
+
+    def test_binary_stream(self):
+        input = self.input.replace("@", "é")
+        l = lexer.Lexer.from_stream(io.BytesIO(input.encode("utf-8")), 3)
+        expected = [(t.type, t.literal, t.offset) for t in lexer.Lexer(input).tokenize()]
+        self.assertEqual([(t.type, t.literal, t.offset) for t in l.tokenize()], expected)
+
+    def test_multibyte_characters_across_chunks(self):
+        # chunks shorter than a character decode to nothing at all
+        input = "let é = 5; let x = 10; \u20ac \U0001f600 y;"
+        expected = [(t.type, t.literal, t.offset) for t in lexer.Lexer(input).tokenize()]
+        for chunk_size in range(1, 4):
+            l = lexer.Lexer.from_stream(io.BytesIO(input.encode("utf-8")), chunk_size)
+            self.assertEqual([(t.type, t.literal, t.offset) for t in l.tokenize()], expected, chunk_size)
+
+    def test_path_and_mmap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "input.monkey")
+            with open(path, "w") as f:
+                f.write(self.input)
+
+            with lexer.Lexer.from_path(path, 5) as l:
+                actual = [(t.type, t.literal, t.offset) for t in l.tokenize()]
+            self.assertEqual(actual, self.expected())
+
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                l = lexer.Lexer.from_mmap(mm, 4)
+                actual = [(t.type, t.literal, t.offset) for t in l.tokenize()]
+            self.assertEqual(actual, self.expected())
@@ -0,0 +1,99 @@
+import random
+import unittest
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import optimizer
+from intp import parser
+
+
+def parse(input):
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    return program
+
+
+def evaluate(program):
+    result = evaluator.eval(program, object.Environment())
+    return result.inspect() if result else result
+
+
+class TestOptimizer(unittest.TestCase):
+    def check(self, input, expected, rules):
+        program, changes = optimizer.optimize(parse(input))
+        self.assertEqual(program.string(), expected, input)
+        self.assertEqual([change.rule for change in changes], rules, input)
+
+    def test_folding(self):
+        self.check("5 * 10 - 2", "48", ["fold", "fold"])
+        self.check("!true", "false", ["fold"])
+        self.check("!5", "false", ["fold"])
+        self.check("-7 / 2", "-3", ["fold", "fold"])
+        self.check("1 < 2 == true", "true", ["fold", "fold"])
+        self.check("true != 1", "true", ["fold"])
+
+    def test_identities(self):
+        self.check("let x = y; x * 1", "let x = y;(x * 1)", [])
+        self.check("let x = y + 1; 0 + x * 1 - 0", "let x = (y + 1);x", ["identity", "identity", "identity"])
+        self.check("let x = -y; -(-x) / 1", "let x = (-y);x", ["double negation", "identity"])
+        self.check("let b = y < 1; !!b", "let b = (y < 1);b", ["double negation"])
+        self.check("1 - x", "(1 - x)", [])
+
+    def test_unsafe_rewrites_are_skipped(self):
+        self.check("1 / 0", "(1 / 0)", [])
+        self.check("1 + true", "(1 + true)", [])
+        self.check("-true", "(-true)", [])
+        self.check("true < false", "(true < false)", [])
+        self.check("x * 1", "(x * 1)", [])
+        self.check("let b = true; -(-b)", "let b = true;(-(-true))", ["propagate"])
+        self.check("!!x", "(!(!x))", [])
+
+    def test_propagation(self):
+        self.check("let a = 5; let b = a * 2; b + a", "let a = 5;let b = 10;15", [
+            "propagate", "fold", "propagate", "propagate", "fold",
+        ])
+        self.check("a; let a = 1; a", "alet a = 1;1", ["propagate"])
+        self.check("let a = 1; let a = y; a", "let a = 1;let a = y;a", [])
+        # a let in a block may or may not have run
+        self.check("let a = 1; if (y) { let a = 2; }; a + 0", "let a = 1;ify let a = 2;(a + 0)", [])
+        # functions bind their own names, and see later values of outer ones
+        self.check(
+            "let a = 1; let f = fn() { let a = 2; a + 0 }; a",
+            "let a = 1;let f = fn() let a = 2;(a + 0);1",
+            ["propagate"],
+        )
+
+    def test_changes(self):
+        _, changes = optimizer.optimize(parse("let a = 2;\n3 * a"))
+        self.assertEqual([(c.offset, c.rule, c.node.string()) for c in changes], [
+            (15, "propagate", "2"),
+            (13, "fold", "6"),
+        ])
+
+    def test_same_result(self):
+        rnd = random.Random(5)
+        atoms = ["0", "1", "2", "5", "true", "false", "x", "y", "b"]
+
+        def expression(depth):
+            if depth == 0 or rnd.random() < 0.3:
+                return rnd.choice(atoms)
+            if rnd.random() < 0.25:
+                return "%s(%s)" % (rnd.choice("-!"), expression(depth - 1))
+            op = rnd.choice(["+", "-", "*", "/", "<", ">", "==", "!="])
+            return "(%s %s %s)" % (expression(depth - 1), op, expression(depth - 1))
+
+        for _ in range(300):
+            input = "let x = %s; let b = %s; %s; let y = %s; %s" % (
+                expression(2), expression(2), expression(3), expression(3), expression(4),
+            )
+            expected = evaluate(parse(input))
+            program, _ = optimizer.optimize(parse(input))
+            self.assertEqual(evaluate(program), expected, input)
+
+    def test_deep_trees(self):
+        depth = 20000
+        program, changes = optimizer.optimize(parse("-" * depth + "1;"))
+        self.assertEqual(program.string(), "1")
+        program, changes = optimizer.optimize(parse("let x = y + 1; " + " + ".join(["x * 1"] * depth)))
+        self.assertEqual(len(changes), depth)
@@ -0,0 +1,102 @@
+import os
+import random
+import tempfile
+import unittest
+import intp
+from intp import lexer
+from intp import parallel
+from intp import parser
+
+
+class TestParseFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.paths = []
+        for i in range(7):
+            path = os.path.join(self.tmp.name, "%d.monkey" % i)
+            with open(path, "w") as f:
+                f.write("let x = %d; x * %d;" % (i, i) if i != 3 else "let 3;")
+            self.paths.append(path)
+
+    def check(self, results, paths):
+        self.assertEqual([r.path for r in results], paths)
+        for r in results:
+            i = int(os.path.basename(r.path).split(".")[0])
+            if i == 3:
+                self.assertEqual(r.errors, ["expected next token to be IDENT, got INT instead"])
+            else:
+                self.assertEqual(r.errors, [])
+                self.assertEqual(r.program().string(), "let x = %d;(x * %d)" % (i, i))
+
+    def test_in_process(self):
+        self.check(list(intp.parse_files(self.paths, jobs=1)), self.paths)
+
+    def test_process_pool(self):
+        self.check(list(parallel.parse_files(self.paths, jobs=2, chunksize=2)), self.paths)
+
+        results = list(parallel.parse_files(self.paths, jobs=2, chunksize=3, ordered=False))
+        results.sort(key=lambda r: self.paths.index(r.path))
+        self.check(results, self.paths)
+
+    def test_unreadable_file(self):
+        missing = os.path.join(self.tmp.name, "missing.monkey")
+        (result,) = parallel.parse_files([missing], jobs=1)
+        self.assertIsNone(result.data)
+        self.assertIsNone(result.program())
+        self.assertEqual(len(result.errors), 1)
+
+
+class TestParseSource(unittest.TestCase):
+    def check(self, source, result):
+        p = parser.Parser(lexer.Lexer(source))
+        expected = p.parse_program()
+
+        program, errors, error_offsets = result
+        self.assertEqual(program.string(), expected.string())
+        self.assertEqual(
+            [stmt.offset for stmt in program.statements],
+            [stmt.offset for stmt in expected.statements],
+        )
+        self.assertEqual(errors, p.errors)
+        self.assertEqual(error_offsets, p.error_offsets)
+
+    def test_split_statements(self):
+        source = "a;b; ;c;  d; {e; f}; (g; h); i;"
+        self.assertEqual(parallel.split_statements(source, 1), [2, 6, 10, 13, 21, 29])
+        self.assertEqual(parallel.split_statements("a; } b; c;", 1), [3])
+        self.assertEqual(parallel.split_statements("a; [ } b; c;", 1), [3])
+        # the ";" after an operator is its missing operand: "((-) + 5)"
+        self.assertEqual(parallel.split_statements("a; -; + 5; b -\n; c;", 1), [3, 11])
+
+    def test_splitter(self):
+        source = "let a = 1; -\n; + 2; b; {\nc;\n}; d;\n\n e;"
+        whole = parallel.split_statements(source, 1)
+        for n in (1, 2, 5):
+            s = parallel.Splitter(1)
+            cuts = []
+            for i in range(0, len(source), n):
+                cuts.extend(s.feed(source[i : i + n]))
+            self.assertEqual(cuts, whole, n)
+
+    def test_same_as_sequential(self):
+        rnd = random.Random(3)
+        pieces = ["let x = 5;", "a + b * 3;", "-c != d;", "let 4;", "e f;", ";", ";;", "(", ")", "{", "}", "let", "+"]
+        for _ in range(50):
+            source = "\n".join(rnd.choice(pieces) for _ in range(40))
+            self.check(source, parallel._parse_chunks(source, 8))
+
+    def test_same_as_sequential_with_errors(self):
+        for source in ["a; -; + 5; b; c;", "a; let x = ; + 1; c;", "a; !;; b;", "[ } , ; * =", "a; fn; if; else; b;"]:
+            self.check(source, parallel._parse_chunks(source, 1))
+        rnd = random.Random(5)
+        pieces = ["a", "5", ";", ";", "-", "+", "!", "==", "=", "let", "return", "if", "fn", "else"]
+        pieces += ["(", ")", "{", "}", "[", "]", ",", "@"]
+        for _ in range(500):
+            source = " ".join(rnd.choice(pieces) for _ in range(20))
+            self.check(source, parallel._parse_chunks(source, 1))
+
+    def test_process_pool(self):
+        source = "\n".join("let v = %d; v * %d; let %d;" % (i, i, i) for i in range(200))
+        self.check(source, parallel.parse_source(source, jobs=2))
+        self.check(source, parallel.parse_source(source, jobs=1))
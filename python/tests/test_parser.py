@@ -1,3 +1,4 @@
+import io
 import unittest
 from intp import ast
 from intp import lexer
@@ -33,6 +34,23 @@ class TestLetStatements(unittest.TestCase):
             self.assertEqual(let_stmt.name.value, expected)
             self.assertEqual(let_stmt.name.token_literal(), expected)
 
+    def test_let_statement_values(self):
+        tests = [
+            ["let x = 5;", "x", "5"],
+            ["let y = true;", "y", "true"],
+            ["let foobar = y", "foobar", "y"],
+            ["let z = (1 + 2) * 3;", "z", "((1 + 2) * 3)"],
+        ]
+
+        for input, name, value in tests:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertEqual(len(program.statements), 1)
+            stmt = program.statements[0]
+            self.assertEqual(stmt.name.value, name)
+            self.assertEqual(stmt.value.string(), value)
+
     def test_return_statement(self):
         input = """
         return 5;
@@ -47,9 +65,10 @@ class TestLetStatements(unittest.TestCase):
         self.check_parse_errors(p)
         self.assertEqual(len(program.statements), 3)
 
-        for stmt in program.statements:
+        for stmt, value in zip(program.statements, [5, 10, 993322]):
             self.assertIsInstance(stmt, ast.ReturnStatement)
             self.assertEqual(stmt.token_literal(), "return")
+            self.assertEqual(stmt.return_value.value, value)
 
     def test_identifier_expression(self):
         input = "foobar;"
@@ -86,6 +105,17 @@ class TestLetStatements(unittest.TestCase):
         self.assertEqual(literal.value, 5)
         self.assertEqual(literal.token_literal(), "5")
 
+    def test_boolean_expression(self):
+        for input, expected in [["true;", True], ["false;", False]]:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertEqual(len(program.statements), 1)
+            boolean = program.statements[0].expression
+            self.assertIsInstance(boolean, ast.Boolean)
+            self.assertEqual(boolean.value, expected)
+            self.assertEqual(boolean.token_literal(), input[:-1])
+
     def test_parsing_prefix_expressions(self):
         tests = [
             ["!5;", "!", 5],
@@ -138,6 +168,273 @@ class TestLetStatements(unittest.TestCase):
             self.assertEqual(exp.operator, test[2])
             # TODO self._test_integer_literal(exp.right, test[3])
 
+    def test_parse_token_stream(self):
+        input = "let x = 5; -a * b; 5 + 5 != 10;"
+
+        p = parser.Parser(lexer.Lexer(input))
+        expected = p.parse_program().string()
+
+        p = parser.Parser(lexer.Lexer(input).token_stream())
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(program.string(), expected)
+
+    def test_error_positions(self):
+        input = "let x = 5;\nlet 10;\n  let y 3;"
+
+        p = parser.Parser(lexer.Lexer(input))
+        p.parse_program()
+
+        self.assertEqual(p.error_offsets[0], 15)
+        self.assertEqual(
+            p.diagnostics()[0], "2:5: expected next token to be IDENT, got INT instead"
+        )
+        self.assertEqual(
+            p.diagnostics()[-1], "3:9: expected next token to be =, got INT instead"
+        )
+
+    def test_node_offsets(self):
+        program = parser.Parser(lexer.Lexer("let x = 1;\n-a + b;")).parse_program()
+
+        self.assertEqual(program.statements[0].offset, 0)
+        self.assertEqual(program.statements[0].name.offset, 4)
+        exp = program.statements[1].expression
+        self.assertEqual(exp.offset, 14)
+        self.assertEqual(exp.left.offset, 11)
+        self.assertEqual(exp.left.right.offset, 12)
+
+    def test_iter_statements(self):
+        input = "let x = 5; let 10; y;"
+
+        p = parser.Parser(lexer.Lexer(input))
+        it = p.iter_statements()
+
+        stmt, errors = next(it)
+        self.assertIsInstance(stmt, ast.LetStatement)
+        self.assertEqual(errors, [])
+        self.assertEqual(p.cur_token.literal, ";")
+
+        stmt, errors = next(it)
+        self.assertIsNone(stmt)
+        self.assertEqual(errors, ["expected next token to be IDENT, got INT instead"])
+
+        rest = list(it)
+        self.assertEqual([stmt.string() for stmt, _ in rest], ["10", "y"])
+        self.assertEqual(len(p.errors), 1)
+
+    def test_operator_precedence_parsing(self):
+        tests = [
+            ["-a * b", "((-a) * b)"],
+            ["!-a", "(!(-a))"],
+            ["a + b + c", "((a + b) + c)"],
+            ["a + b - c", "((a + b) - c)"],
+            ["a * b * c", "((a * b) * c)"],
+            ["a * b / c", "((a * b) / c)"],
+            ["a + b / c", "(a + (b / c))"],
+            ["a + b * c + d / e - f", "(((a + (b * c)) + (d / e)) - f)"],
+            ["3 + 4; -5 * 5", "(3 + 4)((-5) * 5)"],
+            ["5 > 4 == 3 < 4", "((5 > 4) == (3 < 4))"],
+            ["5 < 4 != 3 > 4", "((5 < 4) != (3 > 4))"],
+            ["3 + 4 * 5 == 3 * 1 + 4 * 5", "((3 + (4 * 5)) == ((3 * 1) + (4 * 5)))"],
+            ["true", "true"],
+            ["3 > 5 == false", "((3 > 5) == false)"],
+            ["3 < 5 == true", "((3 < 5) == true)"],
+            ["1 + (2 + 3) + 4", "((1 + (2 + 3)) + 4)"],
+            ["(5 + 5) * 2", "((5 + 5) * 2)"],
+            ["2 / (5 + 5)", "(2 / (5 + 5))"],
+            ["-(5 + 5)", "(-(5 + 5))"],
+            ["!(true == true)", "(!(true == true))"],
+            ["a + add(b * c) + d", "((a + add((b * c))) + d)"],
+            ["add(a, b, 1, 2 * 3, 4 + 5, add(6, 7 * 8))", "add(a, b, 1, (2 * 3), (4 + 5), add(6, (7 * 8)))"],
+            ["add(a + b + c * d / f + g)", "add((((a + b) + ((c * d) / f)) + g))"],
+            ["a * [1, 2, 3, 4][b * c] * d", "((a * ([1, 2, 3, 4][(b * c)])) * d)"],
+            ["add(a * b[2], b[1], 2 * [1, 2][1])", "add((a * (b[2])), (b[1]), (2 * ([1, 2][1])))"],
+            ["-a[0]", "(-(a[0]))"],
+            ["f(x)[0][1]", "((f(x)[0])[1])"],
+        ]
+
+        for input, expected in tests:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertEqual(program.string(), expected)
+
+    def test_if_expression(self):
+        p = parser.Parser(lexer.Lexer("if (x < y) { x }"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(len(program.statements), 1)
+        exp = program.statements[0].expression
+        self.assertIsInstance(exp, ast.IfExpression)
+        self.assertEqual(exp.condition.string(), "(x < y)")
+        self.assertEqual(len(exp.consequence.statements), 1)
+        self.assertEqual(exp.consequence.statements[0].expression.value, "x")
+        self.assertIsNone(exp.alternative)
+
+    def test_if_else_expression(self):
+        p = parser.Parser(lexer.Lexer("if (x < y) { x } else { y; 1 }"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        exp = program.statements[0].expression
+        self.assertEqual(exp.consequence.string(), "x")
+        self.assertEqual(len(exp.alternative.statements), 2)
+        self.assertEqual(program.string(), "if(x < y) xelse y1")
+
+    def test_function_literal(self):
+        p = parser.Parser(lexer.Lexer("fn(x, y) { x + y; }"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        function = program.statements[0].expression
+        self.assertIsInstance(function, ast.FunctionLiteral)
+        self.assertEqual([param.value for param in function.parameters], ["x", "y"])
+        self.assertEqual(function.body.string(), "(x + y)")
+        self.assertEqual(program.string(), "fn(x, y) (x + y)")
+
+    def test_function_parameters(self):
+        tests = [
+            ["fn() {};", []],
+            ["fn(x) {};", ["x"]],
+            ["fn(x, y, z) {};", ["x", "y", "z"]],
+        ]
+
+        for input, expected in tests:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            function = program.statements[0].expression
+            self.assertEqual([param.value for param in function.parameters], expected)
+
+    def test_call_expression(self):
+        p = parser.Parser(lexer.Lexer("add(1, 2 * 3, 4 + 5);"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        exp = program.statements[0].expression
+        self.assertIsInstance(exp, ast.CallExpression)
+        self.assertEqual(exp.function.value, "add")
+        self.assertEqual([arg.string() for arg in exp.arguments], ["1", "(2 * 3)", "(4 + 5)"])
+        self.assertEqual(exp.offset, 3)
+
+    def test_array_literal(self):
+        p = parser.Parser(lexer.Lexer("[1, 2 * 2, 3 + 3]"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        array = program.statements[0].expression
+        self.assertIsInstance(array, ast.ArrayLiteral)
+        self.assertEqual([element.string() for element in array.elements], ["1", "(2 * 2)", "(3 + 3)"])
+
+        p = parser.Parser(lexer.Lexer("[]"))
+        self.assertEqual(p.parse_program().statements[0].expression.elements, [])
+        self.check_parse_errors(p)
+
+    def test_index_expression(self):
+        p = parser.Parser(lexer.Lexer("myArray[1 + 1]"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        exp = program.statements[0].expression
+        self.assertIsInstance(exp, ast.IndexExpression)
+        self.assertEqual(exp.left.value, "myArray")
+        self.assertEqual(exp.index.string(), "(1 + 1)")
+        self.assertEqual(exp.offset, 7)
+
+    def test_broken_functions_and_calls(self):
+        tests = [
+            [
+                "if x { 1 }",
+                [
+                    "expected next token to be (, got IDENT instead",
+                    "no prefix parse function for { found",
+                    "no prefix parse function for } found",
+                ],
+            ],
+            [
+                "fn(x y) {}",
+                [
+                    "expected next token to be ), got IDENT instead",
+                    "no prefix parse function for ) found",
+                    "no prefix parse function for { found",
+                    "no prefix parse function for } found",
+                ],
+            ],
+            ["f(1, ", ["no prefix parse function for EOF found", "expected next token to be ), got EOF instead"]],
+            ["[1, ", ["no prefix parse function for EOF found", "expected next token to be ], got EOF instead"]],
+        ]
+
+        for input, expected in tests:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.assertEqual(p.errors, expected, input)
+            self.assertNotIn(None, [arg for stmt in program.statements for arg in getattr(stmt.expression, "arguments", [])])
+
+    def test_deeply_nested_calls(self):
+        p = parser.Parser(lexer.Lexer("f(" * 5000 + "1" + ")" * 5000 + "; 2"))
+        program = p.parse_program()
+        self.assertEqual(p.errors, ["expression nested too deeply"])
+        self.assertEqual(program.statements, [])
+
+    def test_deep_expressions(self):
+        depth = 20000
+
+        p = parser.Parser(lexer.Lexer("-" * depth + "1;"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(program.string(), "(-" * depth + "1" + ")" * depth)
+
+        p = parser.Parser(lexer.Lexer(" + ".join(["a * b"] * depth) + ";"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(program.string(), "(" * (depth - 1) + "(a * b)" + " + (a * b))" * (depth - 1))
+
+        p = parser.Parser(lexer.Lexer("(" * depth + "1" + ")" * depth + ";"))
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(program.string(), "1")
+
+    def test_missing_parse_functions(self):
+        tests = [
+            [";", ["no prefix parse function for ; found"]],
+            ["5 + ;", ["no prefix parse function for ; found"]],
+            ["-) 5", ["no prefix parse function for ) found"]],
+            ["a = 5;", ["no prefix parse function for = found"]],
+            ["(1 + 2;", ["expected next token to be ), got ; instead"]],
+            ["(;", ["no prefix parse function for ; found", "expected next token to be ), got EOF instead"]],
+        ]
+
+        for input, expected in tests:
+            p = parser.Parser(lexer.Lexer(input))
+            p.parse_program()
+            self.assertEqual(p.errors, expected)
+
+    def test_unterminated_statements(self):
+        for input in ["let x = 5", "return 5"]:
+            p = parser.Parser(lexer.Lexer(input))
+            program = p.parse_program()
+            self.check_parse_errors(p)
+            self.assertEqual(len(program.statements), 1)
+
+    def test_reset(self):
+        p = parser.Parser(lexer.Lexer("let 5;"))
+        p.parse_program()
+        self.assertEqual(len(p.errors), 1)
+
+        p.reset("a + b; c;")
+        program = p.parse_program()
+        self.check_parse_errors(p)
+        self.assertEqual(program.string(), "(a + b)c")
+
+        # token sources that cannot start over are replaced
+        for source in [lexer.Lexer("1").token_stream(), lexer.Lexer.from_stream(io.StringIO("1"))]:
+            p = parser.Parser(source)
+            p.parse_program()
+            p.reset("x * 2")
+            self.assertEqual(p.parse_program().string(), "(x * 2)")
+            self.assertEqual([program.string() for program, _ in p.parse_many(["1", "2 + 3"])], ["1", "(2 + 3)"])
+
+    def test_parse_many(self):
+        results = list(parser.parse_many(["1 + 2;", "let 5;", "-x"]))
+
+        self.assertEqual([program.string() for program, _ in results], ["(1 + 2)", "5", "(-x)"])
+        self.assertEqual([len(errors) for _, errors in results], [0, 1, 0])
+
     def check_parse_errors(self, parser):
         errors = parser.errors
         if len(errors) == 0:
@@ -0,0 +1,58 @@
+import unittest
+from intp import ast
+from intp import lexer
+from intp import parser
+from intp import purity
+
+
+def pure(input):
+    # the pure literals, by the name of the let binding them
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    ids = purity.pure_functions(program)
+    names = set()
+    stack = list(program.statements)
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if node.kind == ast.LET_STATEMENT and node.value.kind == ast.FUNCTION_LITERAL and id(node.value) in ids:
+            names.add(node.name.value)
+        stack.extend(getattr(node, field) for field in node.fields)
+        for field in node.list_fields:
+            stack.extend(getattr(node, field) or [])
+    return names
+
+
+class TestPurity(unittest.TestCase):
+    def test_pure(self):
+        tests = [
+            ("let f = fn(n) { n * 2 };", {"f"}),
+            ("let fib = fn(n) { if (n < 2) { n } else { fib(n - 1) + fib(n - 2) } };", {"fib"}),
+            ("let k = 2 * -3; let f = fn(n) { n * k };", {"f"}),
+            ("let f = fn(n) { let m = n + 1; let m = m * 2; m };", {"f"}),
+            ("let even = fn(n) { if (n == 0) { true } else { odd(n - 1) } }; let odd = fn(n) { !even(n) };", {"even", "odd"}),
+            ("let f = fn(g, n) { g(n) };", {"f"}),
+            ("let mk = fn(a) { let add = fn(b) { a + b }; add };", {"mk"}),
+            ("let f = fn(n) { sum(range(n)) };", {"f"}),
+        ]
+        for input, expected in tests:
+            self.assertEqual(pure(input), expected, input)
+
+    def test_impure(self):
+        tests = [
+            # bound again, so the result depends on when f is called
+            ("let k = 1; let f = fn(n) { n + k }; let k = 2;", set()),
+            ("let f = fn(n) { n + k }; if (true) { let k = 1; } let k = 2;", set()),
+            # not a constant
+            ("let g = fn() { 1 }; let k = g(); let f = fn(n) { n + k };", {"g"}),
+            # bound in another input
+            ("let f = fn(n) { n + k };", set()),
+            # impure through what it calls
+            ("let k = 1; let k = 2; let g = fn() { k }; let f = fn() { g() }; let h = fn() { f };", set()),
+            # a parameter of the enclosing function
+            ("let mk = fn(a) { let add = fn(b) { a + b }; let c = 1; let inc = fn(b) { b + c }; add };", {"mk", "inc"}),
+        ]
+        for input, expected in tests:
+            self.assertEqual(pure(input), expected, input)
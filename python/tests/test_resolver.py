@@ -0,0 +1,129 @@
+import unittest
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import resolver
+
+
+def parse(input):
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    return program
+
+
+class TestResolver(unittest.TestCase):
+    def test_locations(self):
+        program = parse("let a = 1; let b = a + 2; let a = b * a; a;")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+        self.assertEqual(r.scope.names, {"a": 0, "b": 1})
+
+        second = program.statements[1]
+        self.assertEqual(r.location(second.name), (0, 1))
+        self.assertEqual(r.location(second.value.left), (0, 0))
+        # rebinding a name reuses its slot
+        third = program.statements[2]
+        self.assertEqual(r.location(third.name), (0, 0))
+        self.assertEqual(r.location(program.statements[3].expression), (0, 0))
+
+    def test_undefined(self):
+        program = parse("let a = 1;\nlet b = a + c;\nb;")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, ["identifier not found: c"])
+        self.assertEqual(r.error_offsets, [23])
+        self.assertIsNone(r.location(program.statements[1].value.right))
+
+    def test_builtins(self):
+        program = parse("let f = fn(a) { len(a) }; push([], len)")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+        self.assertIsNone(r.location(program.statements[1].expression.function))
+
+    def test_let_value_before_name(self):
+        r = resolver.resolve(parse("let a = a;"))
+        self.assertEqual(r.errors, ["identifier not found: a"])
+
+    def test_nested_scope(self):
+        outer = resolver.resolve(parse("let a = 1; let b = 2;")).scope
+        program = parse("let c = b; let a = c;")
+        r = resolver.Resolver(resolver.Scope(outer)).resolve(program)
+        self.assertEqual(r.location(program.statements[0].value), (1, 1))
+        self.assertEqual(r.location(program.statements[1].name), (0, 1))
+        self.assertEqual(r.errors, ["a shadows a binding of an enclosing scope"])
+        self.assertEqual(r.error_offsets, [15])
+
+    def test_functions(self):
+        program = parse("let a = 1; let f = fn(x, y) { let z = x + a; f(z, y) }; f(1, 2)")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+        literal = program.statements[1].value
+        scope = r.function_scope(literal)
+        self.assertEqual(scope.names, {"x": 0, "y": 1, "z": 2})
+        self.assertIs(scope.outer, r.scope)
+
+        let_z, call = literal.body.statements
+        self.assertEqual(r.location(let_z.value.left), (0, 0))
+        self.assertEqual(r.location(let_z.value.right), (1, 0))
+        # the body is resolved after f is bound, so f can recurse
+        self.assertEqual(r.location(call.expression.function), (1, 1))
+        self.assertEqual(r.location(call.expression.arguments[0]), (0, 2))
+
+    def test_later_bindings_in_functions(self):
+        program = parse(
+            "let even = fn(n) { if (n == 0) { true } else { odd(n - 1) } };"
+            "let odd = fn(m) { if (m == 0) { false } else { even(m - 1) } };"
+            "let g = fn() { let h = fn() { k }; let k = 1; h };"
+        )
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+
+    def test_blocks_share_the_scope(self):
+        program = parse("if (true) { let a = 1; } a; let f = fn() { if (true) { let b = 2; } b }")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+        self.assertEqual(r.scope.names, {"a": 0, "f": 1})
+        self.assertEqual(r.function_scope(program.statements[2].value).names, {"b": 0})
+
+    def test_shadowing_parameters(self):
+        program = parse("let x = 1; let f = fn(x) { let y = x; fn(y) { y } }")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, ["x shadows a binding of an enclosing scope", "y shadows a binding of an enclosing scope"])
+        self.assertEqual(r.error_offsets, [22, 41])
+
+    def test_deep_expression(self):
+        depth = 5000
+        program = parse("let x = 1; " + "-" * depth + "x")
+        r = resolver.resolve(program)
+        self.assertEqual(r.errors, [])
+        node = program.statements[1].expression
+        for _ in range(depth):
+            node = node.right
+        self.assertEqual(r.location(node), (0, 0))
+
+    def test_evaluate_in_frame(self):
+        tests = [
+            ("let a = 5; let b = a * 2; b - a", "5"),
+            ("let a = 1; let a = a + 1; a", "2"),
+            ("let a = 5; a + true", "ERROR: type mismatch: INTEGER + BOOLEAN"),
+            ("let a = b;", "ERROR: identifier not found: b"),
+        ]
+        for input, expected in tests:
+            program = parse(input)
+            r = resolver.resolve(program)
+            result = evaluator.eval(program, object.Frame(len(r.scope)), r)
+            self.assertEqual(result.inspect(), expected, input)
+            self.assertEqual(evaluator.eval(program, object.Environment()).inspect(), expected, input)
+
+    def test_persistent_scope(self):
+        # one scope and one frame across inputs, as in the REPL
+        scope = resolver.Scope()
+        frame = object.Frame()
+        for input, expected in [("let a = 2;", None), ("let b = a * 3;", None), ("a + b", "8")]:
+            program = parse(input)
+            r = resolver.Resolver(scope).resolve(program)
+            self.assertEqual(r.errors, [])
+            result = evaluator.eval(program, frame, r)
+            self.assertEqual(result.inspect() if result else result, expected, input)
+        self.assertEqual(len(frame.slots), 2)
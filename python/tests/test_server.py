@@ -0,0 +1,180 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from intp import lexer
+from intp import parser
+from intp import server
+
+# about a third of a second of work
+SLOW = "let loop = fn(n, acc) { if (n == 0) { acc } else { loop(n - 1, acc + 1) } }; loop(100000, 0)"
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+    async def start(self, **options):
+        s = server.Server(workers=2, **options)
+        listener = await s.start()
+        self.addCleanup(s.close)
+        self.addAsyncCleanup(listener.wait_closed)
+        self.addCleanup(listener.close)
+        self.port = listener.sockets[0].getsockname()[1]
+        return s
+
+    async def connect(self):
+        client = await server.Client.connect(port=self.port)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_operations(self):
+        await self.start()
+        client = await self.connect()
+        self.assertEqual(
+            await client.request("lex", "let x = 1;"),
+            {"id": 1, "tokens": [["LET", "let"], ["IDENT", "x"], ["=", "="], ["INT", "1"], [";", ";"]]},
+        )
+        self.assertEqual(await client.request("parse", "1 + 2 * 3"), {"id": 2, "program": "(1 + (2 * 3))", "errors": []})
+        self.assertEqual(await client.request("eval", "let x = 2; x * 3"), {"id": 3, "value": "6", "errors": []})
+        self.assertEqual(
+            await client.request("eval", "let = 1;"),
+            {"id": 4, "value": None, "errors": ["expected next token to be IDENT, got = instead", "no prefix parse function for = found"]},
+        )
+        self.assertEqual(await client.request("eval", "let y = 1;"), {"id": 5, "value": None, "errors": []})
+
+    async def test_sessions(self):
+        await self.start()
+        a = await self.connect()
+        b = await self.connect()
+        for i in range(6):
+            await a.request("eval", "let x = %d;" % i)
+            await b.request("eval", "let x = %d;" % (i * 10))
+        self.assertEqual((await a.request("eval", "x"))["value"], "5")
+        self.assertEqual((await b.request("eval", "x"))["value"], "50")
+        c = await self.connect()
+        self.assertEqual((await c.request("eval", "x"))["value"], "ERROR: identifier not found: x")
+
+    async def test_timeout(self):
+        s = await self.start(timeout=2)
+        # the timeouts the workers are given
+        timeouts = []
+        run = s._run
+
+        def tracked(timeout, fn, *args):
+            timeouts.append(args[4])
+            return run(timeout, fn, *args)
+
+        s._run = tracked
+        client = await self.connect()
+        await client.request("eval", "let x = 1;")
+        forever = "let f = fn(n) { f(n + 1) }; f(0)"
+        self.assertEqual(await client.request("eval", forever, timeout=0.2), {"id": 2, "error": "timeout"})
+        # the second may have been sent again with the history
+        self.assertEqual(timeouts[0], 2)
+        self.assertEqual(set(timeouts[1:]), {0.2})
+        # the input that timed out is not part of the session
+        self.assertEqual((await client.request("eval", "f"))["value"], "ERROR: identifier not found: f")
+        self.assertEqual((await client.request("eval", "x + 1"))["value"], "2")
+
+    async def test_bad_requests(self):
+        await self.start(max_request=100)
+        client = await self.connect()
+        client.writer.write(b"{\n[1]\n")
+        self.assertEqual(await client.reader.readline(), b'{"id": null, "error": "invalid JSON"}\n')
+        self.assertEqual(await client.reader.readline(), b'{"id": null, "error": "request must be an object"}\n')
+        self.assertEqual(await client.request("run", "1"), {"id": 1, "error": "unknown op: run"})
+        self.assertEqual(await client.request("eval", 1), {"id": 2, "error": "source must be a string"})
+        self.assertEqual(await client.request("eval", "1", timeout=0), {"id": 3, "error": "timeout must be a positive number"})
+        self.assertEqual(await client.request("eval", "1", timeout=True), {"id": 4, "error": "timeout must be a positive number"})
+        self.assertEqual(await client.request("eval", "1" * 200), {"id": None, "error": "request too large"})
+        self.assertEqual(await client.reader.readline(), b"")
+
+    async def test_backpressure(self):
+        s = await self.start(max_pending=1)
+        # set once the first request holds the only slot
+        started = asyncio.Event()
+        respond = s._respond
+
+        async def tracked(line, session):
+            started.set()
+            return await respond(line, session)
+
+        s._respond = tracked
+        a = await self.connect()
+        b = await self.connect()
+        done = []
+
+        async def request(client, source):
+            await client.request("eval", source)
+            done.append(client)
+
+        slow = asyncio.ensure_future(request(a, SLOW))
+        await started.wait()
+        await request(b, "1")
+        await slow
+        # a worker was free, but the slot was not
+        self.assertEqual(done, [a, b])
+
+    async def test_history(self):
+        await self.start(max_history=30)
+        client = await self.connect()
+        self.assertEqual((await client.request("eval", "let x = 1;"))["errors"], [])
+        # inputs binding nothing are not kept
+        for _ in range(20):
+            self.assertEqual((await client.request("eval", "x + 1"))["value"], "2")
+        self.assertEqual((await client.request("eval", "let y = x + 1;"))["errors"], [])
+        self.assertEqual(await client.request("eval", "let z = 3;"), {"id": 23, "error": "session history full"})
+        self.assertEqual((await client.request("eval", "x + y"))["value"], "3")
+        self.assertEqual((await client.request("eval", "z"))["value"], "ERROR: identifier not found: z")
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "intp.sock")
+            s = server.Server(workers=1)
+            listener = await s.start(path=path)
+            try:
+                client = await server.Client.connect(path=path)
+                self.assertEqual(await client.request("eval", "1 + 1"), {"id": 1, "value": "2", "errors": []})
+                await client.close()
+            finally:
+                listener.close()
+                await listener.wait_closed()
+                s.close()
+
+
+class TestWorker(unittest.TestCase):
+    def evaluate(self, *args):
+        result = server._evaluate(*args)
+        if result is not None:
+            result.pop("seconds", None)
+        return result
+
+    def test_rebuild(self):
+        session = 1000
+        room = server.MAX_HISTORY
+        self.assertEqual(self.evaluate(session, 0, 1, "let x = 2;", 1, room), {"value": None, "errors": [], "binds": True})
+        self.assertEqual(self.evaluate(session, 1, 2, "x * 3", 1, room), {"value": "6", "errors": [], "binds": False})
+        # tagged 7 elsewhere: this worker cannot go on without the history
+        self.assertIsNone(self.evaluate(session, 7, 8, "x", 1, room))
+        history = ("let x = 2;", "let x = x + 1;")
+        self.assertEqual(self.evaluate(session, 7, 8, "x", 1, room, history), {"value": "3", "errors": [], "binds": False})
+        self.assertEqual(self.evaluate(session, 8, 9, "x", 1, room), {"value": "3", "errors": [], "binds": False})
+        self.assertEqual(self.evaluate(session, 9, 10, "let y = 1;", 1, 5), {"error": "session history full"})
+        self.assertEqual(self.evaluate(session, 9, 10, "x", 1, 0)["value"], "3")
+        del server._environments[session]
+
+    def test_replay_has_its_own_timer(self):
+        # the history takes longer than the request may
+        session = 1001
+        history = (SLOW.replace("loop(100000, 0)", "let n = loop(100000, 0);"),)
+        result = self.evaluate(session, 7, 8, "n", 0.05, server.MAX_HISTORY, history, 30)
+        self.assertEqual(result["value"], "100000")
+        del server._environments[session]
+
+    def test_binds(self):
+        tests = [
+            ("let x = 1;", True),
+            ("if (true) { let x = 1; }", True),
+            ("1 + 1; x", False),
+            ("fn() { let x = 1; }", False),
+        ]
+        for input, expected in tests:
+            self.assertEqual(server._binds(parser.Parser(lexer.Lexer(input)).parse_program()), expected, input)
@@ -0,0 +1,62 @@
+import unittest
+from intp import lexer
+from intp import parser
+from intp import stats
+from intp import token
+
+
+class TestStats(unittest.TestCase):
+    def test_parse(self):
+        input = "let a = 1 + 2 * (3 - -b); a;"
+        program, errors, s = stats.parse(input)
+        self.assertEqual(errors, [])
+        self.assertEqual(program.string(), parser.Parser(lexer.Lexer(input)).parse_program().string())
+
+        self.assertEqual(s.tokens[token.INT], 3)
+        self.assertEqual(s.tokens[token.IDENT], 3)
+        self.assertEqual(s.tokens[token.LPAREN], 1)
+        self.assertEqual(
+            dict(s.nodes),
+            {
+                "Program": 1,
+                "LetStatement": 1,
+                "ExpressionStatement": 1,
+                "Identifier": 3,
+                "IntegerLiteral": 3,
+                "InfixExpression": 3,
+                "PrefixExpression": 1,
+            },
+        )
+        # + > * > - > -b > b
+        self.assertEqual(s.max_depth, 5)
+        self.assertEqual(s.errors, 0)
+        self.assertGreater(s.lex_time, 0)
+        self.assertGreater(s.parse_time, 0)
+
+    def test_errors(self):
+        _, errors, s = stats.parse("let = 5; 1 +")
+        self.assertEqual(errors[0], "expected next token to be IDENT, got = instead")
+        self.assertEqual(s.errors, len(errors))
+
+    def test_accumulate(self):
+        s = stats.Stats()
+        stats.parse("1 + 2", s)
+        stats.parse("-(-(-x))", s)
+        self.assertEqual(s.nodes["Program"], 2)
+        self.assertEqual(s.nodes["PrefixExpression"], 3)
+        self.assertEqual(s.max_depth, 4)
+        self.assertEqual(sorted(s.as_dict()), ["errors", "lex_time", "max_depth", "nodes", "parse_time", "tokens"])
+
+    def test_deep(self):
+        depth = 5000
+        _, errors, s = stats.parse("(" * depth + "1" + ")" * depth)
+        self.assertEqual(errors, [])
+        self.assertEqual(s.max_depth, 1)
+        _, _, s = stats.parse("-" * depth + "1")
+        self.assertEqual(s.max_depth, depth + 1)
+
+    def test_report(self):
+        report = stats.parse("1 + 1;")[2].report()
+        self.assertIn("tokens:     5 (INT 2, + 1, ; 1, EOF 1)", report)
+        self.assertIn("nodes:      5 (IntegerLiteral 2, Program 1, ExpressionStatement 1, InfixExpression 1)", report)
+        self.assertIn("max depth:  2", report)
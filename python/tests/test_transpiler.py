@@ -0,0 +1,80 @@
+import unittest
+from intp import evaluator
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import transpiler
+
+
+def parse(input):
+    p = parser.Parser(lexer.Lexer(input))
+    program = p.parse_program()
+    assert not p.errors, p.errors
+    return program
+
+
+class TestTranspiler(unittest.TestCase):
+    def test_same_as_evaluator(self):
+        tests = [
+            "5 + 5 * 2",
+            "(5 + 10 * 2 + 15 / 3) * 2 + -10",
+            "7 / 2; -7 / 2",
+            "7 / -2",
+            "-8 / 2",
+            "let x = 10; x / 3 / (x - 13)",
+            "1 < 2 == 3 > 2",
+            "true == 1",
+            "1 != false",
+            "!(1 == 1) != false",
+            "!5",
+            "!!true",
+            "let a = 5; let b = a * 2; b",
+            "9; return 2 * 5; 9;",
+            "let x = 1;",
+            "",
+            "1 + true",
+            "true + false",
+            "true < false",
+            "-true",
+            "foo",
+            "1 + foo",
+            "let a = 1 / 0; 5",
+            "return 1; 1 + true",
+            "let a = 1; let a = true; -a",
+            "1000 * 1000",
+        ]
+        for input in tests:
+            program = parse(input)
+            expected = evaluator.eval(program, object.Environment())
+            result = transpiler.run(program)
+            if expected is None:
+                self.assertIsNone(result, input)
+            else:
+                self.assertIs(type(result), type(expected), input)
+                self.assertEqual(result.inspect(), expected.inspect(), input)
+
+    def test_source(self):
+        source = transpiler.source(parse("let x = 10; let y = -x * 2 < x; !y"))
+        self.assertEqual(
+            source,
+            "def monkey_program():\n    v_x = 10\n    v_y = -v_x * 2 < v_x\n    return not v_y",
+        )
+        self.assertIn("_fail('type mismatch: INTEGER + BOOLEAN', 1, True)", transpiler.source(parse("1 + true")))
+
+    def test_cached_by_program(self):
+        first = transpiler.compile_program(parse("1 + 2 * x"))
+        self.assertIs(transpiler.compile_program(parse("1 + (2 * x);")), first)
+        self.assertIsNot(transpiler.compile_program(parse("1 + 2 * y")), first)
+        # statements that print run together are still different programs
+        self.assertEqual(transpiler.run(parse("1; 2")).value, 2)
+        self.assertEqual(transpiler.run(parse("12")).value, 12)
+        self.assertEqual(transpiler.run(parse("let a = 1; let b = 2; a; b")).value, 2)
+        self.assertEqual(transpiler.run(parse("let a = 1; let b = 2; let ab = 3; ab")).value, 3)
+
+    def test_results(self):
+        self.assertIs(transpiler.run(parse("1 < 2")), object.TRUE)
+        self.assertIs(transpiler.run(parse("2 + 3")), object.integer(5))
+
+    def test_deep_expression(self):
+        result = transpiler.run(parse("-" * 5000 + "1"))
+        self.assertEqual(result.inspect(), "ERROR: expression nested too deeply")
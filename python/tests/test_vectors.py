@@ -0,0 +1,67 @@
+import unittest
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import vectors
+
+
+def function(input):
+    p = parser.Parser(lexer.Lexer(input))
+    literal = p.parse_program().statements[0].expression
+    assert not p.errors, p.errors
+    return object.Function(literal.parameters, literal.body, None)
+
+
+class TestVectors(unittest.TestCase):
+    def test_pack(self):
+        self.assertEqual(vectors.pack([1, -2, vectors.INT64_MAX]).tolist(), [1, -2, vectors.INT64_MAX])
+        self.assertIsNone(vectors.pack([1, vectors.INT64_MAX + 1]))
+        self.assertIsNone(vectors.pack([vectors.INT64_MIN - 1]))
+        self.assertEqual(vectors.span(2, 5).tolist(), [2, 3, 4])
+        self.assertEqual(vectors.span(5, 2).tolist(), [])
+        self.assertIsNone(vectors.span(0, vectors.INT64_MAX + 2))
+        self.assertEqual(vectors.append(vectors.pack([1]), 2).tolist(), [1, 2])
+        self.assertIsNone(vectors.append(vectors.pack([1]), vectors.INT64_MAX + 1))
+
+    def test_total(self):
+        self.assertEqual(vectors.total(vectors.span(0, 1000)), 499500)
+        big = vectors.pack([vectors.INT64_MAX] * 3)
+        self.assertEqual(vectors.total(big), 3 * vectors.INT64_MAX)
+
+    def test_kernel(self):
+        tests = [
+            ("fn(x) { x * 2 + 1 }", False),
+            ("fn(x) { -x / 3 }", False),
+            ("fn(n) { return 7 - n; }", False),
+            ("fn(x) { 5 }", False),
+            ("fn(x) { x * x != 4 }", True),
+        ]
+        for input, boolean in tests:
+            k = vectors.kernel(function(input))
+            self.assertIsNotNone(k, input)
+            self.assertEqual(k.boolean, boolean, input)
+
+        for input in [
+            "fn(x, y) { x }",
+            "fn(x) { y }",
+            "fn(x) { f(x) }",
+            "fn(x) { !x }",
+            "fn(x) { true }",
+            "fn(x) { x < 1 == true }",
+            "fn(x) { let y = x; y }",
+            "fn(x) { if (x) { 1 } }",
+            "fn(x) { }",
+        ]:
+            self.assertIsNone(vectors.kernel(function(input)), input)
+
+    def test_map_and_filter(self):
+        v = vectors.span(-3, 4)
+        self.assertEqual(vectors.map_vector(vectors.kernel(function("fn(x) { x * 3 / 2 }")), v).tolist(), [-4, -3, -1, 0, 1, 3, 4])
+        self.assertEqual(vectors.filter_vector(vectors.kernel(function("fn(x) { x > 1 }")), v).tolist(), [2, 3])
+        # a division by zero is left to the evaluator to report
+        self.assertIsNone(vectors.map_vector(vectors.kernel(function("fn(x) { 1 / x }")), v))
+        # results that do not fit come back as objects
+        results = vectors.map_vector(vectors.kernel(function("fn(x) { x + 9223372036854775807 }")), v)
+        self.assertEqual([result.value for result in results][-1], vectors.INT64_MAX + 3)
+        results = vectors.map_vector(vectors.kernel(function("fn(x) { x == 0 }")), v)
+        self.assertEqual([result.inspect() for result in results][2:5], ["false", "true", "false"])
@@ -0,0 +1,98 @@
+import unittest
+from intp import code
+from intp import compiler
+from intp import lexer
+from intp import object
+from intp import parser
+from intp import vm
+
+
+def run(input):
+    c = compiler.Compiler()
+    c.compile(parser.Parser(lexer.Lexer(input)).parse_program())
+    machine = vm.VM(c.bytecode())
+    machine.run()
+    return machine
+
+
+class TestVM(unittest.TestCase):
+    def check(self, tests):
+        for input, expected in tests:
+            machine = run(input)
+            result = machine.last_popped_stack_elem()
+            self.assertEqual(result.inspect(), expected, input)
+            self.assertEqual(machine.sp, 0, input)
+
+    def test_integer_arithmetic(self):
+        self.check([
+            ["1", "1"],
+            ["1 + 2", "3"],
+            ["1 - 2", "-1"],
+            ["4 / 2", "2"],
+            ["50 / 2 * 2 + 10 - 5", "55"],
+            ["5 * (2 + 10)", "60"],
+            ["-50 + 100 + -50", "0"],
+            ["(5 + 10 * 2 + 15 / 3) * 2 + -10", "50"],
+            ["-7 / 2", "-3"],
+            ["1000 * 1000", "1000000"],
+        ])
+
+    def test_boolean_expressions(self):
+        self.check([
+            ["true", "true"],
+            ["1 < 2", "true"],
+            ["1 > 2", "false"],
+            ["1 == 2", "false"],
+            ["1 != 2", "true"],
+            ["true == false", "false"],
+            ["(1 < 2) == true", "true"],
+            ["true == 1", "false"],
+            ["!true", "false"],
+            ["!!5", "true"],
+        ])
+
+    def test_global_let_statements(self):
+        self.check([
+            ["let one = 1; one", "1"],
+            ["let one = 1; let two = one + one; one + two", "3"],
+            ["9; return 2 * 5; 9;", "10"],
+        ])
+
+    def test_errors(self):
+        tests = [
+            ["5 + true", "type mismatch: INTEGER + BOOLEAN"],
+            ["true + false", "unknown operator: BOOLEAN + BOOLEAN"],
+            ["true < false", "unknown operator: BOOLEAN < BOOLEAN"],
+            ["-true", "unknown operator: -BOOLEAN"],
+            ["1 / (2 - 2)", "division by zero"],
+        ]
+        for input, expected in tests:
+            with self.assertRaises(vm.VMError) as cm:
+                run(input)
+            self.assertEqual(str(cm.exception), expected)
+
+    def test_malformed_bytecode(self):
+        tests = [
+            [bytes([code.OP_TRUE]) * (vm.STACK_SIZE + 1), "stack overflow"],
+            [bytes([code.OP_TRUE, code.OP_CONSTANT, 0]), "invalid instruction at 1"],
+            [code.make(code.OP_CONSTANT, 3), "invalid instruction at 0"],
+        ]
+        for instructions, expected in tests:
+            with self.assertRaises(vm.VMError) as cm:
+                vm.VM(compiler.Bytecode(instructions, [])).run()
+            self.assertEqual(str(cm.exception), expected)
+
+    def test_small_integers_are_shared(self):
+        self.assertIs(run("2 + 3").last_popped_stack_elem(), object.integer(5))
+
+    def test_keeps_globals(self):
+        first = compiler.Compiler()
+        first.compile(parser.Parser(lexer.Lexer("let a = 5;")).parse_program())
+        machine = vm.VM(first.bytecode())
+        machine.run()
+
+        second = compiler.Compiler(first.symbol_table, first.constants)
+        second.compile(parser.Parser(lexer.Lexer("a * 2")).parse_program())
+        machine = vm.VM(second.bytecode(), machine.globals)
+        machine.run()
+        self.assertEqual(machine.last_popped_stack_elem().value, 10)